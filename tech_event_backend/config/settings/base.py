@@ -48,6 +48,11 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 # Middleware
 MIDDLEWARE = [
+    'core.middleware.TracingMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.RequestLogMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.QueryProfileMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -55,6 +60,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.RateLimitMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
@@ -95,6 +102,16 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    # orjson-backed JSON with the stdlib encoder as fallback (see core.renderers)
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
@@ -176,16 +193,99 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+TEST_RUNNER = 'core.testing.TestRunner'
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Redis for shared counters (trending events); in-process counters are used when unset
+REDIS_URL = os.environ.get('REDIS_URL')
+# The default cache is shared by every worker through the same Redis; without it
+# each process keeps its own memory cache (fine for development and tests only)
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'cache',
+            'OPTIONS': {
+                'socket_timeout': float(os.environ.get('CACHE_REDIS_TIMEOUT', '0.25')),
+                'socket_connect_timeout': float(os.environ.get('CACHE_REDIS_TIMEOUT', '0.25')),
+            },
+        }
+    }
+TRENDING_REDIS_MAX_CONNECTIONS = int(os.environ.get('TRENDING_REDIS_MAX_CONNECTIONS', '20'))
+TRENDING_REDIS_TIMEOUT = float(os.environ.get('TRENDING_REDIS_TIMEOUT', '0.1'))
+
+# Sliding-window rate limits (see core.ratelimit). The first rule whose prefix
+# matches applies; limits are per client per window, by role ('anonymous' for
+# unauthenticated callers, '*' for roles not listed), and a missing role is unlimited.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+RATE_LIMIT_RULES = [
+    {'name': 'auth', 'prefix': '/api/auth/token/', 'window': 60, 'limits': {'anonymous': 10}},
+    {'name': 'webhook', 'prefix': '/api/payments/webhook/', 'window': 60, 'limits': {}},
+    {'name': 'payments', 'prefix': '/api/payments/', 'window': 60, 'limits': {'*': 30, 'ADMIN': 300}},
+    {'name': 'api', 'prefix': '/api/', 'window': 60, 'limits': {'anonymous': 60, '*': 300, 'ADMIN': 1200}},
+]
+RATE_LIMIT_REDIS_MAX_CONNECTIONS = int(os.environ.get('RATE_LIMIT_REDIS_MAX_CONNECTIONS', '20'))
+RATE_LIMIT_REDIS_TIMEOUT = float(os.environ.get('RATE_LIMIT_REDIS_TIMEOUT', '0.05'))
+# Redis errors or calls slower than this open the circuit; local limits apply until a probe succeeds
+RATE_LIMIT_BREAKER_FAILURES = int(os.environ.get('RATE_LIMIT_BREAKER_FAILURES', '5'))
+RATE_LIMIT_BREAKER_SLOW_MS = float(os.environ.get('RATE_LIMIT_BREAKER_SLOW_MS', '20'))
+RATE_LIMIT_BREAKER_RESET_SECONDS = float(os.environ.get('RATE_LIMIT_BREAKER_RESET_SECONDS', '10'))
+# Cost-weighted quotas for expensive endpoints (see core.quotas): units per
+# window by role, and milliseconds of measured latency per unit
+QUOTA_WINDOW = 60
+QUOTA_BUDGETS = {'anonymous': 20, '*': 200, 'ADMIN': 1000}
+QUOTA_MS_PER_UNIT = int(os.environ.get('QUOTA_MS_PER_UNIT', '50'))
+# Only behind a proxy that sets X-Forwarded-For; otherwise clients can pick their own key
+RATE_LIMIT_TRUST_X_FORWARDED_FOR = os.environ.get('RATE_LIMIT_TRUST_X_FORWARDED_FOR', 'False').lower() == 'true'
+
+# Geocoding of event locations (see core.geocoding)
+GEOCODING_PROVIDER = os.environ.get('GEOCODING_PROVIDER', 'core.geocoding.StubGeocoder')
+GEOCODING_USER_AGENT = os.environ.get('GEOCODING_USER_AGENT', 'tech-event-backend')
+
+# SQL profiling of a sample of requests (0 disables it); see core.query_stats
+QUERY_PROFILING_SAMPLE_RATE = float(os.environ.get('QUERY_PROFILING_SAMPLE_RATE', '0'))
+QUERY_PROFILING_N_PLUS_ONE_THRESHOLD = int(os.environ.get('QUERY_PROFILING_N_PLUS_ONE_THRESHOLD', '5'))
+
+# cProfile captures for staff (X-Profile: 1) and a random sample (see core.profiling),
+# stored in PROFILING_DIR (a temporary directory when unset)
+PROFILING_DIR = os.environ.get('PROFILING_DIR')
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_MAX_PER_MINUTE = int(os.environ.get('PROFILING_MAX_PER_MINUTE', '10'))
+PROFILING_MAX_STORED = int(os.environ.get('PROFILING_MAX_STORED', '50'))
+PROFILING_MAX_BYTES = int(os.environ.get('PROFILING_MAX_BYTES', str(1024 * 1024)))
+
+# Request tracing (see core.tracing): sampled traces go to a JSON lines file
+# and/or are posted to a collector
+TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', '0'))
+TRACING_EXPORT_PATH = os.environ.get('TRACING_EXPORT_PATH')
+TRACING_COLLECTOR_URL = os.environ.get('TRACING_COLLECTOR_URL')
+# Only behind a gateway that sets traceparent; otherwise clients could force every request to be traced
+TRACING_TRUST_TRACEPARENT = os.environ.get('TRACING_TRUST_TRACEPARENT', 'False').lower() == 'true'
+
+# Prometheus metrics (see core.metrics). Workers write snapshots to METRICS_DIR;
+# /metrics is served to staff users or to requests bearing METRICS_TOKEN
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Response compression (brotli when installed, else gzip) for text bodies of at least COMPRESSION_MIN_SIZE bytes
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'True').lower() == 'true'
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4'))
+
+# Records allowed per logging call site and minute (0 disables the limit)
+LOG_RATE_LIMIT_PER_MINUTE = int(os.environ.get('LOG_RATE_LIMIT_PER_MINUTE', '20'))
+
 # Logging configuration
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
         'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
+            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {trace_id} {message}',
             'style': '{',
         },
         'simple': {
@@ -193,15 +293,25 @@ LOGGING = {
             'style': '{',
         },
     },
+    'filters': {
+        'trace_id': {
+            '()': 'core.tracing.TraceIdFilter',
+        },
+        'rate_limit': {
+            '()': 'core.jsonlog.RateLimitFilter',
+        },
+    },
     'handlers': {
+        # JSON lines written by a background thread (see core.jsonlog)
         'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            '()': 'core.jsonlog.AsyncJsonHandler',
+            'filters': ['trace_id', 'rate_limit'],
         },
         'file': {
             'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
             'formatter': 'verbose',
+            'filters': ['trace_id'],
         },
     },
     'root': {
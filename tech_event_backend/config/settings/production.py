@@ -194,10 +194,19 @@ LOGGING = {
             'style': '{',
         },
     },
+    'filters': {
+        'trace_id': {
+            '()': 'core.tracing.TraceIdFilter',
+        },
+        'rate_limit': {
+            '()': 'core.jsonlog.RateLimitFilter',
+        },
+    },
     'handlers': {
+        # JSON lines written by a background thread (see core.jsonlog)
         'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            '()': 'core.jsonlog.AsyncJsonHandler',
+            'filters': ['trace_id', 'rate_limit'],
         },
     },
     'root': {
@@ -3,6 +3,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from core.views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -10,5 +11,7 @@ urlpatterns = [
     path('api/events/', include('events.api.urls')),
     path('api/tickets/', include('tickets.api.urls')),
     path('api/payments/', include('payments.api.urls')),
+    path('api/diagnostics/', include('core.urls')),
     path('accounts/', include('allauth.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
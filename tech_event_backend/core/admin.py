@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import GeocodeCache
 
-# Register your models here.
+
+@admin.register(GeocodeCache)
+class GeocodeCacheAdmin(admin.ModelAdmin):
+    list_display = ['query', 'latitude', 'longitude', 'provider', 'created_at']
+    search_fields = ['query']
+    list_filter = ['provider']
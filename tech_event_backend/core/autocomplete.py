@@ -0,0 +1,257 @@
+# core/autocomplete.py
+"""
+Typeahead suggestions for event titles, categories and locations.
+
+Every published event contributes a title suggestion, and each distinct
+category and location is one suggestion shared by its events. A suggestion is
+indexed under every word it contains ("advanced python" is found by "adv" and
+by "py"), as normalized keys in a sorted list: a prefix query is two bisects
+plus a NumPy top-N by popularity over the matching slice. Popularity is
+1 + completed tickets for titles, summed over the events of a category or
+location.
+
+Saves go into a small unsorted delta that queries scan linearly, and removals
+just mark the suggestion dead; past `DELTA_LIMIT` keys the index is compacted.
+Each worker holds its own copy. The compacted index is also stored in the
+cache as a snapshot, so workers load it instead of querying the database, and
+`Event` signals record changes in a `core.changelog.ChangeLog` for the other
+workers to replay. Snapshots older than `REBUILD_SECONDS` are rebuilt from the
+database to refresh popularity. Snapshot and change log are only shared with a
+shared cache (REDIS_URL); otherwise a worker's suggestions can lag other
+workers' saves by up to `REBUILD_SECONDS`.
+"""
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Q
+from events.models import Event
+from core.changelog import ChangeLog
+
+DELTA_LIMIT = 1000
+MAX_KEY_WORDS = 8
+MAX_KEY_LENGTH = 64
+REBUILD_SECONDS = 60 * 60
+SNAPSHOT_KEY = 'autocomplete:snapshot'
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+TITLE, CATEGORY, LOCATION = 'title', 'category', 'location'
+
+_NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse punctuation to single spaces"""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode()
+    return _NON_WORD_RE.sub(' ', text.lower()).strip()
+
+
+def index_keys(text):
+    """Keys for a suggestion: the normalized text starting at each of its words"""
+    words = normalize(text).split()
+    return {' '.join(words[i:])[:MAX_KEY_LENGTH] for i in range(min(len(words), MAX_KEY_WORDS))}
+
+
+class PrefixIndex:
+    """Sorted-key prefix index over suggestions with popularity ranking"""
+
+    def __init__(self, version=0):
+        self.version = version
+        self.built_at = time.time()
+        self.suggestions = []  # (text, kind, event_id or None)
+        self.popularity = np.zeros(0)
+        self.alive = np.zeros(0, dtype=bool)
+        self.members = {}  # suggestion id -> number of events sharing a category/location
+        self.groups = {}  # (kind, normalized text) -> suggestion id
+        self.events = {}  # event id -> (title id, category id, location id, weight)
+        self.keys, self.key_ids = [], np.zeros(0, dtype=np.int64)
+        self.delta = []  # (key, suggestion id)
+
+    def _add_suggestion(self, text, kind, event_id=None):
+        suggestion_id = len(self.suggestions)
+        self.suggestions.append((text, kind, event_id))
+        if suggestion_id == len(self.popularity):
+            # Grow the per-suggestion arrays geometrically
+            extra = max(1024, suggestion_id)
+            self.popularity = np.concatenate([self.popularity, np.zeros(extra)])
+            self.alive = np.concatenate([self.alive, np.zeros(extra, dtype=bool)])
+        self.popularity[suggestion_id] = 0.0
+        self.alive[suggestion_id] = True
+        self.delta.extend((key, suggestion_id) for key in index_keys(text))
+        return suggestion_id
+
+    def _join_group(self, kind, text, weight):
+        group = (kind, normalize(text))
+        if not group[1]:
+            return None
+        suggestion_id = self.groups.get(group)
+        if suggestion_id is None:
+            suggestion_id = self.groups[group] = self._add_suggestion(text.strip(), kind)
+            self.members[suggestion_id] = 0
+        self.members[suggestion_id] += 1
+        self.popularity[suggestion_id] += weight
+        self.alive[suggestion_id] = True
+        return suggestion_id
+
+    def add_event(self, event_id, title, category, location, tickets_sold=None):
+        """Index or re-index a published event; an edit keeps its known ticket count"""
+        previous = self.events.get(event_id)
+        weight = 1 + tickets_sold if tickets_sold is not None else (previous[3] if previous else 1)
+        self.remove_event(event_id)
+
+        title_id = self._add_suggestion(title.strip(), TITLE, event_id)
+        self.popularity[title_id] = weight
+        self.events[event_id] = (
+            title_id,
+            self._join_group(CATEGORY, category, weight),
+            self._join_group(LOCATION, location, weight),
+            weight,
+        )
+
+    def remove_event(self, event_id):
+        entry = self.events.pop(event_id, None)
+        if entry is None:
+            return
+        title_id, category_id, location_id, weight = entry
+        self.alive[title_id] = False
+        for suggestion_id in (category_id, location_id):
+            if suggestion_id is None:
+                continue
+            self.members[suggestion_id] -= 1
+            self.popularity[suggestion_id] -= weight
+            if not self.members[suggestion_id]:
+                self.alive[suggestion_id] = False
+
+    @property
+    def needs_compaction(self):
+        return len(self.delta) > DELTA_LIMIT
+
+    def compact(self):
+        """Merge the delta into the sorted keys, dropping keys of dead suggestions"""
+        pairs = [
+            (key, suggestion_id)
+            for key, suggestion_id in zip(self.keys, self.key_ids.tolist())
+            if self.alive[suggestion_id]
+        ]
+        pairs.extend(pair for pair in self.delta if self.alive[pair[1]])
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.key_ids = np.array([suggestion_id for _, suggestion_id in pairs], dtype=np.int64)
+        self.delta = []
+
+    def search(self, prefix, limit=8):
+        """Top suggestions (text, kind, event_id) whose words start with the prefix"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + '\x7f', lo)
+        ids = self.key_ids[lo:hi]
+        if self.delta:
+            ids = np.concatenate([ids, [i for key, i in self.delta if key.startswith(prefix)]]).astype(np.int64)
+        ids = ids[self.alive[ids]]
+
+        # A suggestion can match on several of its words; over-select, then dedupe
+        if len(ids) > limit * 3:
+            ids = ids[np.argpartition(-self.popularity[ids], limit * 3)[:limit * 3]]
+        ids = ids[np.argsort(-self.popularity[ids], kind='stable')]
+
+        results, seen = [], set()
+        for suggestion_id in ids.tolist():
+            if suggestion_id not in seen:
+                seen.add(suggestion_id)
+                results.append(self.suggestions[suggestion_id])
+                if len(results) == limit:
+                    break
+        return results
+
+
+def build_index(version=0):
+    """Build and compact an index of all published events"""
+    index = PrefixIndex(version=version)
+    events = Event.objects.filter(status='PUBLISHED').annotate(
+        sold=Count('tickets', filter=Q(tickets__payment_status='COMPLETED'))
+    ).values_list('id', 'title', 'category', 'location', 'sold')
+    for event_id, title, category, location, sold in events.iterator():
+        index.add_event(event_id, title, category, location, tickets_sold=sold)
+    index.compact()
+    return index
+
+
+def apply_changes(index, event_ids):
+    """Re-read changed events and re-index or drop them"""
+    events = Event.objects.filter(pk__in=event_ids, status='PUBLISHED').values_list('id', 'title', 'category', 'location')
+    published = set()
+    for event_id, title, category, location in events:
+        index.add_event(event_id, title, category, location)
+        published.add(event_id)
+    for event_id in set(event_ids) - published:
+        index.remove_event(event_id)
+
+
+changes = ChangeLog('autocomplete')
+_index = None
+_lock = threading.Lock()
+
+
+def _publish(index):
+    index.compact()
+    cache.set(SNAPSHOT_KEY, index, SNAPSHOT_TIMEOUT)
+
+
+def get_index():
+    """The process-local index, caught up with the shared snapshot and change log"""
+    global _index
+    version = changes.version()
+    with _lock:
+        if _index is None or time.time() - _index.built_at > REBUILD_SECONDS:
+            snapshot = cache.get(SNAPSHOT_KEY)
+            if snapshot is not None and time.time() - snapshot.built_at <= REBUILD_SECONDS:
+                _index = snapshot
+            else:
+                _index = build_index(version)
+                _publish(_index)
+
+        if version != _index.version:
+            changed = changes.changes(_index.version, version)
+            if changed is None:
+                _index = build_index(version)
+                _publish(_index)
+            else:
+                apply_changes(_index, changed)
+                _index.version = version
+                if _index.needs_compaction:
+                    _publish(_index)
+        return _index
+
+
+def clear_index():
+    """Drop the process-local index so it is reloaded on next use (used by tests)"""
+    global _index
+    with _lock:
+        _index = None
+
+
+def record_change(event, deleted=False):
+    """Apply a saved or deleted event locally and announce it to other workers"""
+    version = changes.record(event.pk)
+    with _lock:
+        # Another worker's change in between means this one will be replayed with it
+        if _index is None or _index.version != version - 1:
+            return
+        if event.status == 'PUBLISHED' and not deleted:
+            _index.add_event(event.pk, event.title, event.category, event.location)
+        else:
+            _index.remove_event(event.pk)
+        _index.version = version
+        if _index.needs_compaction:
+            _publish(_index)
+
+
+def suggest(prefix, limit=8):
+    index = get_index()
+    with _lock:
+        return index.search(prefix, limit=limit)
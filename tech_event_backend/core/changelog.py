@@ -0,0 +1,46 @@
+# core/changelog.py
+"""
+Versioned change log kept in the cache.
+
+Per-process indexes (similar events, autocomplete) are updated in place by
+model signals in the worker that handled the save. Every change also bumps a
+version counter in the cache and stores the changed id under that version, so
+other workers notice they are behind and re-read only those ids.
+
+This only reaches other workers when the cache is shared (the Redis cache
+configured by REDIS_URL). With the per-process memory cache each worker sees
+just its own changes, and an index is at most as stale as its rebuild interval
+(`REBUILD_SECONDS` in core.similarity and core.autocomplete).
+"""
+from django.core.cache import cache
+
+CHANGE_TIMEOUT = 60 * 60 * 24
+# Workers further behind than this rebuild instead of replaying changes
+MAX_REPLAY = 1000
+
+
+class ChangeLog:
+    def __init__(self, name, timeout=CHANGE_TIMEOUT, max_replay=MAX_REPLAY):
+        self.key = f'{name}:version'
+        self.timeout = timeout
+        self.max_replay = max_replay
+
+    def version(self):
+        return cache.get(self.key, 0)
+
+    def record(self, object_id):
+        """Log a changed id and return the new version"""
+        cache.add(self.key, 0, None)
+        version = cache.incr(self.key)
+        cache.set(f'{self.key}:{version}', object_id, self.timeout)
+        return version
+
+    def changes(self, since, until):
+        """Ids changed after `since` up to `until`, or None if they can no longer be replayed"""
+        if until < since or until - since > self.max_replay:
+            return None
+        keys = [f'{self.key}:{version}' for version in range(since + 1, until + 1)]
+        changed = cache.get_many(keys)
+        if len(changed) < len(keys):
+            return None
+        return set(changed.values())
@@ -0,0 +1,138 @@
+# core/compression.py
+"""
+Negotiated response compression, applied by CompressionMiddleware.
+
+The encoding is picked from the client's Accept-Encoding, honouring q-values:
+brotli when the `brotli` package is installed, otherwise gzip. Only text-like
+bodies (JSON, HTML, CSV, iCalendar, ...) of at least `COMPRESSION_MIN_SIZE`
+bytes are compressed. Images, PDFs, archives, profile downloads and anything
+that already has a Content-Encoding go out untouched, since compressing them
+again costs CPU for no gain.
+
+Streaming responses are compressed chunk by chunk as they are sent. gzip
+output carries Django's random filename padding against BREACH, as with
+GZipMiddleware. Sizes before and after, and the time spent compressing, are
+recorded in the `http_response_bytes_total` and `http_compression_seconds`
+metrics (streams only by size).
+"""
+import time
+from django.conf import settings
+from django.utils.text import compress_sequence, compress_string
+from core import metrics, tracing
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_RANDOM_BYTES = 100
+
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/x-ndjson',
+    'image/svg+xml',
+}
+
+
+def available_encodings():
+    """Supported encodings in order of preference"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def accepted_encodings(header):
+    """{coding: q-value} from an Accept-Encoding header"""
+    weights = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+    return weights
+
+
+def negotiate(header):
+    """The encoding to use for a request's Accept-Encoding, or None"""
+    weights = accepted_encodings(header or '')
+    best, best_weight = None, 0.0
+    for coding in available_encodings():
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def is_compressible(response):
+    """Whether a response is worth compressing, whatever the client accepts"""
+    if response.has_header('Content-Encoding') or response.has_header('Content-Range'):
+        return False
+    if getattr(response, 'is_async', False):
+        return False
+    if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+        return False
+    if 'no-transform' in response.get('Cache-Control', ''):
+        return False
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return (
+        content_type.startswith('text/')
+        or content_type in COMPRESSIBLE_TYPES
+        or content_type.endswith(('+json', '+xml'))
+    )
+
+
+def compress(data, encoding):
+    """Compress a whole body"""
+    started = time.perf_counter()
+    with tracing.span('http.compress', encoding=encoding, bytes=len(data)):
+        if encoding == 'br':
+            compressed = brotli.compress(data, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            compressed = compress_string(data, max_random_bytes=GZIP_RANDOM_BYTES)
+    record(encoding, len(data), len(compressed), time.perf_counter() - started)
+    return compressed
+
+
+def compress_stream(chunks, encoding):
+    """Compress a streamed body, yielding compressed data as it becomes available"""
+    sizes = [0, 0]
+
+    def counted(chunks):
+        for chunk in chunks:
+            sizes[0] += len(chunk)
+            yield chunk
+
+    if encoding == 'br':
+        compressed = _brotli_stream(counted(chunks))
+    else:
+        compressed = compress_sequence(counted(chunks), max_random_bytes=GZIP_RANDOM_BYTES)
+
+    for data in compressed:
+        if data:
+            sizes[1] += len(data)
+            yield data
+    # Streams are only counted by size: their time is mostly the view producing chunks
+    metrics.RESPONSE_BYTES.inc(sizes[0], encoding=encoding, stage='original')
+    metrics.RESPONSE_BYTES.inc(sizes[1], encoding=encoding, stage='compressed')
+
+
+def _brotli_stream(chunks):
+    compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+    for chunk in chunks:
+        yield compressor.process(chunk)
+    yield compressor.finish()
+
+
+def record(encoding, original, compressed, seconds):
+    metrics.RESPONSE_BYTES.inc(original, encoding=encoding, stage='original')
+    metrics.RESPONSE_BYTES.inc(compressed, encoding=encoding, stage='compressed')
+    metrics.COMPRESSION_SECONDS.observe(seconds, encoding=encoding)
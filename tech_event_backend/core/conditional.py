@@ -0,0 +1,137 @@
+# core/conditional.py
+"""
+Conditional GET for API views.
+
+Clients re-fetch event pages, their tickets and dashboards far more often
+than those change. Each such view has a cheap state function: one aggregate
+over the rows the response is built from (their count and latest
+`updated_at`, as in core.ticket_feed, and the `profile_updated_at` of the
+users nested in them), plus change stamps for data that `updated_at` does not
+track (categories, deletions), which model signals `touch()` when that data
+changes. Stamps are `ChangeStamp` rows, so every worker sees the same ones;
+reads go through the cache for `STAMP_TIMEOUT` seconds, which bounds how long
+another worker can answer 304 for changed data when the cache is not shared.
+The ETag is a digest of that state, the request's path and query string and
+the user; the latest change is the Last-Modified. A request whose If-None-Match or
+If-Modified-Since still matches gets 304 before the view runs its queries
+and serializers.
+
+    def my_tickets_state(view, request):
+        tickets = conditional.changes(Ticket.objects.filter(user=request.user), 'updated_at')
+        stamps = conditional.stamps('tickets')
+        return (tickets, stamps), conditional.latest(tickets, *stamps)
+
+    @action(detail=False, methods=['get'])
+    @conditional.conditional(my_tickets_state)
+    def my_tickets(self, request): ...
+
+Place it below `@api_view`/`@action` (so permissions are checked first) and above
+`@quota` (so revalidations are not charged). A state function returns
+`(state, last_modified)`, or None to let the view answer unconditionally
+(e.g. with an error).
+"""
+import functools
+import hashlib
+from datetime import datetime
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from core.models import ChangeStamp
+
+STAMP_TIMEOUT = 5
+
+
+def _stamp_key(name):
+    return f'conditional:stamp:{name}'
+
+
+def touch(*names):
+    """Record that data behind these stamps changed now"""
+    now = timezone.now()
+    for name in names:
+        ChangeStamp.objects.update_or_create(name=name, defaults={'changed_at': now})
+    cache.set_many({_stamp_key(name): now for name in names}, STAMP_TIMEOUT)
+
+
+def stamps(*names):
+    """When data behind each stamp last changed, as datetimes"""
+    values = cache.get_many([_stamp_key(name) for name in names])
+    missing = [name for name in names if _stamp_key(name) not in values]
+    if missing:
+        stored = dict(ChangeStamp.objects.filter(name__in=missing).values_list('name', 'changed_at'))
+        unknown = [name for name in missing if name not in stored]
+        if unknown:
+            # A stamp never touched starts at now, so validators can only move forward
+            now = timezone.now()
+            ChangeStamp.objects.bulk_create(
+                [ChangeStamp(name=name, changed_at=now) for name in unknown], ignore_conflicts=True
+            )
+            stored.update(ChangeStamp.objects.filter(name__in=unknown).values_list('name', 'changed_at'))
+        fetched = {_stamp_key(name): changed_at for name, changed_at in stored.items()}
+        cache.set_many(fetched, STAMP_TIMEOUT)
+        values.update(fetched)
+    return [values[_stamp_key(name)] for name in names]
+
+
+def changes(queryset, *fields):
+    """Row count and latest value of each field (e.g. 'updated_at') over a queryset, in one query"""
+    return queryset.aggregate(count=Count('pk'), **{f'{field}_max': Max(field) for field in fields})
+
+
+def latest(*values):
+    """The most recent of some datetimes (None values and dict values are looked through)"""
+    moments = []
+    for value in values:
+        if isinstance(value, dict):
+            moments.extend(v for v in value.values() if isinstance(v, datetime))
+        elif isinstance(value, datetime):
+            moments.append(value)
+    return max(moments) if moments else None
+
+
+def conditional_response(request, state, last_modified, view):
+    """
+    304 when the client's validators match `state`/`last_modified`, otherwise
+    view(); successful responses carry the ETag and Last-Modified.
+    """
+    user = getattr(request, 'user', None)
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    digest = hashlib.md5(repr((request.get_full_path(), user_id, state)).encode()).hexdigest()
+    etag = quote_etag(digest)
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = view()
+        if response.status_code != 200:
+            return response
+
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Revalidate on every use; per-user responses stay out of shared caches
+    patch_cache_control(response, no_cache=True, private=user_id is not None)
+    return response
+
+
+def conditional(state_func):
+    """Answer GET requests with 304 when `state_func(...)` says the client's copy is current"""
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            # Function views get the request first, viewset actions after self
+            request = args[0] if hasattr(args[0], 'method') else args[1]
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+            result = state_func(*args, **kwargs)
+            if result is None:
+                return view(*args, **kwargs)
+            state, last_modified = result
+            return conditional_response(request, state, last_modified, lambda: view(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
@@ -10,6 +10,10 @@ import qrcode
 import os
 import requests
 from datetime import datetime
+import logging
+from core import metrics, tracing
+
+logger = logging.getLogger(__name__)
 
 def send_email(to_email, subject, html_content):
     """Helper function to send an email using SendGrid"""
@@ -22,13 +26,16 @@ def send_email(to_email, subject, html_content):
     
     try:
         sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
-        response = sg.send(message)
+        with metrics.EXTERNAL_SECONDS.time(service='sendgrid', operation='send_email'), \
+                tracing.span('sendgrid.send', operation='send_email'):
+            response = sg.send(message)
         return response
-    except Exception as e:
+    except Exception:
         # Log the error
-        print(f"Error sending email: {str(e)}")
+        logger.exception("Error sending email to %s", to_email)
         return None
 
+@tracing.traced('image.generate_ticket')
 def generate_ticket_image(ticket):
     """Generate an image of the ticket with QR code, user details, and profile picture"""
     try:
@@ -99,7 +106,7 @@ def generate_ticket_image(ticket):
                     # Paste profile picture on ticket
                     image.paste(circular_pic, (width-180, 40), circular_pic)
         except Exception as e:
-            print(f"Error adding profile picture: {str(e)}")
+            logger.warning("Error adding profile picture to ticket %s: %s", ticket.ticket_number, e)
         
         # Add ticket details
         y_position = 100
@@ -146,8 +153,8 @@ def generate_ticket_image(ticket):
         buffer.seek(0)
         
         return buffer
-    except Exception as e:
-        print(f"Error generating ticket image: {str(e)}")
+    except Exception:
+        logger.exception("Error generating image for ticket %s", ticket.ticket_number)
         
         # Return a basic fallback image
         fallback = Image.new('RGB', (400, 200), color='white')
@@ -198,18 +205,20 @@ def send_ticket_confirmation(ticket):
             attachment.file_name = FileName(f"ticket_{ticket.ticket_number}.png")
             attachment.disposition = Disposition('attachment')
             message.attachment = attachment
-    except Exception as e:
+    except Exception:
         # Log the error but continue to send email without attachment
-        print(f"Error attaching ticket image: {str(e)}")
+        logger.exception("Error attaching image for ticket %s", ticket.ticket_number)
     
     # Send the email
     try:
         sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
-        response = sg.send(message)
+        with metrics.EXTERNAL_SECONDS.time(service='sendgrid', operation='ticket_confirmation'), \
+                tracing.span('sendgrid.send', operation='ticket_confirmation'):
+            response = sg.send(message)
         return response.status_code
-    except Exception as e:
+    except Exception:
         # Log the error
-        print(f"Error sending ticket confirmation: {str(e)}")
+        logger.exception("Error sending confirmation for ticket %s", ticket.ticket_number)
         return None
 
 def send_event_reminder(ticket, hours_before=24):
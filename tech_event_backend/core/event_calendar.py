@@ -0,0 +1,117 @@
+# core/event_calendar.py
+"""
+Month calendars of published events.
+
+A calendar needs every event overlapping a time window
+(`start_date < window end and end_date > window start`), which a B-tree on
+`start_date` answers poorly: it has to scan every event that started before
+the window to find the long ones still running. On PostgreSQL a partial GiST
+index over `tstzrange(start_date, end_date)` answers the overlap directly
+(migration events 0007). Elsewhere `EventDay` holds one row per day each
+published event spans, kept in step by the `Event` save signal, and the
+window becomes a range scan over its (day, event) index. Rows stop after the
+first `DAY_ROWS_HORIZON` days of an event; the rest of a longer event is
+found with the plain overlap predicate, limited to events that started more
+than the horizon before the window.
+
+Month payloads are compact: each event's summary appears once, and days map
+to event ids. They are cached per month under the `core.facets` generation,
+so any event change starts a fresh set of keys.
+"""
+from datetime import date, datetime, time, timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Func, Q
+from django.utils import timezone
+from events.models import Event, EventDay
+from core import facets, metrics
+
+CALENDAR_TIMEOUT = 60 * 10
+GIST_INDEX_NAME = 'events_event_period_gist'
+SUMMARY_FIELDS = ('id', 'title', 'start_date', 'end_date', 'category', 'location')
+# Days of each event that get EventDay rows
+DAY_ROWS_HORIZON = 31
+
+
+def uses_range_index():
+    return connection.vendor == 'postgresql'
+
+
+def local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def days_spanned(start, end, first=None, last=None):
+    """Local dates touched by [start, end), optionally clipped to first..last"""
+    start_day = timezone.localdate(start)
+    # An event ending exactly at midnight does not occupy the next day
+    end_day = max(timezone.localdate(end - timedelta(microseconds=1)), start_day)
+    if first is not None:
+        start_day = max(start_day, first)
+    if last is not None:
+        end_day = min(end_day, last)
+    return [start_day + timedelta(days=i) for i in range((end_day - start_day).days + 1)]
+
+
+def sync_event_days(event):
+    """Bring an event's EventDay rows in line with its dates and status"""
+    if uses_range_index():
+        return
+    wanted = set()
+    if event.status == 'PUBLISHED' and event.start_date and event.end_date:
+        first = timezone.localdate(event.start_date)
+        wanted = set(days_spanned(event.start_date, event.end_date, last=first + timedelta(days=DAY_ROWS_HORIZON - 1)))
+    stored = set(EventDay.objects.filter(event=event).values_list('day', flat=True))
+    if stored - wanted:
+        EventDay.objects.filter(event=event, day__in=stored - wanted).delete()
+    if wanted - stored:
+        EventDay.objects.bulk_create([EventDay(event=event, day=day) for day in sorted(wanted - stored)])
+
+
+def overlapping_events(start, end):
+    """Published events overlapping [start, end)"""
+    events = Event.objects.filter(status='PUBLISHED')
+    if uses_range_index():
+        from django.contrib.postgres.fields import DateTimeRangeField
+        from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+        # Same expression as the GiST index so the planner can use it
+        period = Func(F('start_date'), F('end_date'), function='tstzrange', output_field=DateTimeRangeField())
+        return events.alias(period=period).filter(period__overlap=DateTimeTZRange(start, end))
+
+    first = timezone.localdate(start)
+    days = EventDay.objects.filter(day__gte=first, day__lte=timezone.localdate(end - timedelta(microseconds=1)))
+    # Only an event that started at least DAY_ROWS_HORIZON days before the window can
+    # overlap it past its last day row
+    past_horizon = Q(start_date__lt=local_midnight(first - timedelta(days=DAY_ROWS_HORIZON - 1)))
+    # Day rows are coarser than the window; the exact predicate trims the edges
+    return events.filter(Q(pk__in=days.values('event_id')) | past_horizon, start_date__lt=end, end_date__gt=start)
+
+
+def month_calendar(year, month):
+    """{'month', 'events': [summary], 'days': {iso date: [event ids]}} for a month"""
+    first = date(year, month, 1)
+    following = date(year + month // 12, month % 12 + 1, 1)
+    last = following - timedelta(days=1)
+
+    events = list(
+        overlapping_events(local_midnight(first), local_midnight(following))
+        .order_by('start_date', 'id').values(*SUMMARY_FIELDS)
+    )
+    days = {}
+    for event in events:
+        for day in days_spanned(event['start_date'], event['end_date'], first, last):
+            days.setdefault(day, []).append(event['id'])
+    return {
+        'month': f'{year:04d}-{month:02d}',
+        'events': events,
+        'days': {day.isoformat(): days[day] for day in sorted(days)},
+    }
+
+
+def cached_month_calendar(year, month):
+    key = f'events:calendar:{facets.generation()}:{year:04d}-{month:02d}'
+    calendar = metrics.record_cache('calendar', cache.get(key))
+    if calendar is None:
+        calendar = month_calendar(year, month)
+        cache.set(key, calendar, CALENDAR_TIMEOUT)
+    return calendar
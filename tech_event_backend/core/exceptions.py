@@ -10,26 +10,28 @@ def custom_exception_handler(exc, context):
     """Custom exception handler for REST framework"""
     # Call REST framework's default exception handler first
     response = exception_handler(exc, context)
-    
+
+    request = context.get('request')
+    view = context.get('view')
+    user = getattr(request, 'user', None)
+    details = {
+        'view': view.__class__.__name__ if view else 'Unknown',
+        'user_id': user.pk if user is not None and user.is_authenticated else None,
+    }
+
     # If response is None, there was an unhandled exception
     if response is None:
-        logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
-        
-        if isinstance(exc, Exception):
-            # Return a generic error response for unhandled exceptions
-            return Response(
-                {"error": "An unexpected error occurred. Our team has been notified."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-    
-    # Add more context to the response
-    if response is not None:
-        # Extract request details for logging
-        request = context.get('request')
-        view = context.get('view')
-        view_name = view.__class__.__name__ if view else 'Unknown'
-        
-        # Log the exception with request details
-        logger.error(
-            f"API Error in {view_name}: {response.status_code} - {str(exc)} - "
-            f"User: {request.user.id if request.user.is_authenticated else 'Anonymous'} -")
\ No newline at end of file
+        logger.error("Unhandled exception in %s: %s", details['view'], exc, exc_info=exc, extra=details)
+        # Return a generic error response for unhandled exceptions
+        return Response(
+            {"error": "An unexpected error occurred. Our team has been notified."},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    # Client errors are expected traffic; only server errors are logged as errors
+    level = logging.ERROR if response.status_code >= 500 else logging.INFO
+    logger.log(
+        level, "API error in %s: %s %s", details['view'], response.status_code, exc,
+        extra={**details, 'status': response.status_code}
+    )
+    return response
@@ -0,0 +1,113 @@
+# core/facets.py
+"""
+Facet counts for the event browser.
+
+All facets come from one GROUP BY over (category, status, price band, date
+bucket) for the current filter set; per-facet counts are the marginals of
+those rows. Results are cached under a signature of the filters and the
+caller's visibility scope, and every event save bumps a generation number
+that is part of the key, so edits are never served stale for long.
+"""
+import hashlib
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, Q, Value, When
+from django.utils import timezone
+from core import metrics
+
+FACETS_TIMEOUT = 60
+GENERATION_KEY = 'events:facets:generation'
+# Query parameters that do not change which events match (paging, ordering, response shape)
+IGNORED_PARAMS = {'page', 'page_size', 'ordering', 'facets', 'fields', 'expand'}
+
+# (key, lower bound exclusive, upper bound inclusive); prices are in the ticket currency
+PRICE_BANDS = [
+    ('free', None, Decimal('0')),
+    ('under_5000', Decimal('0'), Decimal('5000')),
+    ('5000_20000', Decimal('5000'), Decimal('20000')),
+    ('20000_50000', Decimal('20000'), Decimal('50000')),
+    ('over_50000', Decimal('50000'), None),
+]
+DATE_BUCKETS = ['past', 'this_week', 'this_month', 'later']
+
+
+def _price_band():
+    whens = []
+    for key, lower, upper in PRICE_BANDS:
+        condition = Q()
+        if lower is not None:
+            condition &= Q(ticket_price__gt=lower)
+        if upper is not None:
+            condition &= Q(ticket_price__lte=upper)
+        whens.append(When(condition, then=Value(key)))
+    return Case(*whens, output_field=CharField())
+
+
+def _date_bucket(now):
+    return Case(
+        When(start_date__lt=now, then=Value('past')),
+        When(start_date__lt=now + timedelta(days=7), then=Value('this_week')),
+        When(start_date__lt=now + timedelta(days=30), then=Value('this_month')),
+        default=Value('later'),
+        output_field=CharField(),
+    )
+
+
+def compute_facets(queryset, now=None):
+    """Counts per category, status, price band and date bucket in a single query"""
+    now = now or timezone.now()
+    rows = queryset.order_by().values(
+        'category', 'status', price_band=_price_band(), date_bucket=_date_bucket(now)
+    ).annotate(count=Count('id', distinct=True))
+
+    facets = {
+        'category': {},
+        'status': {},
+        'price_band': {key: 0 for key, _, _ in PRICE_BANDS},
+        'date': {key: 0 for key in DATE_BUCKETS},
+    }
+    for row in rows:
+        for facet, value in (
+            ('category', row['category']), ('status', row['status']),
+            ('price_band', row['price_band']), ('date', row['date_bucket']),
+        ):
+            facets[facet][value] = facets[facet].get(value, 0) + row['count']
+
+    result = {}
+    for facet, counts in facets.items():
+        items = [{'value': value, 'count': count} for value, count in counts.items()]
+        # Bands and buckets keep their natural order; the rest lead with the largest
+        if facet in ('category', 'status'):
+            items.sort(key=lambda item: -item['count'])
+        result[facet] = items
+    return result
+
+
+def filter_signature(query_params, scope):
+    """Stable hash of the filters that shape the result set"""
+    params = sorted(
+        (key, sorted(values)) for key, values in query_params.lists() if key not in IGNORED_PARAMS
+    )
+    return hashlib.md5(repr((scope, params)).encode()).hexdigest()
+
+
+def cached_facets(queryset, query_params, scope):
+    """Facets for a filtered queryset, cached by filter signature and scope"""
+    key = f'events:facets:{generation()}:{filter_signature(query_params, scope)}'
+    facets = metrics.record_cache('facets', cache.get(key))
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(key, facets, FACETS_TIMEOUT)
+    return facets
+
+
+def generation():
+    """Current generation number; bumped whenever an event changes"""
+    return cache.get(GENERATION_KEY, 0)
+
+
+def invalidate():
+    """Start a new facet generation after an event changes"""
+    cache.add(GENERATION_KEY, 0, None)
+    cache.incr(GENERATION_KEY)
@@ -0,0 +1,140 @@
+# core/fieldsets.py
+"""
+Sparse fieldsets and expansion control for read endpoints.
+
+Serializers using `FieldsetMixin` honour two query parameters on GET requests:
+
+* `?fields=id,event_details.title` keeps only the listed fields; dotted paths
+  select fields of nested objects, and a nested field listed without a path
+  keeps all of its fields.
+* `?expand=event_details,event_details.organizer_details` lists the nested
+  objects to render; the others are left out (their id field stays). Without
+  the parameter every nested object is rendered, as before. A nested field
+  named in `fields` counts as expanded.
+
+`narrow_queryset` reads the fields a serializer ended up with and returns the
+queryset with `select_related` for the nested objects and `only()` for the
+columns they read, so a narrow request also means a narrow query.
+Fields backed by methods or properties keep all columns of their model.
+ViewSets apply it through `core.querysets.OptimizedQuerysetMixin`.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def parse_paths(value):
+    """'a,b.c,b.d' -> {'a': {}, 'b': {'c': {}, 'd': {}}}"""
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def _nested(field):
+    """The model serializer behind a single nested object field, if it is one"""
+    if isinstance(field, serializers.ListSerializer):
+        return None
+    return field if isinstance(field, serializers.ModelSerializer) else None
+
+
+class FieldsetMixin:
+    """Prunes a serializer's fields from ?fields= and ?expand= (see module docstring)"""
+
+    def _fieldset(self):
+        override = getattr(self, '_fieldset_override', None)
+        if override is not None:
+            return override
+        request = self.context.get('request')
+        # Payloads shared between callers (cached listings) opt out with fieldsets=False
+        if request is None or request.method not in SAFE_METHODS or self.context.get('fieldsets') is False:
+            return None, None
+        params = request.query_params
+        only = parse_paths(params['fields']) if params.get('fields') else None
+        expand = parse_paths(params['expand']) if 'expand' in params else None
+        return only, expand
+
+    def get_fields(self):
+        fields = super().get_fields()
+        only, expand = self._fieldset()
+        if only is None and expand is None:
+            return fields
+
+        for name in list(fields):
+            nested = _nested(fields[name])
+            listed = only is None or name in only
+            expanded = nested is None or expand is None or name in expand or (only is not None and name in only)
+            if not (listed and expanded):
+                del fields[name]
+            elif isinstance(nested, FieldsetMixin):
+                nested._fieldset_override = (
+                    (only.get(name) or None) if only is not None else None,
+                    expand.get(name, {}) if expand is not None else None,
+                )
+        return fields
+
+
+def _model_field(model, name):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _is_forward_relation(field):
+    return field is not None and field.is_relation and (field.many_to_one or field.one_to_one) and field.concrete
+
+
+def _plan(serializer, prefix=''):
+    """(select_related paths, only() paths) for the fields of a model serializer"""
+    model = serializer.Meta.model
+    related, columns, exact = [], [], True
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        attrs = field.source_attrs
+        first = _model_field(model, attrs[0]) if attrs else None
+        nested = _nested(field)
+
+        if nested is not None and len(attrs) == 1 and _is_forward_relation(first):
+            path = prefix + attrs[0]
+            nested_related, nested_columns = _plan(nested, path + '__')
+            related.extend([path] + nested_related)
+            columns.extend([path] + nested_columns)
+        elif isinstance(field, serializers.PrimaryKeyRelatedField) and len(attrs) == 1 and first is not None:
+            columns.append(prefix + attrs[0])
+        elif _is_forward_relation(first):
+            # A slug field or a dotted source reads the related row; load it whole
+            related.append(prefix + attrs[0])
+            columns.append(prefix + attrs[0])
+        elif len(attrs) == 1 and first is not None and first.concrete:
+            columns.append(prefix + attrs[0])
+        else:
+            exact = False
+
+    if exact:
+        columns.append(prefix + model._meta.pk.name)
+    else:
+        columns.extend(prefix + f.name for f in model._meta.concrete_fields)
+    return related, columns
+
+
+def narrow_queryset(queryset, serializer, extra_columns=()):
+    """
+    Restrict a queryset to the relations and columns the serializer reads, plus
+    `extra_columns` the view reads itself (those under a relation only when the
+    serializer loads it)
+    """
+    if not isinstance(serializer, serializers.ModelSerializer) or not issubclass(queryset.model, serializer.Meta.model):
+        return queryset
+    related, columns = _plan(serializer)
+    columns += [column for column in extra_columns if '__' not in column or column.rsplit('__', 1)[0] in related]
+    # Joins the view asked for but the fields do not read would conflict with only()
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*dict.fromkeys(related))
+    return queryset.only(*dict.fromkeys(columns))
+
@@ -0,0 +1,127 @@
+# core/forecasting.py
+"""
+Sales velocity forecasting and sell-out prediction.
+
+Completed tickets are rolled up into an (events x days) matrix of daily sales
+and a time-decayed least-squares line is fitted to every event's cumulative
+sales in one vectorized pass. Forecasts are stored on `EventSalesForecast` by
+the nightly `forecast_sales` command so requests only read them.
+"""
+from datetime import timedelta
+import numpy as np
+from django.db import connections, transaction
+from django.utils import timezone
+from events.models import Event, EventSalesForecast
+from core.analytics import EventColumns, TicketColumns, SECONDS_PER_DAY
+
+WINDOW_DAYS = 28
+HALF_LIFE_DAYS = 7
+# Sell-out dates further away than this are reported as "not selling out"
+MAX_HORIZON_DAYS = 3650
+
+
+def daily_sales_matrix(events, tickets, today, window_days=WINDOW_DAYS):
+    """Daily ticket counts per event over the trailing window, oldest day first"""
+    offset = today - np.floor(tickets.created_at / SECONDS_PER_DAY).astype(np.int64)
+    in_window = (offset >= 0) & (offset < window_days)
+    rows = events.index_of(tickets.event_id)[in_window]
+    cols = window_days - 1 - offset[in_window]
+    counts = np.bincount(rows * window_days + cols, minlength=len(events) * window_days)
+    return counts.reshape(len(events), window_days)
+
+
+def fit_velocity(daily_sales, first_day=None, half_life_days=HALF_LIFE_DAYS):
+    """
+    Weighted least-squares slope of cumulative sales (tickets/day) for every row.
+
+    Weights halve every `half_life_days` going back in time; days before
+    `first_day` (the column an event went on sale) get no weight at all.
+    Cumulative sales are taken within the window, so only the slope matters.
+    """
+    events, days = daily_sales.shape
+    x = np.arange(days, dtype=np.float64)
+    weights = np.broadcast_to(0.5 ** ((days - 1 - x) / half_life_days), (events, days)).copy()
+    if first_day is not None:
+        weights[x[None, :] < first_day[:, None]] = 0.0
+
+    cumulative = np.cumsum(daily_sales, axis=1, dtype=np.float64)
+    total = weights.sum(axis=1)
+    total[total == 0] = 1.0
+    x_mean = (weights @ x) / total
+    y_mean = (weights * cumulative).sum(axis=1) / total
+    x_dev = x[None, :] - x_mean[:, None]
+    variance = (weights * x_dev ** 2).sum(axis=1)
+    covariance = (weights * x_dev * (cumulative - y_mean[:, None])).sum(axis=1)
+
+    # A single day of history has no slope; fall back to the average daily rate
+    days_on_sale = np.maximum((weights > 0).sum(axis=1), 1)
+    slope = np.divide(covariance, variance, out=cumulative[:, -1] / days_on_sale, where=variance > 0)
+    return np.maximum(slope, 0.0)
+
+
+def forecast_events(events_queryset, now=None):
+    """Forecast sales for every event in the queryset, returned as unsaved models"""
+    now = now or timezone.now()
+    now_ts = now.timestamp()
+    today = int(now_ts // SECONDS_PER_DAY)
+
+    events = EventColumns(events_queryset)
+    tickets = TicketColumns(events_queryset)
+    if not len(events):
+        return []
+
+    sold = np.bincount(events.index_of(tickets.event_id), minlength=len(events))
+    first_day = np.floor(events.created_at / SECONDS_PER_DAY) - (today - WINDOW_DAYS + 1)
+    velocity = fit_velocity(daily_sales_matrix(events, tickets, today), first_day=first_day)
+
+    remaining = np.maximum(events.max_attendees - sold, 0)
+    days_to_start = np.maximum((events.start_date - now_ts) / SECONDS_PER_DAY, 0.0)
+    projected = np.minimum(sold + velocity * days_to_start, np.maximum(events.max_attendees, sold))
+    days_to_sellout = np.divide(
+        remaining, velocity, out=np.full(len(events), np.inf), where=velocity > 0
+    )
+    days_to_sellout[remaining == 0] = 0.0
+
+    forecasts = []
+    for i in range(len(events)):
+        sellout_at = None
+        if days_to_sellout[i] <= MAX_HORIZON_DAYS:
+            sellout_at = now + timedelta(days=float(days_to_sellout[i]))
+        forecasts.append(EventSalesForecast(
+            event_id=int(events.id[i]),
+            tickets_sold=int(sold[i]),
+            daily_velocity=round(float(velocity[i]), 4),
+            projected_sales_at_start=int(projected[i]),
+            predicted_sellout_at=sellout_at,
+            computed_at=now,
+        ))
+    return forecasts
+
+
+def score_events(events_queryset, now=None):
+    """Compute and store forecasts for the given events"""
+    forecasts = forecast_events(events_queryset, now=now)
+    
+    # MySQL upserts on any unique key and rejects an explicit conflict target
+    conflict_target = {}
+    if connections[EventSalesForecast.objects.db].features.supports_update_conflicts_with_target:
+        conflict_target['unique_fields'] = ['event']
+    
+    return EventSalesForecast.objects.bulk_create(
+        forecasts,
+        update_conflicts=True,
+        update_fields=[
+            'tickets_sold', 'daily_velocity', 'projected_sales_at_start',
+            'predicted_sellout_at', 'computed_at'
+        ],
+        **conflict_target
+    )
+
+
+@transaction.atomic
+def refresh_forecasts(now=None):
+    """Nightly pass: batch-score every active event and drop stale forecasts"""
+    now = now or timezone.now()
+    active_events = Event.objects.filter(status='PUBLISHED', start_date__gt=now)
+    EventSalesForecast.objects.exclude(event__in=active_events).delete()
+    return score_events(active_events, now=now)
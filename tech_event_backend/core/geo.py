@@ -0,0 +1,106 @@
+# core/geo.py
+"""
+Geohash cells and vectorized distance maths for "events near me".
+
+Events store a precision-8 geohash (cells of roughly 38 m x 19 m) in an
+indexed column. A radius query covers the search circle's bounding box with
+at most `MAX_COVER_CELLS` geohash prefixes of the finest precision that
+allows it, turns each prefix into an index range scan, and then filters the
+candidates exactly with a vectorized haversine.
+"""
+import math
+import numpy as np
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+STORED_PRECISION = 8
+MAX_COVER_CELLS = 16
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Sorts after every geohash character, closing a prefix range
+PREFIX_END = '{'
+
+
+def encode(latitude, longitude, precision=STORED_PRECISION):
+    """Geohash of a point"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(latitude degrees, longitude degrees) spanned by a geohash cell"""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** (bits - bits // 2)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min lat, max lat, min lon, max lon) around a circle; longitudes may pass +/-180"""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(latitude))
+    dlon = 180.0 if cos_lat < 1e-6 else min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180.0)
+    return max(latitude - dlat, -90.0), min(latitude + dlat, 90.0), longitude - dlon, longitude + dlon
+
+
+def _steps(low, high, step):
+    return np.append(np.arange(low, high, step), high)
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Geohash prefixes whose cells together cover the search circle"""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    precision = STORED_PRECISION
+    while precision > 1:
+        lat_step, lon_step = cell_size(precision)
+        count = (math.ceil((max_lat - min_lat) / lat_step) + 1) * (math.ceil((max_lon - min_lon) / lon_step) + 1)
+        if count <= MAX_COVER_CELLS:
+            break
+        precision -= 1
+
+    lat_step, lon_step = cell_size(precision)
+    cells = set()
+    for lat in _steps(min_lat, max_lat, lat_step):
+        for lon in _steps(min_lon, min(max_lon, min_lon + 360.0), lon_step):
+            wrapped = (lon + 180.0) % 360.0 - 180.0
+            cells.add(encode(min(lat, 90.0 - 1e-9), wrapped, precision))
+    return sorted(cells)
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """Great-circle distances from one point to arrays of points"""
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(np.asarray(latitudes, dtype=np.float64)), np.radians(np.asarray(longitudes, dtype=np.float64))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def within_radius(queryset, latitude, longitude, radius_km):
+    """(event_id, distance_km) for events in the queryset inside the circle, nearest first"""
+    cells = Q()
+    for cell in covering_cells(latitude, longitude, radius_km):
+        # Prefix match as a range so every backend can use the plain B-tree index
+        cells |= Q(geohash__gte=cell, geohash__lt=cell + PREFIX_END)
+    rows = list(queryset.filter(cells).order_by().values_list('id', 'latitude', 'longitude'))
+    if not rows:
+        return []
+
+    ids, latitudes, longitudes = (np.array(column) for column in zip(*rows))
+    distances = haversine_km(latitude, longitude, latitudes, longitudes)
+    inside = np.flatnonzero(distances <= radius_km)
+    order = inside[np.argsort(distances[inside], kind='stable')]
+    return list(zip(ids[order].tolist(), distances[order].tolist()))
@@ -0,0 +1,142 @@
+# core/geocoding.py
+"""
+Geocoding of free-text event locations.
+
+The provider is pluggable through the `GEOCODING_PROVIDER` setting (a dotted
+path to a class with a `geocode(location)` method returning `(lat, lng)` or
+None). Results, including misses, are stored in `GeocodeCache` so each
+distinct location is only ever sent to the provider once. Calls to a provider
+are spaced by its `min_interval` seconds within a process.
+
+Saving an event only reads the cache; locations not looked up yet are sent to
+the provider by the `geocode_events` command.
+"""
+import logging
+import threading
+import time
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from core.models import GeocodeCache
+
+logger = logging.getLogger(__name__)
+
+
+class StubGeocoder:
+    """Offline provider resolving well-known cities; used in development and tests"""
+
+    min_interval = 0
+
+    CITIES = {
+        'lagos': (6.5244, 3.3792),
+        'ikeja': (6.6018, 3.3515),
+        'lekki': (6.4698, 3.5852),
+        'abuja': (9.0765, 7.3986),
+        'port harcourt': (4.8156, 7.0498),
+        'ibadan': (7.3775, 3.9470),
+        'kano': (12.0022, 8.5920),
+        'enugu': (6.5244, 7.5186),
+        'benin city': (6.3350, 5.6037),
+        'kaduna': (10.5105, 7.4165),
+        'accra': (5.6037, -0.1870),
+        'nairobi': (-1.2921, 36.8219),
+        'kigali': (-1.9441, 30.0619),
+        'cape town': (-33.9249, 18.4241),
+        'johannesburg': (-26.2041, 28.0473),
+        'cairo': (30.0444, 31.2357),
+        'london': (51.5074, -0.1278),
+        'new york': (40.7128, -74.0060),
+        'san francisco': (37.7749, -122.4194),
+    }
+
+    def geocode(self, location):
+        location = normalize(location)
+        # Longest names first so "benin city" wins over a shorter overlapping name
+        for city in sorted(self.CITIES, key=len, reverse=True):
+            if city in location:
+                return self.CITIES[city]
+        return None
+
+
+class NominatimGeocoder:
+    """OpenStreetMap Nominatim; respect its usage policy (1 request/s, identifying User-Agent)"""
+
+    URL = 'https://nominatim.openstreetmap.org/search'
+    min_interval = 1.0
+
+    def geocode(self, location):
+        response = requests.get(
+            self.URL,
+            params={'q': location, 'format': 'json', 'limit': 1},
+            headers={'User-Agent': getattr(settings, 'GEOCODING_USER_AGENT', 'tech-event-backend')},
+            timeout=5,
+        )
+        response.raise_for_status()
+        results = response.json()
+        if not results:
+            return None
+        return float(results[0]['lat']), float(results[0]['lon'])
+
+
+def normalize(location):
+    return ' '.join((location or '').lower().split())[:255]
+
+
+def get_provider():
+    return import_string(getattr(settings, 'GEOCODING_PROVIDER', 'core.geocoding.StubGeocoder'))()
+
+
+_last_call = 0.0
+_throttle_lock = threading.Lock()
+
+
+def _throttle(provider):
+    """Wait until the provider's minimum interval since the previous call has passed"""
+    global _last_call
+    interval = getattr(provider, 'min_interval', 0)
+    with _throttle_lock:
+        wait = _last_call + interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _last_call = time.monotonic()
+
+
+def _lookup(query):
+    """(found, coordinates) from the geocode cache"""
+    row = GeocodeCache.objects.filter(query=query).values_list('latitude', 'longitude').first()
+    if row is None:
+        return False, None
+    return True, (row if row[0] is not None else None)
+
+
+def cached(location):
+    """Coordinates for a location already looked up, or None; never calls the provider"""
+    query = normalize(location)
+    return _lookup(query)[1] if query else None
+
+
+def geocode(location):
+    """Coordinates for a location string, or None; provider errors are not cached"""
+    query = normalize(location)
+    if not query:
+        return None
+    
+    found, coordinates = _lookup(query)
+    if found:
+        return coordinates
+    
+    provider = get_provider()
+    _throttle(provider)
+    try:
+        coordinates = provider.geocode(location)
+    except Exception as e:
+        logger.warning(f"Geocoding failed for '{query}': {str(e)}")
+        return None
+    
+    latitude, longitude = coordinates or (None, None)
+    GeocodeCache.objects.get_or_create(query=query, defaults={
+        'latitude': latitude,
+        'longitude': longitude,
+        'provider': type(provider).__name__,
+    })
+    return coordinates
@@ -0,0 +1,75 @@
+# core/ical.py
+"""
+Minimal iCalendar (RFC 5545) writer for ticket feeds.
+
+Only what the feeds need: a VCALENDAR of VEVENTs with UTC times, escaped text
+and lines folded at 75 octets, joined with CRLF.
+"""
+from datetime import timezone as dt_timezone
+
+PRODID = '-//Tech Event//Ticket Feed//EN'
+UID_DOMAIN = 'tech-event'
+MAX_LINE_OCTETS = 75
+
+
+def escape_text(value):
+    return (
+        str(value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def format_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def fold(line):
+    """Split a content line into 75-octet pieces without breaking UTF-8 characters"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= MAX_LINE_OCTETS:
+        return line
+    pieces, start, limit = [], 0, MAX_LINE_OCTETS
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        pieces.append(encoded[start:end].decode('utf-8'))
+        # Continuation lines start with a space, which counts towards their length
+        start, limit = end, MAX_LINE_OCTETS - 1
+    return '\r\n '.join(pieces)
+
+
+def event_lines(event, stamp):
+    """VEVENT lines for an Event"""
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.id}@{UID_DOMAIN}',
+        f'DTSTAMP:{format_datetime(stamp)}',
+        f'LAST-MODIFIED:{format_datetime(event.updated_at)}',
+        f'DTSTART:{format_datetime(event.start_date)}',
+        f'DTEND:{format_datetime(event.end_date)}',
+        f'SUMMARY:{escape_text(event.title)}',
+        f'LOCATION:{escape_text(event.location)}',
+        f'DESCRIPTION:{escape_text(event.description)}',
+    ]
+    if event.category:
+        lines.append(f'CATEGORIES:{escape_text(event.category)}')
+    lines.append('STATUS:CANCELLED' if event.status == 'CANCELLED' else 'STATUS:CONFIRMED')
+    lines.append('END:VEVENT')
+    return lines
+
+
+def build_calendar(events, name, stamp):
+    """Serialized VCALENDAR containing the given events"""
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+    ]
+    for event in events:
+        lines.extend(event_lines(event, stamp))
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(fold(line) for line in lines) + '\r\n'
@@ -0,0 +1,132 @@
+# core/jsonlog.py
+"""
+Non-blocking JSON logging.
+
+`AsyncJsonHandler` is what request threads log to: it runs its filters,
+copies the record into a bounded queue and returns. A `QueueListener` thread
+formats the records as one JSON object per line (`JsonFormatter`) and writes
+them to the real stream or file. When the queue is full, records are dropped
+and counted instead of blocking the request.
+
+`RateLimitFilter` caps each message type (the logging call site) at
+`LOG_RATE_LIMIT_PER_MINUTE` records per minute, so an error storm logs a
+sample plus a count of what was suppressed. Extra fields passed with
+`logger.info(..., extra={...})` become JSON fields, along with the
+`trace_id` added by `core.tracing.TraceIdFilter`.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+
+QUEUE_SIZE = 10000
+
+# Attributes every LogRecord has; anything else was passed as extra
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, extras and exception"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, dt_timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """At most `per_minute` records per call site and minute; the next one carries `suppressed`"""
+
+    def __init__(self, per_minute=None):
+        super().__init__()
+        self.per_minute = per_minute
+        self._lock = threading.Lock()
+        self._sites = {}  # (logger, file, line) -> [minute, emitted, suppressed]
+
+    def filter(self, record):
+        limit = self.per_minute if self.per_minute is not None else settings.LOG_RATE_LIMIT_PER_MINUTE
+        if not limit:
+            return True
+        site = (record.name, record.pathname, record.lineno)
+        minute = int(time.monotonic() // 60)
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None or state[0] != minute:
+                suppressed = state[2] if state is not None else 0
+                state = self._sites[site] = [minute, 0, suppressed]
+            if state[1] >= limit:
+                state[2] += 1
+                return False
+            state[1] += 1
+            if state[2]:
+                record.suppressed, state[2] = state[2], 0
+        return True
+
+
+class AsyncJsonHandler(logging.handlers.QueueHandler):
+    """
+    Queue in front of a stream (and optionally a file) written by a listener
+    thread. Usable from dictConfig: {'()': 'core.jsonlog.AsyncJsonHandler'}.
+    """
+
+    def __init__(self, stream=None, filename=None, queue_size=QUEUE_SIZE):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.dropped = 0
+        targets = [logging.StreamHandler(stream or sys.stderr)]
+        if filename:
+            targets.append(logging.FileHandler(filename))
+        for target in targets:
+            target.setFormatter(JsonFormatter())
+        self.listener = logging.handlers.QueueListener(self.queue, *targets, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def prepare(self, record):
+        # Resolve the message now, while its arguments are what they were; the
+        # listener thread does the JSON and traceback formatting
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        return record
+
+    def enqueue(self, record):
+        # The first record that gets through reports how many were dropped before it
+        dropped = self.dropped
+        if dropped:
+            record.dropped = dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        else:
+            self.dropped -= dropped
+
+    def flush(self):
+        """Wait for queued records to be written"""
+        if self.listener._thread is None:
+            return
+        self.queue.join()
+        for target in self.listener.handlers:
+            target.flush()
+
+    def close(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+        super().close()
@@ -0,0 +1,268 @@
+# core/management/commands/benchmark_analytics.py
+import math
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from core import analytics
+from core.sketches import standard_error
+from events.models import Event
+from tickets.models import Ticket
+from users.models import User
+
+
+def orm_organizer_statistics(events_queryset):
+    """Per-event ORM loop used by the dashboards before the columnar engine"""
+    all_tickets = Ticket.objects.filter(event__in=events_queryset, payment_status='COMPLETED')
+    total_tickets_sold = all_tickets.count()
+    total_revenue = all_tickets.aggregate(total=Sum('price_paid'))['total'] or Decimal('0.00')
+    total_attendees = all_tickets.values('user').distinct().count()
+
+    rates = []
+    for event in events_queryset.filter(status='PUBLISHED'):
+        event_tickets = all_tickets.filter(event=event)
+        sold = event_tickets.count()
+        event_tickets.aggregate(total=Sum('price_paid'))
+        checked_in = event_tickets.filter(checked_in=True).count()
+        if sold > 0:
+            rates.append(checked_in / sold * 100)
+
+    return {
+        'total_tickets_sold': total_tickets_sold,
+        'total_revenue': float(total_revenue),
+        'total_attendees': total_attendees,
+        'average_attendance_rate': sum(rates) / len(rates) if rates else 0,
+    }
+
+
+def _percentile(sorted_values, percent):
+    """Linear interpolation between closest ranks, as numpy.percentile does by default"""
+    rank = (len(sorted_values) - 1) * percent / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def _month_start(year, month):
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return datetime(year, month, 1, tzinfo=dt_timezone.utc)
+
+
+def orm_organizer_analytics(events_queryset, period='6months', now=None):
+    """Per-month, per-day and per-event ORM loops computing the organizer_analytics payload"""
+    now = now or timezone.now()
+    period_length = timedelta(days=analytics.PERIOD_DAYS.get(period, analytics.DEFAULT_PERIOD_DAYS))
+    start = now - period_length
+    completed = Ticket.objects.filter(payment_status='COMPLETED')
+
+    period_events = events_queryset.filter(created_at__gte=start)
+    previous_events = events_queryset.filter(created_at__gte=start - period_length, created_at__lt=start)
+    period_tickets = completed.filter(event__in=period_events)
+    previous_tickets = completed.filter(event__in=previous_events)
+
+    total_revenue = float(period_tickets.aggregate(total=Sum('price_paid'))['total'] or 0)
+    previous_revenue = float(previous_tickets.aggregate(total=Sum('price_paid'))['total'] or 0)
+    total_tickets_sold = period_tickets.count()
+    previous_tickets_sold = previous_tickets.count()
+
+    # Calendar months (UTC) of the last six months, oldest first, over all the events' tickets
+    utc_now = now.astimezone(dt_timezone.utc)
+    monthly_revenue = []
+    for offset in range(5, -1, -1):
+        month_start = _month_start(utc_now.year, utc_now.month - offset)
+        month_end = _month_start(utc_now.year, utc_now.month - offset + 1)
+        amount = completed.filter(
+            event__in=events_queryset, created_at__gte=month_start, created_at__lt=month_end
+        ).aggregate(total=Sum('price_paid'))['total'] or 0
+        monthly_revenue.append({'month': month_start.strftime('%Y-%m'), 'amount': analytics._money(amount)})
+
+    event_performance = []
+    for event in period_events.filter(status='PUBLISHED')[:10]:
+        event_tickets = completed.filter(event=event)
+        tickets_sold = event_tickets.count()
+        revenue = event_tickets.aggregate(total=Sum('price_paid'))['total'] or 0
+        checked_in = event_tickets.filter(checked_in=True).count()
+        event_performance.append({
+            'event_title': event.title,
+            'tickets_sold': tickets_sold,
+            'revenue': analytics._money(revenue),
+            'attendance_rate': round(checked_in / tickets_sold * 100, 1) if tickets_sold else 0,
+        })
+    event_performance.sort(key=lambda x: x['revenue'], reverse=True)
+
+    category_distribution = [
+        {'category': row['event__category'], 'count': row['count'], 'revenue': analytics._money(row['revenue'])}
+        for row in period_tickets.values('event__category').annotate(
+            count=Count('id'), revenue=Sum('price_paid')
+        ).order_by('-revenue', 'event__category')
+    ]
+
+    daily_sales = []
+    today = datetime(utc_now.year, utc_now.month, utc_now.day, tzinfo=dt_timezone.utc)
+    for offset in range(29, -1, -1):
+        day = today - timedelta(days=offset)
+        daily_sales.append({
+            'date': day.strftime('%Y-%m-%d'),
+            'tickets': period_tickets.filter(created_at__gte=day, created_at__lt=day + timedelta(days=1)).count(),
+        })
+
+    ticket_types = [
+        {'type': row['ticket_type'], 'count': row['count'], 'revenue': analytics._money(row['revenue'])}
+        for row in period_tickets.values('ticket_type').annotate(
+            count=Count('id'), revenue=Sum('price_paid')
+        ).order_by('-count', 'ticket_type')
+    ]
+
+    prices = [float(price) for price in period_tickets.order_by('price_paid').values_list('price_paid', flat=True)]
+    price_percentiles = {}
+    if prices:
+        price_percentiles = {f'p{p}': analytics._money(_percentile(prices, p)) for p in (50, 90, 99)}
+
+    return {
+        'overview': {
+            'total_revenue': analytics._money(total_revenue),
+            'total_tickets_sold': total_tickets_sold,
+            'total_events': period_events.count(),
+            'active_events': period_events.filter(status='PUBLISHED', end_date__gt=now).count(),
+            'revenue_growth': round(analytics._growth(total_revenue, previous_revenue), 2),
+            'ticket_growth': round(analytics._growth(total_tickets_sold, previous_tickets_sold), 2)
+        },
+        'revenue': {
+            'monthly_revenue': monthly_revenue,
+            'total_this_month': monthly_revenue[-1]['amount'],
+            'total_last_month': monthly_revenue[-2]['amount']
+        },
+        'events': {
+            'event_performance': event_performance,
+            'category_distribution': category_distribution
+        },
+        'tickets': {
+            'daily_sales': daily_sales,
+            'ticket_types': ticket_types,
+            'price_percentiles': price_percentiles
+        }
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the columnar analytics engine against the per-event ORM loops on synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=1_000_000)
+        parser.add_argument('--events', type=int, default=1000)
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        # Everything is seeded inside a transaction that is rolled back at the end
+        with transaction.atomic():
+            organizer = self.seed(options['events'], options['tickets'], options['users'])
+            # Only the seeded events; the id tie-break keeps both implementations in the same order
+            events_queryset = Event.objects.filter(organizer=organizer).order_by('-created_at', '-id')
+            now = timezone.now()
+
+            self.check_statistics(events_queryset, now)
+            if orm_organizer_analytics(events_queryset, now=now) != analytics.organizer_analytics(events_queryset, now=now):
+                raise CommandError('organizer_analytics: columnar payload differs from the ORM loop')
+
+            repeat = options['repeat']
+            orm_stats = self.measure(lambda: orm_organizer_statistics(events_queryset), repeat)
+            stats_time = self.measure(lambda: analytics.organizer_statistics(events_queryset, now=now), repeat)
+            orm_analytics = self.measure(lambda: orm_organizer_analytics(events_queryset, now=now), repeat)
+            analytics_time = self.measure(lambda: analytics.organizer_analytics(events_queryset, now=now), repeat)
+
+            self.stdout.write(f"Tickets: {options['tickets']:,}  Events: {options['events']:,}")
+            self.stdout.write(f"ORM loop (statistics):         {orm_stats:8.3f}s")
+            self.stdout.write(f"Columnar engine (statistics):  {stats_time:8.3f}s  ({orm_stats / stats_time:.1f}x)")
+            self.stdout.write(f"ORM loop (analytics):          {orm_analytics:8.3f}s")
+            self.stdout.write(f"Columnar engine (analytics):   {analytics_time:8.3f}s  ({orm_analytics / analytics_time:.1f}x)")
+
+            transaction.set_rollback(True)
+
+    def check_statistics(self, events_queryset, now):
+        """The columnar statistics must match the ORM loop; unique attendees are a sketch estimate"""
+        expected = orm_organizer_statistics(events_queryset)
+        overview = analytics.organizer_statistics(events_queryset, now=now)['overview']
+        for key in ('total_tickets_sold', 'total_revenue'):
+            if overview[key] != expected[key]:
+                raise CommandError(f'organizer_statistics: {key} is {overview[key]}, expected {expected[key]}')
+        if overview['average_attendance_rate'] != round(expected['average_attendance_rate'], 1):
+            raise CommandError('organizer_statistics: average_attendance_rate differs from the ORM loop')
+        attendees = expected['total_attendees']
+        if abs(overview['total_attendees'] - attendees) > max(1, 3 * standard_error() * attendees):
+            raise CommandError('organizer_statistics: unique attendee estimate is outside the sketch error bound')
+
+    def measure(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def seed(self, event_count, ticket_count, user_count):
+        self.stdout.write('Seeding synthetic data...')
+        now = timezone.now()
+        run = uuid.uuid4().hex[:6]
+
+        organizer = User.objects.create(
+            email=f'bench-organizer-{run}@example.com',
+            username=f'bench-organizer-{run}',
+            role='ORGANIZER'
+        )
+        users = User.objects.bulk_create(
+            User(email=f'bench-{run}-{i}@example.com', username=f'bench-{run}-{i}')
+            for i in range(user_count)
+        )
+        user_ids = [u.pk for u in users] if users[0].pk else list(
+            User.objects.filter(username__startswith=f'bench-{run}-').values_list('id', flat=True)
+        )
+
+        # bulk_create bypasses Event.save() validation, which is fine for synthetic rows
+        Event.objects.bulk_create(
+            Event(
+                title=f'Benchmark event {i}',
+                description='Synthetic benchmark event',
+                organizer=organizer,
+                location='Lagos',
+                start_date=now + timedelta(days=i % 90),
+                end_date=now + timedelta(days=i % 90, hours=4),
+                category=('Conference', 'Workshop', 'Meetup', 'Hackathon')[i % 4],
+                ticket_price=Decimal(1000 + (i % 10) * 500),
+                status='PUBLISHED',
+            )
+            for i in range(event_count)
+        )
+        events = list(Event.objects.filter(organizer=organizer).values_list('id', 'ticket_price'))
+
+        batch_size = 10_000
+        types = ('STANDARD', 'VIP', 'EARLY_BIRD')
+        for batch_start in range(0, ticket_count, batch_size):
+            batch = []
+            for i in range(batch_start, min(batch_start + batch_size, ticket_count)):
+                event_id, price = events[i % len(events)]
+                batch.append(Ticket(
+                    event_id=event_id,
+                    user_id=user_ids[i % len(user_ids)],
+                    ticket_number=f'B{run}{i:010d}',
+                    qr_code='tickets/qrcodes/benchmark.png',
+                    ticket_type=types[i % 3],
+                    price_paid=price,
+                    payment_status='COMPLETED',
+                    checked_in=i % 4 == 0,
+                ))
+            Ticket.objects.bulk_create(batch)
+
+            # Spread purchases over the last year so time buckets are populated
+            Ticket.objects.filter(ticket_number__startswith=f'B{run}{batch_start // batch_size:06d}').update(
+                created_at=now - timedelta(days=(batch_start // batch_size) % 365)
+            )
+
+        # bulk_create skips the ticket signals, so build the attendee sketches in one pass
+        call_command('rebuild_attendee_sketches', stdout=self.stdout)
+        return organizer
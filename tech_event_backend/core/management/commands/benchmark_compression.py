@@ -0,0 +1,46 @@
+# core/management/commands/benchmark_compression.py
+import gzip
+import time
+from django.db import transaction
+from django.test import override_settings
+from core import compression
+from core.management.commands import benchmark_json
+from core.renderers import FastJSONRenderer
+
+# Time to send one byte over a typical mobile link (10 Mbit/s)
+LINK_SECONDS_PER_BYTE = 8 / 10_000_000
+
+
+class Command(benchmark_json.Command):
+    help = 'Measure size and CPU time of gzip and brotli levels on the largest API payloads'
+
+    def handle(self, *args, **options):
+        if compression.brotli is None:
+            self.stdout.write('brotli is not installed: only gzip is measured')
+
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['testserver']):
+            payloads = benchmark_json.build_payloads(self.seed(options['events'], options['tickets']))
+            bodies = [(name, FastJSONRenderer().render(data)) for name, data in payloads]
+            transaction.set_rollback(True)
+
+        codecs = [(f'gzip -{level}', lambda body, level=level: gzip.compress(body, level, mtime=0)) for level in (1, 6, 9)]
+        if compression.brotli is not None:
+            codecs += [
+                (f'br q{quality}', lambda body, quality=quality: compression.brotli.compress(body, quality=quality))
+                for quality in (1, 4, 6, 11)
+            ]
+
+        self.stdout.write(
+            f"{'Payload':<22}{'Codec':<10}{'Size':>11}{'Ratio':>8}{'CPU':>10}{'MB/s':>8}{'Net saved':>11}"
+        )
+        for name, body in bodies:
+            self.stdout.write(f"{name:<22}{'identity':<10}{len(body) / 1024:>9.1f}KB")
+            for codec, compress in codecs:
+                compressed = compress(body)
+                seconds = self.measure(lambda: compress(body), options['repeat'])
+                # Transfer time saved on the link minus time spent compressing
+                saved = (len(body) - len(compressed)) * LINK_SECONDS_PER_BYTE - seconds
+                self.stdout.write(
+                    f"{'':<22}{codec:<10}{len(compressed) / 1024:>9.1f}KB{len(body) / len(compressed):>7.1f}x"
+                    f"{seconds * 1000:>8.2f}ms{len(body) / seconds / 1_000_000:>8.0f}{saved * 1000:>9.1f}ms"
+                )
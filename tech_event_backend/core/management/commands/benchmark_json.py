@@ -0,0 +1,128 @@
+# core/management/commands/benchmark_json.py
+import io
+import json
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from core import analytics
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer, orjson
+from events.api.serializers import EventListSerializer
+from events.models import Event
+from tickets.api.serializers import TicketSerializer
+from tickets.models import Ticket
+from users.models import User
+
+
+def build_payloads(attendee):
+    """(name, data) of the largest API responses: the attendee's tickets, the events list and analytics"""
+    request = Request(RequestFactory().get('/api/tickets/my_tickets/'))
+    context = {'request': request}
+    tickets = Ticket.objects.filter(user=attendee).select_related('event__organizer', 'user')
+    return [
+        ('my_tickets', TicketSerializer(tickets, many=True, context=context).data),
+        ('events list', EventListSerializer(Event.objects.all(), many=True, context=context).data),
+        ('organizer analytics', analytics.organizer_analytics(Event.objects.all())),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark FastJSONRenderer/FastJSONParser against the DRF stdlib JSON classes on the largest API payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=2000)
+        parser.add_argument('--events', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write('orjson is not installed: FastJSONRenderer falls back to the stdlib encoder')
+
+        # Everything is seeded inside a transaction that is rolled back at the end;
+        # file fields build absolute URLs against the factory's host
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['testserver']):
+            payloads = build_payloads(self.seed(options['events'], options['tickets']))
+
+            self.stdout.write(f"{'Payload':<28}{'Size':>10}{'stdlib':>11}{'fast':>11}{'speedup':>9}")
+            for name, data in payloads:
+                expected = JSONRenderer().render(data)
+                # Float exponents may be written differently (1e16 vs 1e+16); the values must match
+                if json.loads(FastJSONRenderer().render(data)) != json.loads(expected):
+                    raise CommandError(f'{name}: FastJSONRenderer output differs from JSONRenderer')
+                stdlib_time = self.measure(lambda: JSONRenderer().render(data), options['repeat'])
+                fast_time = self.measure(lambda: FastJSONRenderer().render(data), options['repeat'])
+                self.stdout.write(
+                    f"{'render ' + name:<28}{len(expected) / 1024:>8.1f}KB{stdlib_time * 1000:>9.2f}ms"
+                    f"{fast_time * 1000:>9.2f}ms{stdlib_time / fast_time:>8.1f}x"
+                )
+
+                stdlib_time = self.measure(lambda: JSONParser().parse(io.BytesIO(expected)), options['repeat'])
+                fast_time = self.measure(lambda: FastJSONParser().parse(io.BytesIO(expected)), options['repeat'])
+                self.stdout.write(
+                    f"{'parse ' + name:<28}{'':>10}{stdlib_time * 1000:>9.2f}ms"
+                    f"{fast_time * 1000:>9.2f}ms{stdlib_time / fast_time:>8.1f}x"
+                )
+
+            transaction.set_rollback(True)
+
+    def measure(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def seed(self, event_count, ticket_count):
+        self.stdout.write('Seeding synthetic data...')
+        now = timezone.now()
+        run = uuid.uuid4().hex[:6]
+
+        organizer = User.objects.create(
+            email=f'bench-organizer-{run}@example.com',
+            username=f'bench-organizer-{run}',
+            role='ORGANIZER'
+        )
+        attendee = User.objects.create(email=f'bench-{run}@example.com', username=f'bench-{run}')
+
+        # bulk_create bypasses Event.save() validation, which is fine for synthetic rows
+        Event.objects.bulk_create(
+            Event(
+                title=f'Benchmark event {i}',
+                description='Synthetic benchmark event with a longer description. ' * 5,
+                organizer=organizer,
+                location='Lagos',
+                start_date=now + timedelta(days=i % 90),
+                end_date=now + timedelta(days=i % 90, hours=4),
+                category=('Conference', 'Workshop', 'Meetup', 'Hackathon')[i % 4],
+                ticket_price=Decimal(1000 + (i % 10) * 500),
+                status='PUBLISHED',
+            )
+            for i in range(event_count)
+        )
+        events = list(Event.objects.filter(organizer=organizer).values_list('id', 'ticket_price'))
+
+        types = ('STANDARD', 'VIP', 'EARLY_BIRD')
+        Ticket.objects.bulk_create(
+            Ticket(
+                event_id=events[i % len(events)][0],
+                user=attendee,
+                ticket_number=f'B{run}{i:010d}',
+                qr_code='tickets/qrcodes/benchmark.png',
+                ticket_type=types[i % 3],
+                price_paid=events[i % len(events)][1],
+                payment_status='COMPLETED',
+                checked_in=i % 4 == 0,
+            )
+            for i in range(ticket_count)
+        )
+        return attendee
@@ -0,0 +1,78 @@
+# core/management/commands/benchmark_nearby.py
+import time
+from datetime import timedelta
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from core import geo
+from events.models import Event
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark radius search: geohash cell index vs. a full haversine scan (data is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=100_000)
+        parser.add_argument('--queries', type=int, default=100)
+        parser.add_argument('--radius-km', type=float, default=25.0)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        rng = np.random.default_rng(42)
+        # Events clustered around a handful of cities, roughly like real listings
+        centers = np.array([(6.52, 3.38), (9.08, 7.40), (5.60, -0.19), (-1.29, 36.82), (51.51, -0.13)])
+        picks = rng.integers(0, len(centers), options['events'])
+        points = centers[picks] + rng.normal(0, 0.5, (options['events'], 2))
+
+        organizer = get_user_model().objects.create_user(
+            email='benchmark-nearby@example.com', username='benchmark-nearby', password=None, role='ORGANIZER'
+        )
+        start = timezone.now() + timedelta(days=30)
+        self.stdout.write('Inserting synthetic events...')
+        Event.objects.bulk_create([
+            Event(
+                title=f'Event {i}', description='', organizer=organizer, location='', category='Meetup',
+                start_date=start, end_date=start + timedelta(hours=2), status='PUBLISHED',
+                latitude=lat, longitude=lng, geohash=geo.encode(lat, lng)
+            )
+            for i, (lat, lng) in enumerate(points.tolist())
+        ], batch_size=2000)
+
+        events = Event.objects.filter(status='PUBLISHED')
+        radius = options['radius_km']
+        queries = centers[rng.integers(0, len(centers), options['queries'])] + rng.normal(0, 0.3, (options['queries'], 2))
+
+        def full_scan(lat, lng):
+            ids, lats, lngs = (np.array(c) for c in zip(*events.values_list('id', 'latitude', 'longitude')))
+            distances = geo.haversine_km(lat, lng, lats, lngs)
+            inside = np.flatnonzero(distances <= radius)
+            return ids[inside[np.argsort(distances[inside])]].tolist()
+
+        scan_times, cell_times, matches = [], [], 0
+        for lat, lng in queries.tolist():
+            started = time.perf_counter()
+            expected = full_scan(lat, lng)
+            scan_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            found = [event_id for event_id, _ in geo.within_radius(events, lat, lng, radius)]
+            cell_times.append(time.perf_counter() - started)
+            matches += found == expected
+
+        scan_times, cell_times = np.array(scan_times) * 1000, np.array(cell_times) * 1000
+        self.stdout.write(f"Events: {options['events']:,}  Radius: {radius:g} km  Identical results: {matches}/{len(queries)}")
+        self.stdout.write(f"Full scan p50:  {np.percentile(scan_times, 50):8.2f}ms  p99: {np.percentile(scan_times, 99):8.2f}ms")
+        self.stdout.write(f"Cell index p50: {np.percentile(cell_times, 50):8.2f}ms  p99: {np.percentile(cell_times, 99):8.2f}ms")
@@ -0,0 +1,64 @@
+# core/management/commands/benchmark_rate_limit.py
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from core import ratelimit
+from core.middleware import RateLimitMiddleware
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the per-request overhead of RateLimitMiddleware against an empty view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20_000)
+        parser.add_argument('--clients', type=int, default=500)
+        parser.add_argument('--redis-url', help='Measure the Redis backend at this URL instead of process memory')
+
+    def handle(self, *args, **options):
+        previous = ratelimit.get_backend()
+        if options['redis_url']:
+            backend = ratelimit.FallbackRateLimitBackend(ratelimit.RedisRateLimitBackend(options['redis_url']))
+        else:
+            backend = ratelimit.MemoryRateLimitBackend()
+        ratelimit.set_backend(backend)
+        try:
+            self.run(options, type(backend).__name__)
+        finally:
+            ratelimit.set_backend(previous)
+
+    def run(self, options, backend_name):
+        factory = RequestFactory()
+        rng = np.random.default_rng(42)
+        requests = []
+        for client in rng.integers(0, options['clients'], options['requests']).tolist():
+            request = factory.get('/api/events/', REMOTE_ADDR=f'10.0.{client // 256}.{client % 256}')
+            request.user = None
+            requests.append(request)
+
+        middleware = RateLimitMiddleware(lambda request: HttpResponse())
+
+        def timings():
+            times = []
+            for request in requests:
+                started = time.perf_counter()
+                middleware(request)
+                times.append(time.perf_counter() - started)
+            return np.array(times) * 1_000_000
+
+        # High enough that every request is counted and allowed
+        rules = [{'name': 'bench', 'prefix': '/api/', 'window': 60, 'limits': {'anonymous': 10 ** 9}}]
+        with override_settings(RATE_LIMIT_ENABLED=False):
+            baseline = timings()
+        with override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMIT_RULES=rules):
+            timings()  # warm up (script load, pool connections)
+            limited = timings()
+
+        self.stdout.write(f"Backend: {backend_name}  Requests: {options['requests']:,}  Clients: {options['clients']:,}")
+        self.stdout.write(f"Disabled p50: {np.percentile(baseline, 50):8.1f}us  p99: {np.percentile(baseline, 99):8.1f}us")
+        self.stdout.write(f"Limited p50:  {np.percentile(limited, 50):8.1f}us  p99: {np.percentile(limited, 99):8.1f}us")
+        self.stdout.write(f"Overhead p50: {np.percentile(limited, 50) - np.percentile(baseline, 50):8.1f}us")
+        if isinstance(ratelimit.get_backend(), ratelimit.FallbackRateLimitBackend):
+            breaker = ratelimit.get_backend().breaker
+            self.stdout.write(f"Circuit: {'open (local limits)' if breaker.is_open else 'closed'}")
@@ -0,0 +1,53 @@
+# core/management/commands/benchmark_similar_events.py
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from core.similarity import SimilarityIndex, event_terms
+
+
+class Command(BaseCommand):
+    help = 'Benchmark similar-event lookups on a synthetic in-memory TF-IDF index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=100_000)
+        parser.add_argument('--vocabulary', type=int, default=20_000)
+        parser.add_argument('--queries', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(42)
+        # Zipf-distributed words approximate real event text
+        words = [f'w{i}' for i in range(options['vocabulary'])]
+        categories = ('Conference', 'Workshop', 'Meetup', 'Hackathon', 'Webinar')
+
+        def text(length):
+            picks = np.minimum(rng.zipf(1.3, length), len(words)) - 1
+            return ' '.join(words[i] for i in picks)
+
+        self.stdout.write('Generating synthetic events...')
+        events = [
+            (i, event_terms(text(6), text(80), categories[i % len(categories)]))
+            for i in range(options['events'])
+        ]
+
+        started = time.perf_counter()
+        index = SimilarityIndex(events)
+        build_time = time.perf_counter() - started
+
+        timings = []
+        for i in rng.integers(0, len(events), options['queries']):
+            event_id, terms = events[i]
+            started = time.perf_counter()
+            index.query(terms, k=10, exclude=event_id)
+            timings.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for event_id, terms in events[:200]:
+            index.upsert(event_id, terms)
+        upsert_time = (time.perf_counter() - started) / 200
+
+        timings = np.array(timings) * 1000
+        self.stdout.write(f"Events: {len(events):,}  Vocabulary: {len(index.vocab):,}  Postings: {len(index.term_docs):,}")
+        self.stdout.write(f"Build:          {build_time:8.2f}s")
+        self.stdout.write(f"Query p50:      {np.percentile(timings, 50):8.3f}ms")
+        self.stdout.write(f"Query p99:      {np.percentile(timings, 99):8.3f}ms")
+        self.stdout.write(f"Upsert (delta): {upsert_time * 1000:8.3f}ms")
@@ -0,0 +1,16 @@
+# core/management/commands/build_recommendations.py
+import time
+from django.core.management.base import BaseCommand
+from core.recommendations import refresh_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the category co-attendance model and cache recommendations for every attendee (run hourly)'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        model, users = refresh_recommendations()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {len(model)} upcoming events for {users} attendees in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,39 @@
+# core/management/commands/query_stats.py
+from django.core.management.base import BaseCommand
+from core import query_stats
+
+SORT_KEYS = {
+    'queries': 'avg_queries',
+    'sql': 'avg_sql_ms',
+    'requests': 'requests',
+    'n_plus_one': 'n_plus_one_rate',
+}
+
+
+class Command(BaseCommand):
+    help = 'Show per-route SQL stats collected by QueryProfileMiddleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='queries')
+        parser.add_argument('--limit', type=int, default=30)
+        parser.add_argument('--reset', action='store_true', help='Clear the stats after printing them')
+
+    def handle(self, *args, **options):
+        query_stats.flush()
+        stats = sorted(query_stats.route_stats(), key=lambda row: row[SORT_KEYS[options['sort']]], reverse=True)
+        if not stats:
+            self.stdout.write('No profiled requests yet (is QUERY_PROFILING_SAMPLE_RATE above 0?)')
+        else:
+            self.stdout.write(f"{'Requests':>9} {'Queries':>8} {'SQL ms':>8} {'N+1 %':>6}  Route")
+            for row in stats[:options['limit']]:
+                self.stdout.write(
+                    f"{row['requests']:>9} {row['avg_queries']:>8.1f} {row['avg_sql_ms']:>8.2f} "
+                    f"{row['n_plus_one_rate'] * 100:>6.1f}  {row['route']}"
+                )
+                if row['suspect']:
+                    shape, count = row['suspect']
+                    self.stdout.write(self.style.WARNING(f"{'':>35}{count} x {shape[:160]}"))
+        
+        if options['reset']:
+            query_stats.reset()
+            self.stdout.write(self.style.SUCCESS('Stats cleared'))
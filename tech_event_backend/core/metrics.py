@@ -0,0 +1,325 @@
+# core/metrics.py
+"""
+Process metrics in the Prometheus text exposition format.
+
+Counters, gauges and fixed-bucket histograms are kept in process memory, so
+recording a value takes a lock and a dict update. Every `FLUSH_SECONDS` (and
+when /metrics is scraped) each process writes a snapshot of its own values to
+`METRICS_DIR/<pid>-<start time>.json`, replacing the file atomically. Since
+every file has exactly one writer, no update is lost however many gunicorn
+workers there are, and a worker that reuses an exited worker's pid starts a
+file of its own. A scrape adds up the snapshots of all workers. Counters and
+histograms of exited workers are folded into `retired.json` and their files
+removed, so totals never go down; gauges only count for live workers.
+
+    metrics.REQUESTS.inc(method='GET', route='/api/events/', status='200')
+    with metrics.EXTERNAL_SECONDS.time(service='paystack', operation='verify'):
+        ...
+"""
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.db import connections
+
+FLUSH_SECONDS = 5
+RETIRED_FILE = 'retired.json'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_registry = {}
+_values = {}  # (metric name, label values) -> float, or bucket counts + [sum, count] for histograms
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+_process = None  # (pid, start time in ns) naming this process's snapshot file
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        _registry[name] = self
+
+    def _key(self, labels):
+        return self.name, tuple(str(labels[label]) for label in self.labels)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            _values[key] = _values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            _values[key] = _values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with _lock:
+            _values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            counts = _values.get(key)
+            if counts is None:
+                counts = _values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-2] += value
+            counts[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+REQUESTS = Counter('http_requests_total', 'HTTP requests by route and status', ('method', 'route', 'status'))
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'HTTP request latency', ('method', 'route'))
+REQUEST_DB_SECONDS = Histogram('http_request_db_seconds', 'Time spent in SQL per request', ('method', 'route'))
+IN_FLIGHT = Gauge('http_requests_in_flight', 'Requests being handled')
+CACHE_LOOKUPS = Counter('cache_lookups_total', 'Cache lookups by cache and result (hit or miss)', ('cache', 'result'))
+EXTERNAL_SECONDS = Histogram(
+    'external_call_duration_seconds', 'Latency of calls to external services', ('service', 'operation')
+)
+RATE_LIMITED = Counter('rate_limit_rejections_total', 'Requests refused by rate limits and quotas', ('limiter', 'rule'))
+RESPONSE_BYTES = Counter(
+    'http_response_bytes_total', 'Compressed response bodies before and after compression', ('encoding', 'stage')
+)
+COMPRESSION_SECONDS = Histogram(
+    'http_compression_seconds', 'Time spent compressing response bodies', ('encoding',),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+
+
+class SqlTimer:
+    """Execute wrapper counting statements and adding up time spent in SQL"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+@contextmanager
+def request_sql_timer(request):
+    """
+    The request's SqlTimer. The first middleware to ask installs it on every
+    connection and keeps it on the request; middleware further in reuse it.
+    """
+    timer = getattr(request, 'sql_timer', None)
+    if timer is not None:
+        yield timer
+        return
+    timer = request.sql_timer = SqlTimer()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        yield timer
+
+
+def record_cache(cache_name, value):
+    """Count a lookup as a hit unless it returned None; returns the value"""
+    CACHE_LOOKUPS.inc(cache=cache_name, result='miss' if value is None else 'hit')
+    return value
+
+
+def metrics_dir():
+    return getattr(settings, 'METRICS_DIR', None) or os.path.join(tempfile.gettempdir(), 'tech-event-metrics')
+
+
+def _snapshot_name():
+    """This process's snapshot file name; a forked worker gets a new one"""
+    global _process
+    if _process is None or _process[0] != os.getpid():
+        _process = (os.getpid(), time.time_ns())
+    return f'{_process[0]}-{_process[1]}.json'
+
+
+def _write_json(directory, path, data):
+    with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as f:
+        json.dump(data, f)
+    os.replace(f.name, path)
+
+
+def flush():
+    """Write this process's values to its snapshot file"""
+    global _last_flush
+    with _lock:
+        snapshot = [[name, list(labels), value] for (name, labels), value in _values.items()]
+        _last_flush = time.monotonic()
+    directory = metrics_dir()
+    os.makedirs(directory, exist_ok=True)
+    _write_json(directory, os.path.join(directory, _snapshot_name()), snapshot)
+
+
+def reset():
+    """Forget this process's values (used by tests)"""
+    with _lock:
+        _values.clear()
+
+
+def maybe_flush():
+    if time.monotonic() - _last_flush >= FLUSH_SECONDS:
+        flush()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _add(totals, snapshot, gauges=True):
+    for name, labels, value in snapshot:
+        metric = _registry.get(name)
+        if metric is None or (metric.kind == 'gauge' and not gauges):
+            continue
+        key = (name, tuple(labels))
+        if isinstance(value, list):
+            current = totals.get(key) or [0] * len(value)
+            totals[key] = [a + b for a, b in zip(current, value)]
+        else:
+            totals[key] = totals.get(key, 0) + value
+
+
+def _snapshots(directory):
+    """{filename: alive} for the process snapshot files; only a pid's newest file can be alive"""
+    files = {}
+    for filename in os.listdir(directory):
+        if not filename.endswith('.json') or filename == RETIRED_FILE:
+            continue
+        pid, _, started = filename[:-len('.json')].partition('-')
+        try:
+            files[filename] = int(pid), int(started or 0)
+        except ValueError:
+            continue
+    newest = {}
+    for pid, started in files.values():
+        newest[pid] = max(started, newest.get(pid, started))
+    return {filename: started == newest[pid] and _alive(pid) for filename, (pid, started) in files.items()}
+
+
+def collect():
+    """
+    {(name, labels): value} summed over the snapshots of all processes. Scrapes
+    take a lock on the directory, so an exited worker is folded into the
+    retired totals exactly once and never counted twice or missed meanwhile.
+    """
+    directory = metrics_dir()
+    if not os.path.isdir(directory):
+        return {}
+    with open(os.path.join(directory, 'retired.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        retired_path = os.path.join(directory, RETIRED_FILE)
+        retired = _read_json(retired_path) or {'files': [], 'values': []}
+        live, dead = [], []
+        for filename, alive in _snapshots(directory).items():
+            (live if alive else dead).append(filename)
+
+        # Files left behind by a pass that stopped before removing them are already counted
+        folded = set(retired['files'])
+        fresh = [filename for filename in dead if filename not in folded]
+        if fresh:
+            values = {}
+            _add(values, retired['values'])
+            for filename in fresh:
+                _add(values, _read_json(os.path.join(directory, filename)) or [], gauges=False)
+            retired = {'files': fresh, 'values': [[name, list(labels), value] for (name, labels), value in values.items()]}
+            _write_json(directory, retired_path, retired)
+        for filename in dead:
+            try:
+                os.remove(os.path.join(directory, filename))
+            except FileNotFoundError:
+                pass
+
+        totals = {}
+        _add(totals, retired['values'])
+        for filename in live:
+            _add(totals, _read_json(os.path.join(directory, filename)) or [])
+    return totals
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """All metrics of all processes in the text exposition format"""
+    flush()
+    totals = collect()
+    lines = []
+    for name, metric in sorted(_registry.items()):
+        series = sorted((labels, value) for (metric_name, labels), value in totals.items() if metric_name == name)
+        lines.append(f'# HELP {name} {metric.help}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for labels, value in series:
+            if metric.kind != 'histogram':
+                lines.append(f'{name}{_labels(metric.labels, labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets, value):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(metric.labels, labels, [("le", str(bound))])} {cumulative}')
+            lines.append(f'{name}_bucket{_labels(metric.labels, labels, [("le", "+Inf")])} {value[-1]}')
+            lines.append(f'{name}_sum{_labels(metric.labels, labels)} {_number(value[-2])}')
+            lines.append(f'{name}_count{_labels(metric.labels, labels)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
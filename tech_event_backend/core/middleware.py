@@ -1,34 +1,47 @@
 # core/middleware.py
+import math
 import time
+import random
 import logging
-from django.utils.deprecation import MiddlewareMixin
-from django.http import HttpResponseTooManyRequests
-import redis
+from contextlib import ExitStack
+from django.http import JsonResponse
+from django.db import connections
 from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from core import compression, metrics, profiling, query_stats, ratelimit, tracing
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
-class RequestLogMiddleware(MiddlewareMixin):
-    """Middleware to log request timing and other metrics"""
+class RequestLogMiddleware:
+    """
+    Log one structured record per request (route, status, user, duration and
+    SQL stats; see core.jsonlog) and add the X-Request-Time header.
+    """
     
-    def process_request(self, request):
-        request.start_time = time.time()
+    def __init__(self, get_response):
+        self.get_response = get_response
     
-    def process_response(self, request, response):
-        # Skip if start_time wasn't set (e.g., for some middleware requests)
-        if not hasattr(request, 'start_time'):
-            return response
-            
-        # Calculate request duration
-        duration = time.time() - request.start_time
+    def __call__(self, request):
+        started = time.perf_counter()
+        with metrics.request_sql_timer(request) as timer:
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
         
-        # Log request details
+        # DRF puts the token-authenticated user on the request too
+        user = getattr(request, 'user', None)
         logger.info(
-            f"Request: {request.method} {request.path} - "
-            f"Status: {response.status_code} - "
-            f"Duration: {duration:.2f}s - "
-            f"User: {request.user.id if request.user.is_authenticated else 'Anonymous'}"
+            "%s %s %s", request.method, request.path, response.status_code,
+            extra={
+                'method': request.method,
+                'route': query_stats.route_pattern(request),
+                'path': request.path,
+                'status': response.status_code,
+                'user_id': user.pk if user is not None and user.is_authenticated else None,
+                'duration_ms': round(duration * 1000, 1),
+                'db_queries': timer.count,
+                'db_ms': round(timer.seconds * 1000, 1),
+            }
         )
         
         # Add timing header for API clients
@@ -36,69 +49,179 @@ class RequestLogMiddleware(MiddlewareMixin):
         
         return response
 
-class RateLimitMiddleware(MiddlewareMixin):
-    """Middleware to implement rate limiting"""
+class TracingMiddleware:
+    """
+    Give every request a trace id (X-Trace-Id, and trace_id in log records)
+    and record spans for the TRACING_SAMPLE_RATE sample (see core.tracing).
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        tracing.instrument()
     
-    def __init__(self, get_response=None):
-        super().__init__(get_response)
-        # Connect to Redis
-        self.redis = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    def __call__(self, request):
+        with tracing.request_trace(request.path, request.META.get('HTTP_TRACEPARENT')) as (trace_id, trace):
+            request.trace_id = trace_id
+            if trace is None:
+                response = self.get_response(request)
+            else:
+                with ExitStack() as stack:
+                    for connection in connections.all():
+                        stack.enter_context(connection.execute_wrapper(tracing.sql_span))
+                    response = self.get_response(request)
+                trace.name = query_stats.route_name(request)
+                trace.attributes.update(path=request.path, status=response.status_code)
+        response['X-Trace-Id'] = trace_id
+        return response
+
+class MetricsMiddleware:
+    """
+    Record request count, latency, SQL time and in-flight requests per route
+    template for the /metrics endpoint (see core.metrics).
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
         
-        # Rate limit settings
-        self.rate_limit = 60  # requests per minute
-        self.rate_limit_window = 60  # seconds
+        metrics.IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            with metrics.request_sql_timer(request) as timer:
+                response = self.get_response(request)
+        finally:
+            metrics.IN_FLIGHT.dec()
+        duration = time.perf_counter() - started
         
-        # Higher limit for specific endpoints
-        self.high_limit_paths = ['/api/events/', '/api/tickets/']
-        self.high_rate_limit = 200  # requests per minute
+        route = query_stats.route_pattern(request)
+        metrics.REQUESTS.inc(method=request.method, route=route, status=str(response.status_code))
+        metrics.REQUEST_SECONDS.observe(duration, method=request.method, route=route)
+        metrics.REQUEST_DB_SECONDS.observe(timer.seconds, method=request.method, route=route)
+        metrics.maybe_flush()
+        return response
+
+class CompressionMiddleware:
+    """
+    Compress text responses with brotli or gzip, as negotiated from
+    Accept-Encoding (see core.compression).
+    """
     
-    def process_request(self, request):
-        # Skip rate limiting for certain conditions
-        if settings.DEBUG and not settings.RATE_LIMIT_IN_DEBUG:
-            return None
-            
-        # Get client identifier (IP or user ID if authenticated)
-        client_id = request.user.id if request.user.is_authenticated else request.META.get('REMOTE_ADDR')
-        
-        # Determine which rate limit to use based on path
-        path = request.path
-        rate_limit = self.high_rate_limit if any(path.startswith(p) for p in self.high_limit_paths) else self.rate_limit
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not settings.COMPRESSION_ENABLED or not compression.is_compressible(response):
+            return response
         
-        # Create a Redis key specific to this client
-        redis_key = f"rate_limit:{client_id}:{path.split('/')[1]}"
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.negotiate(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            return response
         
-        # Get current count from Redis
-        count = self.redis.incr(redis_key)
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(response.streaming_content, encoding)
+            # The compressed size is only known once everything is sent
+            del response.headers['Content-Length']
+        else:
+            compressed = compression.compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
         
-        # Set expiry on first request
-        if count == 1:
-            self.redis.expire(redis_key, self.rate_limit_window)
+        # A strong ETag names the uncompressed bytes; weaken it as GZipMiddleware does
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+class QueryProfileMiddleware:
+    """
+    Profile the SQL of a sample of requests (QUERY_PROFILING_SAMPLE_RATE, 0 to 1).
+    Sampled responses get a Server-Timing header, suspected N+1 patterns are
+    logged, and totals are aggregated per route (see core.query_stats).
+    Unsampled requests pay for one settings lookup and one random draw.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        sample_rate = settings.QUERY_PROFILING_SAMPLE_RATE
+        if sample_rate <= 0 or random.random() >= sample_rate:
+            return self.get_response(request)
         
-        # If rate limit exceeded, return 429 Too Many Requests
-        if count > rate_limit:
-            logger.warning(f"Rate limit exceeded for {client_id} on {path}")
-            return HttpResponseTooManyRequests("Rate limit exceeded. Please try again later.")
+        profile = query_stats.RequestProfile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
         
-        # Add rate limit headers to response
-        request.rate_limit = rate_limit
-        request.rate_limit_remaining = max(0, rate_limit - count)
+        route = query_stats.route_name(request)
+        repeated = profile.repeated(settings.QUERY_PROFILING_N_PLUS_ONE_THRESHOLD)
+        if repeated:
+            logger.warning("Possible N+1 on %s: %s x %s", route, repeated[0][1], repeated[0][0][:200])
+        query_stats.record(route, profile, repeated)
         
-        return None
+        response['Server-Timing'] = (
+            f'db;dur={profile.seconds * 1000:.1f};desc="{profile.count} queries", '
+            f'app;dur={total * 1000:.1f}'
+        )
+        return response
+
+class ProfilingMiddleware:
+    """
+    Run a request under cProfile when a staff user sends X-Profile: 1 (the
+    capture id comes back in X-Profile-Id) or when it is in the
+    PROFILING_SAMPLE_RATE sample (see core.profiling).
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
     
-    def process_response(self, request, response):
-        # Add rate limit headers if available
-        if hasattr(request, 'rate_limit'):
-            response['X-RateLimit-Limit'] = str(request.rate_limit)
-            response['X-RateLimit-Remaining'] = str(request.rate_limit_remaining)
-            
+    def __call__(self, request):
+        trigger = profiling.should_profile(request)
+        if trigger is None:
+            return self.get_response(request)
+        
+        response, profile_id = profiling.run(self.get_response, request, trigger)
+        if profile_id and trigger == 'header':
+            response['X-Profile-Id'] = profile_id
         return response
 
-# Add to settings.py
-"""
-MIDDLEWARE = [
-    ...
-    'core.middleware.RequestLogMiddleware',
-    'core.middleware.RateLimitMiddleware',
-    ...
-]
-"""
\ No newline at end of file
+class RateLimitMiddleware:
+    """
+    Apply the sliding-window limits in RATE_LIMIT_RULES (see core.ratelimit).
+    Limited responses carry X-RateLimit-Limit/Remaining; rejected requests get
+    429 with Retry-After.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        if not settings.RATE_LIMIT_ENABLED:
+            return self.get_response(request)
+        
+        decision = ratelimit.check_request(request)
+        if decision is None:
+            return self.get_response(request)
+        
+        if not decision.allowed:
+            logger.warning("Rate limit exceeded on %s", request.path)
+            metrics.RATE_LIMITED.inc(limiter='rate_limit', rule=ratelimit.match_rule(request.path)['name'])
+            response = JsonResponse({"error": "Rate limit exceeded. Please try again later."}, status=429)
+            response['Retry-After'] = str(max(1, math.ceil(decision.retry_after)))
+        else:
+            response = self.get_response(request)
+        
+        response['X-RateLimit-Limit'] = str(decision.limit)
+        response['X-RateLimit-Remaining'] = str(decision.remaining)
+        return response
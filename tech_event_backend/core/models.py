@@ -1,3 +1,22 @@
 from django.db import models
 
-# Create your models here.
+
+class GeocodeCache(models.Model):
+    """Persistent geocoding results keyed by normalized location text; misses are cached too"""
+    query = models.CharField(max_length=255, unique=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    provider = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.query} -> {self.latitude}, {self.longitude}"
+
+
+class ChangeStamp(models.Model):
+    """When the data behind a conditional GET stamp (see core.conditional) last changed"""
+    name = models.CharField(max_length=50, unique=True)
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} changed at {self.changed_at}"
@@ -0,0 +1,36 @@
+# core/parsers.py
+"""
+JSON parser backed by orjson, falling back to DRF's stdlib JSONParser when
+orjson is not installed, the request is not UTF-8 or STRICT_JSON is off.
+orjson reads integers beyond 64 bits as floats, so bodies with a run of 19
+or more digits also go to the stdlib parser, which keeps them exact.
+"""
+import io
+import re
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from core.renderers import FastJSONRenderer, orjson
+
+UTF8 = {'utf-8', 'utf8'}
+LONG_DIGITS_RE = re.compile(rb'\d{19}')
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser that decodes with orjson when it is installed"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower() not in UTF8:
+            return super().parse(stream, media_type, parser_context)
+
+        data = stream.read()
+        if LONG_DIGITS_RE.search(data):
+            return super().parse(io.BytesIO(data), media_type, parser_context)
+
+        # orjson rejects NaN and Infinity, like the strict stdlib parser
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
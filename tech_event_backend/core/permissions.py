@@ -17,4 +17,8 @@ class IsAdminOrOrganizer(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated:
             return False
-        return request.user.role in ['ADMIN', 'ORGANIZER']
\ No newline at end of file
+        return request.user.role in ['ADMIN', 'ORGANIZER']
+
+class IsStaff(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (request.user.is_staff or request.user.role == 'ADMIN')
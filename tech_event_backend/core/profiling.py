@@ -0,0 +1,233 @@
+# core/profiling.py
+"""
+On-demand cProfile captures of single requests.
+
+A request is profiled when a staff user sends `X-Profile: 1` (the response
+then carries `X-Profile-Id`), or when it falls in the random
+`PROFILING_SAMPLE_RATE` sample. Captures are stored as files under a random
+id in `PROFILING_DIR`, shared by every worker on the host like METRICS_DIR,
+and can be listed, summarised by top functions, or downloaded in the `.prof`
+format read by `pstats` and snakeviz (see core.views).
+
+Overhead and storage are capped:
+
+* one request at a time per process is profiled, and at most
+  `PROFILING_MAX_PER_MINUTE` per process; other requests run unprofiled;
+* captures are zlib-compressed and, when still over `PROFILING_MAX_BYTES`,
+  trimmed to the functions with the most own time, without call edges;
+* the newest `PROFILING_MAX_STORED` captures are kept, for `PROFILE_TIMEOUT`.
+"""
+import cProfile
+import json
+import marshal
+import os
+import pstats
+import random
+import re
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from django.conf import settings
+from django.utils import timezone
+from core.query_stats import route_name
+
+HEADER = 'HTTP_X_PROFILE'
+PROFILE_TIMEOUT = 60 * 60 * 24
+TRIMMED_FUNCTIONS = 2000
+SORT_KEYS = {'cumulative': 3, 'tottime': 2, 'calls': 1}
+
+_running = threading.Lock()
+_window = [0, 0]  # [minute, profiles started in it]
+_window_lock = threading.Lock()
+
+
+_ID_RE = re.compile(r'[0-9a-f]{32}')
+
+
+def profiles_dir():
+    return getattr(settings, 'PROFILING_DIR', None) or os.path.join(tempfile.gettempdir(), 'tech-event-profiles')
+
+
+def _path(profile_id, extension):
+    return os.path.join(profiles_dir(), f'{profile_id}.{extension}')
+
+
+def _write(path, data, mode):
+    with tempfile.NamedTemporaryFile(mode, dir=os.path.dirname(path), suffix='.tmp', delete=False) as f:
+        f.write(data)
+    os.replace(f.name, path)
+
+
+def is_staff(user):
+    return user is not None and user.is_authenticated and (user.is_staff or user.role == 'ADMIN')
+
+
+def requested_by_staff(request):
+    """True when a staff user asked for this request to be profiled"""
+    if request.META.get(HEADER) != '1':
+        return False
+    user = getattr(request, 'user', None)
+    if is_staff(user):
+        return True
+    # API clients authenticate with a JWT, which DRF only reads inside the view
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return False
+    return authenticated is not None and is_staff(authenticated[0])
+
+
+def _take_slot():
+    minute = int(time.monotonic() // 60)
+    with _window_lock:
+        if _window[0] != minute:
+            _window[:] = [minute, 0]
+        if _window[1] >= settings.PROFILING_MAX_PER_MINUTE:
+            return False
+        _window[1] += 1
+        return True
+
+
+def should_profile(request):
+    """'header', 'sample' or None"""
+    if requested_by_staff(request):
+        return 'header'
+    rate = settings.PROFILING_SAMPLE_RATE
+    if rate > 0 and random.random() < rate:
+        return 'sample'
+    return None
+
+
+def run(get_response, request, trigger):
+    """get_response(request) under cProfile when a slot is free; (response, profile id or None)"""
+    if not _running.acquire(blocking=False):
+        return get_response(request), None
+    try:
+        if not _take_slot():
+            return get_response(request), None
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - started
+    finally:
+        _running.release()
+
+    profile_id = uuid.uuid4().hex
+    save(profile_id, pstats.Stats(profiler).stats, {
+        'id': profile_id,
+        'route': route_name(request),
+        'path': request.path,
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 1),
+        'trigger': trigger,
+        'created_at': timezone.now().isoformat(),
+    })
+    return response, profile_id
+
+
+def _encode(stats):
+    data = zlib.compress(marshal.dumps(stats))
+    if len(data) <= settings.PROFILING_MAX_BYTES:
+        return data, False
+    top = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:TRIMMED_FUNCTIONS]
+    return zlib.compress(marshal.dumps({func: row[:4] + ({},) for func, row in top})), True
+
+
+def save(profile_id, stats, meta):
+    data, meta['trimmed'] = _encode(stats)
+    meta['size_bytes'] = len(data)
+    os.makedirs(profiles_dir(), exist_ok=True)
+    # The data goes first: a capture is listed once its metadata file exists
+    _write(_path(profile_id, 'prof.z'), data, 'wb')
+    _write(_path(profile_id, 'json'), json.dumps(meta), 'w')
+    # Captures are listed by mtime; file system timestamps can be too coarse to order them
+    now = time.time_ns()
+    os.utime(_path(profile_id, 'json'), ns=(now, now))
+    for old in _stored_ids()[settings.PROFILING_MAX_STORED:]:
+        _delete(old)
+
+
+def _delete(profile_id):
+    for extension in ('json', 'prof.z'):
+        try:
+            os.remove(_path(profile_id, extension))
+        except OSError:
+            pass
+
+
+def _stored_ids():
+    """Ids of stored captures, newest first; expired ones are removed"""
+    directory = profiles_dir()
+    captures = []
+    for filename in os.listdir(directory) if os.path.isdir(directory) else []:
+        profile_id, _, extension = filename.partition('.')
+        if extension != 'json' or not _ID_RE.fullmatch(profile_id):
+            continue
+        try:
+            modified = os.stat(os.path.join(directory, filename)).st_mtime_ns
+        except OSError:
+            continue
+        if time.time() - modified / 1e9 > PROFILE_TIMEOUT:
+            _delete(profile_id)
+            continue
+        captures.append((modified, profile_id))
+    return [profile_id for _, profile_id in sorted(captures, reverse=True)]
+
+
+def recent():
+    """Metadata of stored captures, newest first"""
+    metas = []
+    for profile_id in _stored_ids()[:settings.PROFILING_MAX_STORED]:
+        try:
+            with open(_path(profile_id, 'json')) as f:
+                metas.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return metas
+
+
+def load(profile_id):
+    """(metadata, pstats-format stats bytes) or None"""
+    if not _ID_RE.fullmatch(profile_id):
+        return None
+    try:
+        if time.time() - os.path.getmtime(_path(profile_id, 'json')) > PROFILE_TIMEOUT:
+            return None
+        with open(_path(profile_id, 'json')) as f:
+            meta = json.load(f)
+        with open(_path(profile_id, 'prof.z'), 'rb') as f:
+            data = f.read()
+    except (OSError, ValueError):
+        return None
+    return meta, zlib.decompress(data)
+
+
+def clear():
+    """Delete every stored capture (used by tests)"""
+    for profile_id in _stored_ids():
+        _delete(profile_id)
+
+
+def top_functions(raw, sort='cumulative', limit=30):
+    """The heaviest functions of a capture, as dicts"""
+    stats = marshal.loads(raw)
+    index = SORT_KEYS.get(sort, SORT_KEYS['cumulative'])
+    rows = sorted(stats.items(), key=lambda item: item[1][index], reverse=True)[:limit]
+    return [
+        {
+            'function': pstats.func_std_string(func),
+            'calls': calls,
+            'primitive_calls': primitive,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3),
+        }
+        for func, (primitive, calls, tottime, cumtime, _) in rows
+    ]
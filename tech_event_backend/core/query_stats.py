@@ -0,0 +1,210 @@
+# core/query_stats.py
+"""
+Per-request SQL profiling and per-route aggregates.
+
+`RequestProfile` is installed with `connection.execute_wrapper` for sampled
+requests (see `core.middleware.QueryProfileMiddleware`). It counts queries,
+times them and groups them by fingerprint: the statement with literals,
+numbers and IN lists replaced by placeholders, so the same query for
+different rows looks the same. A fingerprint executed `N_PLUS_ONE_THRESHOLD`
+or more times in one request is reported as a suspected N+1.
+
+Per-route totals are summed in process memory and, like core.metrics, each
+process writes them to its own snapshot file `METRICS_DIR/query_stats/<pid>.json`
+every `FLUSH_SECONDS`. `manage.py query_stats` adds up the snapshots of all
+workers; those of exited workers count until they are `STATS_RETENTION` old.
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from core import metrics
+
+N_PLUS_ONE_THRESHOLD = 5
+FLUSH_SECONDS = 10
+STATS_RETENTION = 60 * 60 * 24 * 7
+RESET_FILE = 'reset'
+COUNTERS = ('requests', 'queries', 'sql_us', 'n_plus_one')
+MAX_SUSPECT_LENGTH = 500
+
+_GROUP_RE = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN \((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def route_pattern(request):
+    """'/api/events/<pk>/similar/' for a request, from its resolved URL pattern"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    # Router patterns are regexes; show their groups the way path() routes read
+    route = _GROUP_RE.sub(r'<\1>', match.route).lstrip('^').rstrip('$')
+    return f'/{route}'
+
+
+def route_name(request):
+    """'GET /api/events/<pk>/similar/' for a request"""
+    return f'{request.method} {route_pattern(request)}'
+
+
+def fingerprint(sql):
+    """Statement shape with literal values and parameters replaced by placeholders"""
+    sql = sql.replace('%s', '?')
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class RequestProfile:
+    """Execute wrapper recording the queries of one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """(fingerprint, count) of statements run at least `threshold` times, most frequent first"""
+        shapes = Counter()
+        for sql, count in self.statements.items():
+            shapes[fingerprint(sql)] += count
+        return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+
+
+_totals = {}
+_suspects = {}  # route -> most repeated (fingerprint, count)
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+_reset_seen = time.time()  # mtime of the last reset marker applied here
+
+
+def stats_dir():
+    return os.path.join(metrics.metrics_dir(), 'query_stats')
+
+
+def _reset_at():
+    try:
+        return os.path.getmtime(os.path.join(stats_dir(), RESET_FILE))
+    except OSError:
+        return 0.0
+
+
+def record(route, profile, repeated):
+    """Add a profiled request to its route's totals"""
+    with _lock:
+        totals = _totals.setdefault(route, dict.fromkeys(COUNTERS, 0))
+        totals['requests'] += 1
+        totals['queries'] += profile.count
+        totals['sql_us'] += int(profile.seconds * 1_000_000)
+        totals['n_plus_one'] += bool(repeated)
+        if repeated and repeated[0][1] > _suspects.get(route, ('', 0))[1]:
+            _suspects[route] = (repeated[0][0][:MAX_SUSPECT_LENGTH], repeated[0][1])
+        due = time.monotonic() - _last_flush >= FLUSH_SECONDS
+    if due:
+        flush()
+
+
+def flush():
+    """Write this process's totals to its snapshot file"""
+    global _last_flush, _reset_seen
+    reset_at = _reset_at()
+    with _lock:
+        # Another process ran reset(): totals from before it no longer count
+        if reset_at > _reset_seen:
+            _totals.clear()
+            _suspects.clear()
+            _reset_seen = reset_at
+        snapshot = {
+            route: dict(totals, suspect=_suspects.get(route))
+            for route, totals in _totals.items()
+        }
+        _last_flush = time.monotonic()
+    if not snapshot:
+        return
+
+    directory = stats_dir()
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as f:
+        json.dump(snapshot, f)
+    os.replace(f.name, os.path.join(directory, f'{os.getpid()}.json'))
+
+
+def _snapshots():
+    directory = stats_dir()
+    reset_at = _reset_at()
+    for filename in os.listdir(directory) if os.path.isdir(directory) else []:
+        if not filename.endswith('.json'):
+            continue
+        path = os.path.join(directory, filename)
+        try:
+            modified = os.path.getmtime(path)
+            if modified < reset_at or time.time() - modified > STATS_RETENTION:
+                os.remove(path)
+                continue
+            with open(path) as f:
+                yield json.load(f)
+        except (OSError, ValueError):
+            continue
+
+
+def route_stats():
+    """Aggregated stats per route over all processes, as dicts"""
+    routes = {}
+    for snapshot in _snapshots():
+        for route, values in snapshot.items():
+            totals = routes.setdefault(route, dict.fromkeys(COUNTERS, 0))
+            for counter in COUNTERS:
+                totals[counter] += values.get(counter, 0)
+            # Keep the worst repeated statement seen for the route
+            suspect = values.get('suspect')
+            if suspect and suspect[1] > (totals.get('suspect') or ('', 0))[1]:
+                totals['suspect'] = tuple(suspect)
+
+    stats = []
+    for route, totals in routes.items():
+        if not totals['requests']:
+            continue
+        stats.append({
+            'route': route,
+            'requests': totals['requests'],
+            'avg_queries': totals['queries'] / totals['requests'],
+            'avg_sql_ms': totals['sql_us'] / totals['requests'] / 1000,
+            'n_plus_one_rate': totals['n_plus_one'] / totals['requests'],
+            'suspect': totals.get('suspect'),
+        })
+    return stats
+
+
+def reset():
+    """Forget all recorded stats, in every process"""
+    global _reset_seen
+    directory = stats_dir()
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, RESET_FILE), 'w'):
+        pass
+    os.utime(os.path.join(directory, RESET_FILE))
+    with _lock:
+        _totals.clear()
+        _suspects.clear()
+        _reset_seen = _reset_at()
+    for filename in os.listdir(directory):
+        if filename.endswith('.json'):
+            try:
+                os.remove(os.path.join(directory, filename))
+            except OSError:
+                pass
@@ -0,0 +1,48 @@
+# core/querysets.py
+"""
+Per-action relation loading for ViewSets.
+
+A ViewSet using `OptimizedQuerysetMixin` declares what each action reads:
+
+    select_related_by_action = {'*': ('event__organizer', 'user'), 'verify': ('event', 'user')}
+    prefetch_related_by_action = {'retrieve': ('payments',)}
+
+'*' is the default for actions without an entry. List and retrieve, and any
+action that passes its serializer to `optimize_queryset`, take their joins
+from the serializer's fields instead (`core.fieldsets.narrow_queryset`), which
+also follows ?fields= and ?expand=; only their prefetches come from the table.
+Other actions, including writes that return a serialized object, get the
+declared `select_related`. `columns_by_action` adds columns a narrowed action
+reads outside its serializer (e.g. for conditional GET validators).
+"""
+from core.fieldsets import SAFE_METHODS, narrow_queryset
+
+NARROWED_ACTIONS = ('list', 'retrieve')
+
+
+def _for_action(table, action):
+    return tuple(table.get(action, table.get('*', ())))
+
+
+class OptimizedQuerysetMixin:
+    select_related_by_action = {}
+    prefetch_related_by_action = {}
+    columns_by_action = {}
+
+    def optimize_queryset(self, queryset, serializer=None):
+        """Apply the current action's relations, narrowed to `serializer` on reads when given"""
+        if serializer is not None and self.request.method in SAFE_METHODS:
+            queryset = narrow_queryset(queryset, serializer, _for_action(self.columns_by_action, self.action))
+        else:
+            select_related = _for_action(self.select_related_by_action, self.action)
+            if select_related:
+                queryset = queryset.select_related(*select_related)
+        prefetch_related = _for_action(self.prefetch_related_by_action, self.action)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer = self.get_serializer() if self.action in NARROWED_ACTIONS else None
+        return self.optimize_queryset(queryset, serializer)
@@ -0,0 +1,122 @@
+# core/quotas.py
+"""
+Cost-weighted request quotas for expensive endpoints.
+
+Each client has a budget of `QUOTA_BUDGETS[role]` units per `QUOTA_WINDOW`
+seconds (role as in `core.ratelimit`; a role without a budget is not
+limited). Views decorated with `@quota` spend their cost from it, on the same
+sliding-window counters as the rate limiter, and a call is refused only when
+its own cost no longer fits. Once expensive calls have used most of the
+budget they get 429 with Retry-After, while cheap calls keep fitting in what
+is left.
+
+A cost is either static, `@quota(cost=5)`, or measured, `@quota(measured=True)`:
+the recent average latency of the view (an exponential moving average per
+process) at `QUOTA_MS_PER_UNIT` milliseconds per unit, clamped to
+`cost..max_cost`. Latency is only measured on allowed calls, so the average
+also halves every `LATENCY_HALF_LIFE` seconds without samples: an endpoint
+that got slow once becomes affordable again and is re-measured. Whatever the
+cost, one call never charges more than `MAX_BUDGET_SHARE` of the caller's
+budget, so every client can make at least one call per window.
+
+    @api_view(['GET'])
+    @permission_classes([IsAuthenticated])
+    @quota(measured=True)
+    def organizer_analytics(request): ...
+
+    @action(detail=True, methods=['get'])
+    @quota(cost=3)
+    def attendees(self, request, pk=None): ...
+
+Place it below `@api_view`/`@action` so it runs after authentication and
+permission checks.
+"""
+import functools
+import math
+import threading
+import time
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+from core import metrics, ratelimit
+
+LATENCY_SMOOTHING = 0.2
+LATENCY_HALF_LIFE = 60
+MAX_BUDGET_SHARE = 0.5
+
+_latency = {}  # endpoint -> (moving average of its latency in ms, time of the last sample)
+_lock = threading.Lock()
+
+
+def _average(endpoint, now):
+    entry = _latency.get(endpoint)
+    if entry is None:
+        return None
+    average, updated = entry
+    return average * 2 ** (-max(0.0, now - updated) / LATENCY_HALF_LIFE)
+
+
+def record_latency(endpoint, ms, now=None):
+    now = time.monotonic() if now is None else now
+    with _lock:
+        average = _average(endpoint, now)
+        average = ms if average is None else average + LATENCY_SMOOTHING * (ms - average)
+        _latency[endpoint] = (average, now)
+
+
+def measured_cost(endpoint, min_cost, max_cost, now=None):
+    average = _average(endpoint, time.monotonic() if now is None else now)
+    if average is None:
+        return min_cost
+    return max(min_cost, min(max_cost, math.ceil(average / settings.QUOTA_MS_PER_UNIT)))
+
+
+def affordable(charge, budget):
+    """A charge capped at MAX_BUDGET_SHARE of the budget (at least 1 unit)"""
+    return min(charge, max(1, int(budget * MAX_BUDGET_SHARE)))
+
+
+def budget_for(role):
+    budgets = settings.QUOTA_BUDGETS
+    return budgets.get(role, budgets.get(ratelimit.ANY_ROLE) if role != ratelimit.ANONYMOUS else None)
+
+
+def quota(cost=1, measured=False, max_cost=50):
+    """Charge a view `cost` units (or its measured cost, at least `cost`) from the caller's budget"""
+
+    def decorator(view):
+        endpoint = f'{view.__module__}.{view.__qualname__}'
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            # Function views get the request first, viewset actions after self
+            request = args[0] if hasattr(args[0], 'method') else args[1]
+            if not settings.RATE_LIMIT_ENABLED:
+                return view(*args, **kwargs)
+            identity, role = ratelimit.client_identity(request)
+            budget = budget_for(role)
+            if budget is None:
+                return view(*args, **kwargs)
+
+            charge = affordable(measured_cost(endpoint, cost, max_cost) if measured else cost, budget)
+            decision = ratelimit.hit(f'quota:{identity}', budget, settings.QUOTA_WINDOW, cost=charge)
+            if not decision.allowed:
+                metrics.RATE_LIMITED.inc(limiter='quota', rule=endpoint)
+                response = Response(
+                    {"error": "Request quota exceeded for this endpoint. Please try again later."},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS
+                )
+                response['Retry-After'] = str(max(1, math.ceil(decision.retry_after)))
+            else:
+                started = time.perf_counter()
+                response = view(*args, **kwargs)
+                if measured:
+                    record_latency(endpoint, (time.perf_counter() - started) * 1000)
+
+            response['X-Quota-Cost'] = str(charge)
+            response['X-Quota-Remaining'] = str(decision.remaining)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,382 @@
+# core/ratelimit.py
+"""
+Sliding-window rate limiting for the API.
+
+Each client gets a budget per rule: the first rule in `RATE_LIMIT_RULES` whose
+path prefix matches the request applies, and its limit depends on the
+caller's role ('anonymous' for unauthenticated callers, '*' for any role not
+listed; no entry means unlimited). Clients are identified by user id, read
+from the session or from the JWT without a database query, or by IP address.
+
+The window is a sliding-window counter: a counter for the current fixed
+window plus the previous window's counter weighted by how much of it still
+overlaps the sliding window. That is two integers per client and rule, and is
+within a few percent of an exact sliding log. In Redis the read, the check,
+the increment and the expiry run as one Lua script, so a decision is a single
+round trip and a key can never be left without a TTL. The connection pool is
+bounded and both connecting and waiting for a pooled connection time out
+after `RATE_LIMIT_REDIS_TIMEOUT` seconds.
+
+Redis calls go through a circuit breaker. After `RATE_LIMIT_BREAKER_FAILURES`
+consecutive errors or calls slower than `RATE_LIMIT_BREAKER_SLOW_MS`, the
+breaker opens and decisions are made locally by per-process token buckets of
+the same size, so a Redis incident costs no request latency. Hits counted
+locally are added to the Redis windows in one pipelined batch once a probe
+after `RATE_LIMIT_BREAKER_RESET_SECONDS` succeeds.
+
+Without `REDIS_URL` counters are kept in process memory (development and tests).
+"""
+import logging
+import math
+import threading
+import time
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+ROLE_CACHE_SECONDS = 300
+ANONYMOUS = 'anonymous'
+ANY_ROLE = '*'
+
+Decision = namedtuple('Decision', ['allowed', 'limit', 'remaining', 'retry_after'])
+
+
+def _retry_after_ms(limit, window_ms, elapsed_ms, previous, current, cost):
+    """Milliseconds until `cost` more would fit, given the two window counters"""
+    if cost > limit:
+        return window_ms
+    if current + cost > limit:
+        # Wait for the next window, then for enough of this one to slide out
+        needed = window_ms * (1 - (limit - cost) / current)
+        return window_ms - elapsed_ms + max(0, needed)
+    needed = window_ms * (1 - (limit - current - cost) / previous)
+    return max(1, needed - elapsed_ms)
+
+
+class MemoryRateLimitBackend:
+    """Process-local window counters for development and tests"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def hit(self, key, limit, window_ms, now_ms, cost=1):
+        index, elapsed = divmod(now_ms, window_ms)
+        with self._lock:
+            if len(self._counts) > 10000:
+                self._counts = {k: v for k, v in self._counts.items() if k[1] >= index - 1}
+            current = self._counts.get((key, index), 0)
+            previous = self._counts.get((key, index - 1), 0)
+            used = previous * (window_ms - elapsed) / window_ms + current
+            if used + cost > limit:
+                retry = _retry_after_ms(limit, window_ms, elapsed, previous, current, cost)
+                return False, int(limit - used), int(retry)
+            self._counts[(key, index)] = current + cost
+            return True, int(limit - used - cost), 0
+
+
+class TokenBucketBackend:
+    """
+    Process-local token buckets holding `limit` tokens that refill over the
+    window. Approximate: each worker enforces the limit on its own.
+    """
+
+    def __init__(self, max_buckets=10000):
+        self._lock = threading.Lock()
+        self._buckets = {}  # (key, window ms) -> (tokens, updated ms, limit)
+        self.max_buckets = max_buckets
+
+    def hit(self, key, limit, window_ms, now_ms, cost=1):
+        rate = limit / window_ms
+        with self._lock:
+            tokens, updated, _ = self._buckets.get((key, window_ms), (limit, now_ms, limit))
+            tokens = min(limit, tokens + max(0, now_ms - updated) * rate)
+            if tokens < cost:
+                self._buckets[(key, window_ms)] = (tokens, now_ms, limit)
+                retry = window_ms if cost > limit else (cost - tokens) / rate
+                return False, int(tokens), int(math.ceil(retry))
+            if len(self._buckets) >= self.max_buckets:
+                self._prune(now_ms)
+            self._buckets[(key, window_ms)] = (tokens - cost, now_ms, limit)
+            return True, int(tokens - cost), 0
+
+    def _prune(self, now_ms):
+        # Buckets that have refilled completely hold nothing worth keeping
+        self._buckets = {
+            (key, window_ms): (tokens, updated, limit)
+            for (key, window_ms), (tokens, updated, limit) in self._buckets.items()
+            if tokens + (now_ms - updated) * limit / window_ms < limit
+        }
+
+
+# Read both windows, decide, and count the hit in one atomic step.
+# KEYS: current window, previous window. ARGV: limit, window ms, elapsed ms, cost.
+HIT_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local used = previous * (window - elapsed) / window + current
+if used + cost > limit then
+    local retry
+    if cost > limit then
+        retry = window
+    elseif current + cost > limit then
+        retry = window - elapsed + math.max(0, window * (1 - (limit - cost) / current))
+    else
+        retry = math.max(1, window * (1 - (limit - current - cost) / previous) - elapsed)
+    end
+    return {0, math.floor(limit - used), math.floor(retry)}
+end
+if redis.call('INCRBY', KEYS[1], cost) == cost then
+    redis.call('PEXPIRE', KEYS[1], window * 2)
+end
+return {1, math.floor(limit - used - cost), 0}
+"""
+
+# Add hits counted elsewhere to a window. KEYS: window. ARGV: count, ttl ms.
+ADD_SCRIPT = """
+if redis.call('INCRBY', KEYS[1], ARGV[1]) == tonumber(ARGV[1]) then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+"""
+
+
+class RedisRateLimitBackend:
+    """Window counters shared by every worker through Redis"""
+
+    def __init__(self, url, max_connections=20, timeout=0.05):
+        import redis
+        pool = redis.BlockingConnectionPool.from_url(
+            url,
+            max_connections=max_connections,
+            timeout=timeout,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+            health_check_interval=30,
+        )
+        self.redis = redis.Redis(connection_pool=pool)
+        self._hit = self.redis.register_script(HIT_SCRIPT)
+        self._add = self.redis.register_script(ADD_SCRIPT)
+
+    def hit(self, key, limit, window_ms, now_ms, cost=1):
+        index, elapsed = divmod(now_ms, window_ms)
+        # The hash tag keeps both windows of a client in one cluster slot
+        allowed, remaining, retry = self._hit(
+            keys=[f'ratelimit:{{{key}}}:{index}', f'ratelimit:{{{key}}}:{index - 1}'],
+            args=[limit, window_ms, elapsed, cost],
+        )
+        return bool(allowed), int(remaining), int(retry)
+
+    def add_counts(self, counts):
+        """Add {(key, window ms, window index): count} to the shared windows in one round trip"""
+        pipe = self.redis.pipeline(transaction=False)
+        for (key, window_ms, index), count in counts.items():
+            self._add(keys=[f'ratelimit:{{{key}}}:{index}'], args=[count, window_ms * 2], client=pipe)
+        pipe.execute()
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker. Slow calls count as failures. While open,
+    `allow()` is False until `reset_seconds` have passed; then one caller at a
+    time gets to probe.
+    """
+
+    def __init__(self, failures=5, slow_seconds=0.02, reset_seconds=10):
+        self.max_failures = failures
+        self.slow_seconds = slow_seconds
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self.opened_at < self.reset_seconds:
+                return False
+            self._probing = True
+            return True
+
+    def record(self, seconds, ok=True):
+        """Record a call; True when it closed the breaker"""
+        with self._lock:
+            was_open, self._probing = self.opened_at is not None, False
+            if ok and seconds < self.slow_seconds:
+                self.failures = 0
+                self.opened_at = None
+                return was_open
+            self.failures += 1
+            if was_open or self.failures >= self.max_failures:
+                if not was_open:
+                    logger.warning(f"Rate limiter circuit opened after {self.failures} failed or slow Redis calls")
+                self.opened_at = time.monotonic()
+            return False
+
+
+class FallbackRateLimitBackend:
+    """
+    Redis counters behind a circuit breaker, with local token buckets taking
+    over while it is open. Locally allowed hits are synced to Redis when it
+    recovers, so the shared windows still see them.
+    """
+
+    def __init__(self, primary, breaker=None, local=None, max_pending=10000):
+        self.primary = primary
+        self.breaker = breaker or CircuitBreaker()
+        self.local = local or TokenBucketBackend()
+        self.max_pending = max_pending
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window_ms, now_ms, cost=1):
+        if self.breaker.allow():
+            started = time.perf_counter()
+            try:
+                result = self.primary.hit(key, limit, window_ms, now_ms, cost)
+            except Exception as e:
+                self.breaker.record(time.perf_counter() - started, ok=False)
+                logger.warning(f"Rate limiter Redis call failed, using local limits: {str(e)}")
+            else:
+                if self.breaker.record(time.perf_counter() - started):
+                    self.sync()
+                return result
+
+        allowed, remaining, retry = self.local.hit(key, limit, window_ms, now_ms, cost)
+        if allowed:
+            with self._lock:
+                bucket = (key, window_ms, now_ms // window_ms)
+                if bucket in self._pending or len(self._pending) < self.max_pending:
+                    self._pending[bucket] = self._pending.get(bucket, 0) + cost
+        return allowed, remaining, retry
+
+    def sync(self):
+        """Push locally counted hits that are still inside a live window to Redis"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        now_ms = int(time.time() * 1000)
+        live = {bucket: count for bucket, count in pending.items() if bucket[2] >= now_ms // bucket[1] - 1}
+        if not live:
+            return
+        try:
+            self.primary.add_counts(live)
+        except Exception as e:
+            logger.warning(f"Could not sync {len(live)} local rate limit counters to Redis: {str(e)}")
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        redis_url = getattr(settings, 'REDIS_URL', None)
+        if redis_url:
+            _backend = FallbackRateLimitBackend(
+                RedisRateLimitBackend(
+                    redis_url,
+                    max_connections=settings.RATE_LIMIT_REDIS_MAX_CONNECTIONS,
+                    timeout=settings.RATE_LIMIT_REDIS_TIMEOUT,
+                ),
+                CircuitBreaker(
+                    failures=settings.RATE_LIMIT_BREAKER_FAILURES,
+                    slow_seconds=settings.RATE_LIMIT_BREAKER_SLOW_MS / 1000,
+                    reset_seconds=settings.RATE_LIMIT_BREAKER_RESET_SECONDS,
+                ),
+            )
+        else:
+            _backend = MemoryRateLimitBackend()
+    return _backend
+
+
+def set_backend(backend):
+    """Swap the counter backend (used by tests)"""
+    global _backend
+    _backend = backend
+
+
+def match_rule(path):
+    """The first configured rule whose prefix matches the path"""
+    for rule in settings.RATE_LIMIT_RULES:
+        if path.startswith(rule['prefix']):
+            return rule
+    return None
+
+
+def limit_for(rule, role):
+    limits = rule['limits']
+    return limits.get(role, limits.get(ANY_ROLE) if role != ANONYMOUS else None)
+
+
+def _user_role(user_id):
+    key = f'ratelimit:role:{user_id}'
+    role = cache.get(key)
+    if role is None:
+        from django.contrib.auth import get_user_model
+        role = get_user_model().objects.filter(pk=user_id).values_list('role', flat=True).first() or ANONYMOUS
+        cache.set(key, role, ROLE_CACHE_SECONDS)
+    return role
+
+
+def client_ip(request):
+    if settings.RATE_LIMIT_TRUST_X_FORWARDED_FOR:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_identity(request):
+    """(client key, role) for a request"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}', user.role
+
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if header.startswith('Bearer '):
+        from rest_framework_simplejwt.exceptions import TokenError
+        from rest_framework_simplejwt.settings import api_settings
+        from rest_framework_simplejwt.tokens import AccessToken
+        try:
+            user_id = AccessToken(header[len('Bearer '):])[api_settings.USER_ID_CLAIM]
+        except (TokenError, KeyError):
+            pass
+        else:
+            return f'user:{user_id}', _user_role(user_id)
+
+    return f'ip:{client_ip(request)}', ANONYMOUS
+
+
+def hit(key, limit, window_seconds, cost=1, now=None):
+    """Count `cost` against a client's budget and decide; counter failures allow the request"""
+    window_ms = int(window_seconds * 1000)
+    now_ms = int((now if now is not None else time.time()) * 1000)
+    try:
+        allowed, remaining, retry_ms = get_backend().hit(key, limit, window_ms, now_ms, cost)
+    except Exception as e:
+        logger.warning(f"Rate limiter unavailable, allowing request: {str(e)}")
+        return Decision(True, limit, limit, 0)
+    return Decision(allowed, limit, max(0, remaining), retry_ms / 1000)
+
+
+def check_request(request):
+    """Decision for a request under the matching rule, or None when it is not limited"""
+    rule = match_rule(request.path)
+    if rule is None:
+        return None
+    identity, role = client_identity(request)
+    limit = limit_for(rule, role)
+    if limit is None:
+        return None
+    return hit(f"{rule['name']}:{identity}", limit, rule['window'])
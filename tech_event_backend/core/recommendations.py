@@ -0,0 +1,202 @@
+# core/recommendations.py
+"""
+Category-based event recommendations for attendees.
+
+The offline pass (the `build_recommendations` command) loads every completed ticket and
+every upcoming published event as NumPy columns and builds:
+
+* a user x category affinity matrix: the share of each user's completed
+  tickets per category (the same signal as "favorite categories" on the
+  attendee statistics), and
+* an event x category co-attendance matrix: for each upcoming event, the share
+  of its ticket holders who have attended each category, plus 1 for the
+  event's own category so events without sales yet still match.
+
+A user's event scores are `affinity @ co_attendance.T` plus a small
+popularity term. The co-attendance matrix is kept in the (shared) cache for
+MODEL_TIMEOUT, long enough to outlive one missed hourly run; each user's
+top-k event ids are cached too, so the endpoint is a cache lookup. A completed
+purchase only drops the buyer's cached list, which is recomputed from the
+stored matrix on their next request.
+
+The model is never built inside a request: until the command has stored one,
+users get their attended categories' next upcoming events from one query.
+"""
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+from events.models import Event
+from tickets.models import Ticket
+from core import metrics
+from core.analytics import fetch_columns
+
+TOP_K = 50
+POPULARITY_WEIGHT = 0.1
+MODEL_CACHE_KEY = 'recommendations:model'
+MODEL_TIMEOUT = 60 * 60 * 3  # the command runs hourly
+USER_TIMEOUT = 60 * 60 * 24
+USER_BATCH_SIZE = 2048
+
+
+def user_cache_key(user_id):
+    return f'recommendations:user:{user_id}'
+
+
+class CoAttendanceModel:
+    """Upcoming events scored against the category space"""
+
+    def __init__(self, categories, event_ids, co_attendance, popularity):
+        self.categories = categories
+        self.category_index = {category: i for i, category in enumerate(categories)}
+        self.event_ids = event_ids
+        self.co_attendance = co_attendance
+        self.popularity = popularity
+
+    def __len__(self):
+        return len(self.event_ids)
+
+    def affinity(self, category_counts):
+        """Normalized affinity vector from a {category: ticket count} mapping"""
+        vector = np.zeros(len(self.categories), dtype=np.float32)
+        for category, count in category_counts.items():
+            if category in self.category_index:
+                vector[self.category_index[category]] = count
+        total = vector.sum()
+        return vector / total if total else vector
+
+    def top_k(self, affinity, held=None, k=TOP_K):
+        """
+        Top event ids for each row of `affinity` (users x categories).
+        `held` is a boolean (users x events) mask of events a user already has tickets for.
+        """
+        affinity = np.atleast_2d(affinity)
+        if not len(self):
+            return [[] for _ in range(len(affinity))]
+        scores = affinity @ self.co_attendance.T + POPULARITY_WEIGHT * self.popularity
+        if held is not None:
+            scores[held] = -np.inf
+
+        k = min(k, len(self))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        valid = np.isfinite(np.take_along_axis(top_scores, order, axis=1))
+        return [self.event_ids[row[mask]].tolist() for row, mask in zip(top, valid)]
+
+
+def build_model(now=None):
+    """
+    Build the co-attendance model from completed tickets.
+    Returns (model, user_ids, affinity, held) where `affinity` has one row per
+    user in `user_ids` and `held` is the (user row, event column) index pairs
+    of upcoming events each user already has tickets for.
+    """
+    now = now or timezone.now()
+    ticket_user, ticket_event, ticket_category = fetch_columns(
+        Ticket.objects.filter(payment_status='COMPLETED').order_by().values_list(
+            'user_id', 'event_id', 'event__category'
+        ), 3
+    )
+    event_ids, event_categories = fetch_columns(
+        Event.objects.filter(status='PUBLISHED', start_date__gt=now).order_by('id').values_list('id', 'category'), 2
+    )
+
+    categories, category_idx = np.unique(
+        np.array(ticket_category + event_categories, dtype=object).astype(str), return_inverse=True
+    )
+    ticket_cat = category_idx[:len(ticket_category)]
+    event_cat = category_idx[len(ticket_category):]
+    event_ids = np.array(event_ids, dtype=np.int64)
+    user_ids, user_idx = np.unique(np.array(ticket_user, dtype=np.int64), return_inverse=True)
+    ticket_event = np.array(ticket_event, dtype=np.int64)
+
+    counts = np.zeros((len(user_ids), len(categories)), dtype=np.float32)
+    np.add.at(counts, (user_idx, ticket_cat), 1)
+    totals = counts.sum(axis=1, keepdims=True)
+    affinity = np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+    attended = (counts > 0).astype(np.float32)
+
+    # Distinct (user, upcoming event) pairs
+    if len(event_ids):
+        event_pos = np.minimum(np.searchsorted(event_ids, ticket_event), len(event_ids) - 1)
+        upcoming = event_ids[event_pos] == ticket_event
+    else:
+        event_pos = np.zeros(len(ticket_event), dtype=np.int64)
+        upcoming = np.zeros(len(ticket_event), dtype=bool)
+    pairs = np.unique(np.stack([user_idx[upcoming], event_pos[upcoming]]), axis=1)
+    pair_users, pair_events = pairs
+
+    holders = np.bincount(pair_events, minlength=len(event_ids)).astype(np.float32)
+    co_attendance = np.zeros((len(event_ids), len(categories)), dtype=np.float32)
+    np.add.at(co_attendance, pair_events, attended[pair_users])
+    co_attendance /= np.maximum(holders, 1)[:, None]
+    co_attendance[np.arange(len(event_ids)), event_cat] += 1.0
+
+    popularity = np.log1p(holders)
+    if len(popularity) and popularity.max() > 0:
+        popularity /= popularity.max()
+
+    model = CoAttendanceModel(categories.tolist(), event_ids, co_attendance, popularity)
+    return model, user_ids, affinity, (pair_users, pair_events)
+
+
+def refresh_recommendations(now=None):
+    """Offline pass: rebuild the model and cache top-k events for every ticket holder"""
+    model, user_ids, affinity, (held_users, held_events) = build_model(now=now)
+    cache.set(MODEL_CACHE_KEY, model, MODEL_TIMEOUT)
+
+    # Score users in batches to bound the (users x events) score matrix
+    for start in range(0, len(user_ids), USER_BATCH_SIZE):
+        batch = slice(start, start + USER_BATCH_SIZE)
+        held = np.zeros((len(affinity[batch]), len(model)), dtype=bool)
+        in_batch = (held_users >= start) & (held_users < start + USER_BATCH_SIZE)
+        held[held_users[in_batch] - start, held_events[in_batch]] = True
+        recommendations = model.top_k(affinity[batch], held)
+        cache.set_many({
+            user_cache_key(int(user_id)): event_ids
+            for user_id, event_ids in zip(user_ids[batch], recommendations)
+        }, USER_TIMEOUT)
+    return model, len(user_ids)
+
+
+def get_model():
+    """The model stored by the last offline pass, or None"""
+    return metrics.record_cache('recommendation_model', cache.get(MODEL_CACHE_KEY))
+
+
+def fallback_for_user(user_id, limit):
+    """Next upcoming events in the categories a user has attended, for when no model is stored"""
+    completed = Ticket.objects.filter(user_id=user_id, payment_status='COMPLETED')
+    return list(
+        Event.objects.filter(
+            status='PUBLISHED',
+            start_date__gt=timezone.now(),
+            category__in=completed.values('event__category')
+        ).exclude(
+            id__in=completed.values('event_id')
+        ).order_by('start_date', 'id').values_list('id', flat=True)[:limit]
+    )
+
+
+def recommend_for_user(user_id, limit=10):
+    """Recommended upcoming event ids for a user, best first"""
+    event_ids = metrics.record_cache('recommendations', cache.get(user_cache_key(user_id)))
+    if event_ids is None:
+        model = get_model()
+        if model is None:
+            return fallback_for_user(user_id, limit)
+        completed = Ticket.objects.filter(user_id=user_id, payment_status='COMPLETED')
+        category_counts = dict(
+            completed.order_by().values_list('event__category').annotate(count=Count('id'))
+        )
+        held = np.isin(model.event_ids, list(completed.values_list('event_id', flat=True)))
+        event_ids = model.top_k(model.affinity(category_counts), held[None, :])[0]
+        cache.set(user_cache_key(user_id), event_ids, USER_TIMEOUT)
+    return event_ids[:limit]
+
+
+def invalidate_user(user_id):
+    """Drop a user's cached recommendations after they buy a ticket"""
+    cache.delete(user_cache_key(user_id))
@@ -0,0 +1,79 @@
+# core/renderers.py
+"""
+JSON renderer backed by orjson.
+
+Produces JSON equal in value to DRF's JSONRenderer output for API data:
+datetimes are handed back to DRF's encoder (so UTC still ends in 'Z'),
+Decimals become floats and UUIDs strings, and U+2028/U+2029 are escaped.
+orjson serializes dicts, lists, strings, numbers, UUIDs and numpy values
+natively, and calls DRF's encoder only for everything else. The bytes differ
+only in float exponents: orjson writes `1e16` and `1e-7` where the stdlib
+writes `1e+16` and `1e-07`.
+
+Indented output (the browsable API, `Accept: application/json; indent=4`),
+data orjson rejects (e.g. integers over 64 bits), NaN and infinities (which
+orjson would write as null) and installs without orjson all go through the
+stdlib renderer, which raises the same errors as before for data that cannot
+be serialized, including ValueError for non-finite floats under STRICT_JSON.
+"""
+import math
+from collections.abc import Mapping
+from decimal import Decimal
+import numpy as np
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    )
+
+
+def has_non_finite(data):
+    """Whether NaN or an infinity appears anywhere in the data"""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, Mapping):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, Decimal):
+            if not value.is_finite():
+                return True
+        elif isinstance(value, (np.ndarray, np.floating)):
+            if np.issubdtype(value.dtype, np.floating) and not np.isfinite(value).all():
+                return True
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is installed"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=JSONEncoder().default, option=OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # orjson writes non-finite floats as null; only then is the data worth walking
+        if b'null' in ret and has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same JavaScript-safe escaping as JSONRenderer (U+2028/U+2029 in UTF-8)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
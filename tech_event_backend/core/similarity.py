@@ -0,0 +1,358 @@
+# core/similarity.py
+"""
+"Similar events" from TF-IDF vectors over event text.
+
+Each published event's title (counted twice), category and description are
+tokenized into term counts. The index keeps them as a compact sparse matrix in
+plain NumPy arrays:
+
+* a forward CSR matrix of raw term counts (doc -> terms), used to recompute
+  weights when the index is compacted, and
+* an inverted CSC copy of the L2-normalized TF-IDF weights (term -> docs), so a
+  cosine top-k query only touches the postings of the query's own terms and
+  scores every document with one `np.bincount`. Postings are ordered by
+  weight and queries read only the heads of the postings of their strongest
+  terms, which bounds the work per query independently of the index size;
+  common low-idf terms contribute little to the top results anyway.
+
+Edits do not rewrite those arrays: the old row is masked out and the new
+vector goes into a small delta segment that is scored alongside. Once the
+delta grows past `DELTA_LIMIT` rows everything is compacted into a fresh
+matrix. IDF values are frozen at compaction; terms first seen afterwards get
+their IDF from the document frequencies at the time.
+
+The index lives in each worker process. `Event` save/delete signals update the
+local index directly and record the event in a `core.changelog.ChangeLog`, so
+the other workers re-read only the changed events on their next query. That
+log is only seen by every worker through a shared cache (REDIS_URL); without
+one, other workers miss the change until their index is `REBUILD_SECONDS` old
+and is rebuilt from the database.
+
+Full builds never run inside a request: the first query, an index older than
+`REBUILD_SECONDS` or a gap in the change log starts one on a background thread,
+which swaps the new index in when it is done. Until then queries keep using
+the old index, or, before the first build finishes, fall back to upcoming
+events of the same category.
+"""
+import re
+import threading
+import time
+from collections import Counter
+import numpy as np
+from django.db import connections
+from django.utils import timezone
+from events.models import Event
+from core.changelog import ChangeLog
+
+DELTA_LIMIT = 512
+TITLE_WEIGHT = 2
+# Queries score only their heaviest terms and the heaviest postings of each
+QUERY_TERMS = 12
+MAX_POSTINGS = 2000
+# Bounds how stale a worker's index can get when it misses change log entries
+REBUILD_SECONDS = 60 * 60
+
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]*')
+STOP_WORDS = frozenset("""
+a about after all also an and any are as at be been but by can do for from
+get has have how if in into is it its join more new not of on or our out so
+that the their them there this to up us was we what when where which who will
+with you your
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if token not in STOP_WORDS and len(token) > 1]
+
+
+def event_terms(title, description, category):
+    """Term counts for an event's text"""
+    terms = Counter(tokenize(description))
+    for token in tokenize(title):
+        terms[token] += TITLE_WEIGHT
+    if category:
+        terms[f'category:{category.lower()}'] += TITLE_WEIGHT
+    return terms
+
+
+def _gather(ptr, rows, limit):
+    """Flat positions of the first `limit` entries of the CSR slices ptr[r]:ptr[r + 1]"""
+    starts, ends = ptr[rows], ptr[rows + 1]
+    lengths = np.minimum(ends - starts, limit)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(lengths.sum()), lengths
+
+
+class SimilarityIndex:
+    """Sparse TF-IDF index over event term counts"""
+
+    def __init__(self, documents=(), version=0):
+        self.version = version
+        self.built_at = time.time()
+        self.vocab = {}
+        self.df = np.zeros(0, dtype=np.int64)
+        self.idf = np.zeros(0, dtype=np.float32)
+        self._compact(list(documents))
+
+    def __len__(self):
+        return int(self.live.sum()) + len(self.delta)
+
+    def _term_ids(self, terms, grow=False):
+        ids = []
+        for term in terms:
+            if term not in self.vocab:
+                if not grow:
+                    ids.append(-1)
+                    continue
+                self.vocab[term] = len(self.vocab)
+            ids.append(self.vocab[term])
+        if len(self.vocab) > len(self.df):
+            extra = len(self.vocab) - len(self.df)
+            self.df = np.concatenate([self.df, np.zeros(extra, dtype=np.int64)])
+            self.idf = np.concatenate([self.idf, np.zeros(extra, dtype=np.float32)])
+        return np.array(ids, dtype=np.int64)
+
+    def _weights(self, term_ids, counts):
+        """Sublinear-tf times idf, L2-normalized"""
+        weights = (1 + np.log(counts)) * self.idf[term_ids]
+        norm = np.sqrt(np.dot(weights, weights))
+        return (weights / norm if norm else weights).astype(np.float32)
+
+    def _compact(self, documents):
+        """Rebuild the matrices from (event_id, term counts) pairs"""
+        self.vocab = {}
+        self.df = np.zeros(0, dtype=np.int64)
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.delta = {}
+        self._delta_arrays = None
+
+        event_ids, doc_ptr, doc_terms, doc_counts = [], [0], [], []
+        for event_id, terms in documents:
+            if not terms:
+                continue
+            event_ids.append(event_id)
+            doc_terms.append(np.array([self.vocab.setdefault(term, len(self.vocab)) for term in terms], dtype=np.int64))
+            doc_counts.append(np.fromiter(terms.values(), dtype=np.float32, count=len(terms)))
+            doc_ptr.append(doc_ptr[-1] + len(terms))
+
+        self.event_ids = np.array(event_ids, dtype=np.int64)
+        self.row_of = {event_id: row for row, event_id in enumerate(event_ids)}
+        self.live = np.ones(len(event_ids), dtype=bool)
+        self.doc_ptr = np.array(doc_ptr, dtype=np.int64)
+        self.doc_terms = np.concatenate(doc_terms) if doc_terms else np.zeros(0, dtype=np.int64)
+        self.doc_counts = np.concatenate(doc_counts) if doc_counts else np.zeros(0, dtype=np.float32)
+
+        n_docs = len(event_ids)
+        self.df = np.bincount(self.doc_terms, minlength=len(self.vocab)).astype(np.int64)
+        self.idf = (np.log((1 + n_docs) / (1 + self.df)) + 1).astype(np.float32)
+
+        # Normalized weights per document, then transposed into postings
+        doc_rows = np.repeat(np.arange(n_docs), np.diff(self.doc_ptr))
+        weights = (1 + np.log(self.doc_counts)) * self.idf[self.doc_terms]
+        norms = np.sqrt(np.bincount(doc_rows, weights=weights ** 2, minlength=n_docs))
+        weights = (weights / np.where(norms > 0, norms, 1)[doc_rows]).astype(np.float32)
+
+        # Postings are stored heaviest first so queries can read just their head
+        order = np.lexsort((-weights, self.doc_terms))
+        self.term_ptr = np.concatenate([[0], np.cumsum(np.bincount(self.doc_terms, minlength=len(self.vocab)))])
+        self.term_docs = doc_rows[order].astype(np.int32)
+        self.term_weights = weights[order]
+
+    def _documents(self):
+        """Live (event_id, term counts) pairs, used when compacting"""
+        terms_of = {v: k for k, v in self.vocab.items()}
+        for row in np.flatnonzero(self.live):
+            start, end = self.doc_ptr[row], self.doc_ptr[row + 1]
+            yield int(self.event_ids[row]), Counter({
+                terms_of[t]: int(c) for t, c in zip(self.doc_terms[start:end], self.doc_counts[start:end])
+            })
+        for event_id, (term_ids, counts, _) in self.delta.items():
+            yield event_id, Counter({terms_of[t]: int(c) for t, c in zip(term_ids, counts)})
+
+    def remove(self, event_id):
+        row = self.row_of.pop(event_id, None)
+        if row is not None:
+            self.live[row] = False
+        if self.delta.pop(event_id, None) is not None:
+            self._delta_arrays = None
+
+    def upsert(self, event_id, terms):
+        self.remove(event_id)
+        if not terms:
+            return
+        if len(self.delta) >= DELTA_LIMIT:
+            self._compact(list(self._documents()) + [(event_id, terms)])
+            return
+
+        term_ids = self._term_ids(terms, grow=True)
+        counts = np.fromiter(terms.values(), dtype=np.float32, count=len(terms))
+        # New terms get an idf from the current document frequencies
+        self.df[term_ids] += 1
+        fresh = self.idf[term_ids] == 0
+        self.idf[term_ids[fresh]] = np.log((1 + len(self)) / (1 + self.df[term_ids[fresh]])) + 1
+        self.delta[event_id] = (term_ids, counts, self._weights(term_ids, counts))
+        self._delta_arrays = None
+
+    def _delta_matrix(self):
+        """Delta segment flattened to (event ids, row of each entry, term ids, weights)"""
+        if self._delta_arrays is None:
+            event_ids = np.fromiter(self.delta.keys(), dtype=np.int64, count=len(self.delta))
+            entries = list(self.delta.values())
+            self._delta_arrays = (
+                event_ids,
+                np.repeat(np.arange(len(entries)), [len(terms) for terms, _, _ in entries]),
+                np.concatenate([terms for terms, _, _ in entries]),
+                np.concatenate([weights for _, _, weights in entries]),
+            )
+        return self._delta_arrays
+
+    def query(self, terms, k=5, exclude=None):
+        """Top-k (event_id, cosine similarity) for a term-count vector"""
+        term_ids = self._term_ids(terms)
+        known = term_ids >= 0
+        term_ids = term_ids[known]
+        if not len(term_ids):
+            return []
+        counts = np.fromiter(terms.values(), dtype=np.float32, count=len(terms))[known]
+        query = self._weights(term_ids, counts)
+
+        # Only the strongest query terms matter for the top of the ranking
+        strongest = np.argsort(-query)[:QUERY_TERMS]
+        term_ids, query = term_ids[strongest], query[strongest]
+
+        candidates, scores = [], []
+        in_main = term_ids < len(self.term_ptr) - 1
+        if len(self.event_ids) and in_main.any():
+            positions, lengths = _gather(self.term_ptr, term_ids[in_main], MAX_POSTINGS)
+            docs = self.term_docs[positions]
+            main_scores = np.bincount(
+                docs,
+                weights=self.term_weights[positions] * np.repeat(query[in_main], lengths),
+                minlength=len(self.event_ids)
+            )
+            main_scores[~self.live] = 0
+            top = np.argpartition(-main_scores, min(k, len(main_scores) - 1))[:k + 1]
+            candidates.extend(self.event_ids[top].tolist())
+            scores.extend(main_scores[top].tolist())
+
+        if self.delta:
+            dense = np.zeros(len(self.vocab), dtype=np.float32)
+            dense[term_ids] = query
+            event_ids, rows, doc_terms, weights = self._delta_matrix()
+            delta_scores = np.bincount(rows, weights=dense[doc_terms] * weights, minlength=len(event_ids))
+            candidates.extend(event_ids.tolist())
+            scores.extend(delta_scores.tolist())
+
+        ranked = sorted(zip(scores, candidates), reverse=True)
+        return [(event_id, score) for score, event_id in ranked if score > 0 and event_id != exclude][:k]
+
+
+changes = ChangeLog('similar_events')
+_index = None
+_building = False
+_lock = threading.Lock()
+
+
+def _published_documents():
+    events = Event.objects.filter(status='PUBLISHED').values_list('id', 'title', 'description', 'category')
+    for event_id, title, description, category in events.iterator():
+        yield event_id, event_terms(title, description, category)
+
+
+def _spawn(build):
+    """Run a build on a background thread (tests patch this to run it inline)"""
+    def run():
+        try:
+            build()
+        finally:
+            connections.close_all()
+    threading.Thread(target=run, name='similarity-index', daemon=True).start()
+
+
+def build_index():
+    """Build an index from the database and swap it in; changes made meanwhile are replayed on the next query"""
+    global _index, _building
+    try:
+        index = SimilarityIndex(_published_documents(), version=changes.version())
+        with _lock:
+            _index = index
+    finally:
+        with _lock:
+            _building = False
+
+
+def get_index():
+    """
+    The process-local index, brought up to date with changes made by other
+    workers, or None before the first build has finished
+    """
+    global _building
+    version = changes.version()
+    with _lock:
+        stale = _index is None or time.time() - _index.built_at > REBUILD_SECONDS
+        if _index is not None and version != _index.version:
+            changed = changes.changes(_index.version, version)
+            if changed is None:
+                # Missed changes: keep serving this index until the rebuild replaces it
+                stale = True
+            else:
+                apply_changes(_index, changed)
+                _index.version = version
+        rebuild = stale and not _building
+        if rebuild:
+            _building = True
+    if rebuild:
+        _spawn(build_index)
+    return _index
+
+
+def clear_index():
+    """Drop the process-local index so it is rebuilt on next use (used by tests)"""
+    global _index, _building
+    with _lock:
+        _index = None
+        _building = False
+
+
+def apply_changes(index, event_ids):
+    """Re-read changed events and upsert or drop them"""
+    events = Event.objects.filter(pk__in=event_ids).values_list('id', 'title', 'description', 'category', 'status')
+    published = set()
+    for event_id, title, description, category, status in events:
+        if status == 'PUBLISHED':
+            index.upsert(event_id, event_terms(title, description, category))
+            published.add(event_id)
+    for event_id in set(event_ids) - published:
+        index.remove(event_id)
+
+
+def record_change(event, deleted=False):
+    """Apply a saved or deleted event locally and announce it to other workers"""
+    version = changes.record(event.pk)
+
+    with _lock:
+        # Another worker's change in between means this one will be replayed with it
+        if _index is None or _index.version != version - 1:
+            return
+        if event.status == 'PUBLISHED' and not deleted:
+            _index.upsert(event.pk, event_terms(event.title, event.description, event.category))
+        else:
+            _index.remove(event.pk)
+        _index.version = version
+
+
+def similar_events(event, k=5):
+    """Top-k (event_id, similarity) published events most similar to the given one"""
+    index = get_index()
+    if index is None:
+        return fallback_events(event, k)
+    with _lock:
+        return index.query(event_terms(event.title, event.description, event.category), k=k, exclude=event.pk)
+
+
+def fallback_events(event, k=5):
+    """Upcoming published events of the same category, used until the index is built"""
+    events = Event.objects.filter(
+        status='PUBLISHED', category=event.category, start_date__gte=timezone.now()
+    ).exclude(pk=event.pk).order_by('start_date').values_list('id', flat=True)[:k]
+    return [(event_id, 0.0) for event_id in events]
@@ -0,0 +1,140 @@
+# core/sketches.py
+"""
+HyperLogLog sketches for unique-attendee counts.
+
+Each completed ticket adds its holder to a per-event/per-day sketch and to the
+event's all-time sketch (see `tickets.models.AttendeeSketch`). Unique counts
+for any set of events or date range are the merge (register-wise max) of the
+matching sketches.
+
+Error bound: with precision p there are m = 2**p registers and the relative
+standard error of an estimate is 1.04 / sqrt(m). The default p = 12 uses 4 KiB
+of registers (usually far less once compressed) for a ~1.6% standard error,
+so ~95% of estimates fall within 3.3% of the true count. Counts below ~2.5 m
+use linear counting and are close to exact.
+"""
+import zlib
+from datetime import timezone as dt_timezone
+import numpy as np
+from django.db import transaction
+from tickets.models import AttendeeSketch
+
+DEFAULT_PRECISION = 12
+MIN_PRECISION = 11  # keeps the hash remainder within float64's exact integer range
+MAX_PRECISION = 16
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def _mix64(values):
+    """SplitMix64 finalizer: a fast, deterministic 64-bit hash of integer ids"""
+    z = np.asarray(values, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return (z ^ (z >> np.uint64(31))) & _MASK64
+
+
+def standard_error(precision=DEFAULT_PRECISION):
+    """Relative standard error of a sketch with the given precision"""
+    return 1.04 / np.sqrt(1 << precision)
+
+
+class HyperLogLog:
+    """Mergeable cardinality sketch over integer ids"""
+
+    def __init__(self, precision=DEFAULT_PRECISION, registers=None):
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(f"precision must be between {MIN_PRECISION} and {MAX_PRECISION}")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = registers if registers is not None else np.zeros(self.m, dtype=np.uint8)
+
+    def add_many(self, ids):
+        """Add integer ids; returns True if any register changed"""
+        hashes = _mix64(np.atleast_1d(ids))
+        if not len(hashes):
+            return False
+        suffix_bits = 64 - self.precision
+        index = (hashes >> np.uint64(suffix_bits)).astype(np.int64)
+        suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+        # Rank = position of the leftmost 1-bit in the suffix (suffix_bits + 1 when zero)
+        _, bit_length = np.frexp(suffix.astype(np.float64))
+        rank = (suffix_bits - bit_length + 1).astype(np.uint8)
+
+        before = self.registers.copy()
+        np.maximum.at(self.registers, index, rank)
+        return not np.array_equal(before, self.registers)
+
+    def add(self, value):
+        return self.add_many([value])
+
+    def merge(self, other):
+        """Merge another sketch into this one in place"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    @classmethod
+    def union(cls, sketches, precision=DEFAULT_PRECISION):
+        result = cls(precision)
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
+
+    def count(self):
+        """Estimated number of distinct ids added"""
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # Small-range correction (linear counting); 64-bit hashes need no large-range one
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        return zlib.compress(self.registers.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        registers = np.frombuffer(zlib.decompress(bytes(data)), dtype=np.uint8).copy()
+        return cls(int(np.log2(len(registers))), registers)
+
+
+def record_ticket(ticket):
+    """
+    Add a completed ticket's holder to its event/day and event all-time sketches.
+    Runs once per ticket, after the purchase commits (see tickets.signals).
+    """
+    day = ticket.created_at.astimezone(dt_timezone.utc).date()
+    with transaction.atomic():
+        for sketch_day in (day, AttendeeSketch.ALL_TIME):
+            sketch, _ = AttendeeSketch.objects.select_for_update().get_or_create(
+                event_id=ticket.event_id,
+                day=sketch_day,
+                defaults={'registers': HyperLogLog().to_bytes()}
+            )
+            hll = HyperLogLog.from_bytes(sketch.registers)
+            # Re-adding a holder is a no-op, so only write when a register moves
+            if hll.add(ticket.user_id):
+                sketch.registers = hll.to_bytes()
+                sketch.save(update_fields=['registers', 'updated_at'])
+
+
+def unique_attendees(events_queryset, start=None, end=None):
+    """Estimated unique ticket holders across events, optionally within a purchase date range"""
+    sketches = AttendeeSketch.objects.filter(event__in=events_queryset.order_by().values('id'))
+    if start or end:
+        sketches = sketches.exclude(day=AttendeeSketch.ALL_TIME)
+        if start:
+            sketches = sketches.filter(day__gte=start)
+        if end:
+            sketches = sketches.filter(day__lte=end)
+    else:
+        sketches = sketches.filter(day=AttendeeSketch.ALL_TIME)
+
+    return HyperLogLog.union(
+        HyperLogLog.from_bytes(registers)
+        for registers in sketches.values_list('registers', flat=True).iterator()
+    ).count()
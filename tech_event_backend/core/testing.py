@@ -0,0 +1,58 @@
+# core/testing.py
+"""Test helpers shared by the app test suites"""
+import shutil
+import tempfile
+from django.conf import settings
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Every test client request comes from 127.0.0.1, so rate limits are off
+    unless a test turns them on, and metrics snapshots and profiles go to
+    scratch directories.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._saved = settings.RATE_LIMIT_ENABLED, settings.METRICS_DIR, settings.PROFILING_DIR
+        settings.RATE_LIMIT_ENABLED = False
+        settings.METRICS_DIR = tempfile.mkdtemp(prefix='metrics-')
+        settings.PROFILING_DIR = tempfile.mkdtemp(prefix='profiles-')
+
+    def teardown_test_environment(self, **kwargs):
+        shutil.rmtree(settings.METRICS_DIR, ignore_errors=True)
+        shutil.rmtree(settings.PROFILING_DIR, ignore_errors=True)
+        settings.RATE_LIMIT_ENABLED, settings.METRICS_DIR, settings.PROFILING_DIR = self._saved
+        super().teardown_test_environment(**kwargs)
+
+
+class ConstantQueriesMixin:
+    """TestCase mixin asserting that an endpoint's query count does not grow with its result"""
+
+    def assertConstantQueries(self, fetch, add_row, grow_by=5):
+        """
+        `fetch()` performs the request and `add_row()` adds one row to its result.
+        Returns the query count, which must be the same for 1 and 1 + grow_by rows.
+        """
+        add_row()
+        # Warm up per-process caches (e.g. conditional GET stamps) so only row-dependent queries differ
+        fetch()
+        with CaptureQueriesContext(connection) as small:
+            response = fetch()
+        self.assertLess(response.status_code, 400, getattr(response, 'data', response))
+
+        for _ in range(grow_by):
+            add_row()
+        with CaptureQueriesContext(connection) as large:
+            fetch()
+
+        small_sql = [query['sql'] for query in small.captured_queries]
+        large_sql = [query['sql'] for query in large.captured_queries]
+        self.assertEqual(
+            len(large_sql), len(small_sql),
+            'Query count grows with the result size:\n' + '\n'.join(large_sql[len(small_sql):][:5])
+        )
+        return len(small_sql)
@@ -1,3 +1,1102 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import logging
+import pstats
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+import numpy as np
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from events.models import Event
+from tickets.models import AttendeeSketch, Ticket
+from payments.models import Payment
+from core import analytics, compression, conditional, jsonlog, metrics, profiling, query_stats, quotas, ratelimit, recommendations, tracing
+from core.middleware import CompressionMiddleware
+from core.sketches import HyperLogLog, standard_error, unique_attendees
 
-# Create your tests here.
+User = get_user_model()
+
+
+def create_ticket(event, user, **kwargs):
+    """Create a completed ticket without rendering a QR code image"""
+    defaults = {
+        'price_paid': event.ticket_price,
+        'payment_status': 'COMPLETED',
+        'qr_code': 'tickets/qrcodes/test.png',
+    }
+    defaults.update(kwargs)
+    return Ticket.objects.create(event=event, user=user, **defaults)
+
+
+class AnalyticsEngineTests(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(
+            email='organizer@example.com',
+            username='organizer',
+            password='TestPassword123!',
+            role='ORGANIZER'
+        )
+        self.attendees = [
+            User.objects.create_user(email=f'attendee{i}@example.com', username=f'attendee{i}', password='x')
+            for i in range(3)
+        ]
+        start = timezone.now() + timedelta(days=10)
+        self.conference = Event.objects.create(
+            title='Conference', description='Talks', organizer=self.organizer,
+            location='Lagos', start_date=start, end_date=start + timedelta(hours=5),
+            category='Conference', ticket_price=Decimal('100.00'), status='PUBLISHED'
+        )
+        self.workshop = Event.objects.create(
+            title='Workshop', description='Hands on', organizer=self.organizer,
+            location='Abuja', start_date=start, end_date=start + timedelta(hours=3),
+            category='Workshop', ticket_price=Decimal('50.00'), status='PUBLISHED'
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_ticket(self.conference, self.attendees[0], checked_in=True)
+            create_ticket(self.conference, self.attendees[1], ticket_type='VIP')
+            create_ticket(self.workshop, self.attendees[0])
+            create_ticket(self.workshop, self.attendees[2], payment_status='PENDING')
+
+    def test_organizer_statistics(self):
+        stats = analytics.organizer_statistics(Event.objects.filter(organizer=self.organizer))
+
+        self.assertEqual(stats['overview']['total_events'], 2)
+        self.assertEqual(stats['overview']['active_events'], 2)
+        self.assertEqual(stats['overview']['total_tickets_sold'], 3)
+        self.assertEqual(stats['overview']['total_revenue'], 250.0)
+        self.assertEqual(stats['overview']['total_attendees'], 2)
+        self.assertEqual(stats['overview']['average_attendance_rate'], 25.0)
+        self.assertEqual(stats['recent_activity']['new_registrations_today'], 3)
+        self.assertEqual(
+            [e['title'] for e in stats['top_performing_events']],
+            ['Conference', 'Workshop']
+        )
+
+    def test_organizer_analytics(self):
+        data = analytics.organizer_analytics(Event.objects.filter(organizer=self.organizer), period='1month')
+
+        self.assertEqual(data['overview']['total_revenue'], 250.0)
+        self.assertEqual(data['overview']['total_tickets_sold'], 3)
+        self.assertEqual(data['overview']['ticket_growth'], 100)
+        self.assertEqual(data['revenue']['total_this_month'], 250.0)
+        self.assertEqual(len(data['revenue']['monthly_revenue']), 6)
+        self.assertEqual(data['tickets']['daily_sales'][-1]['tickets'], 3)
+        self.assertEqual(
+            data['events']['category_distribution'][0],
+            {'category': 'Conference', 'count': 2, 'revenue': 200.0}
+        )
+        self.assertEqual(data['tickets']['ticket_types'][0]['type'], 'STANDARD')
+        self.assertEqual(data['tickets']['price_percentiles']['p50'], 100.0)
+
+    def test_empty_queryset(self):
+        stats = analytics.organizer_statistics(Event.objects.none())
+        self.assertEqual(stats['overview']['total_tickets_sold'], 0)
+        self.assertEqual(stats['top_performing_events'], [])
+
+
+class HyperLogLogTests(TestCase):
+    def test_estimate_within_error_bound(self):
+        sketch = HyperLogLog()
+        sketch.add_many(np.arange(100000))
+        error = abs(sketch.count() - 100000) / 100000
+        self.assertLess(error, 3 * standard_error())
+
+    def test_merge_counts_union(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        first.add_many(np.arange(0, 600))
+        second.add_many(np.arange(400, 1000))
+        union = HyperLogLog.union([first, second])
+        self.assertAlmostEqual(union.count(), 1000, delta=1000 * 3 * standard_error())
+
+    def test_round_trip_and_idempotent_add(self):
+        sketch = HyperLogLog()
+        self.assertTrue(sketch.add(42))
+        self.assertFalse(sketch.add(42))
+        restored = HyperLogLog.from_bytes(sketch.to_bytes())
+        self.assertEqual(restored.count(), 1)
+        self.assertLess(len(sketch.to_bytes()), 100)
+
+    def test_sketches_follow_completed_tickets(self):
+        organizer = User.objects.create_user(
+            email='organizer@example.com', username='organizer', password='x', role='ORGANIZER'
+        )
+        attendees = [
+            User.objects.create_user(email=f'attendee{i}@example.com', username=f'attendee{i}', password='x')
+            for i in range(3)
+        ]
+        start = timezone.now() + timedelta(days=5)
+        events = [
+            Event.objects.create(
+                title=f'Event {i}', description='Talks', organizer=organizer, location='Lagos',
+                start_date=start, end_date=start + timedelta(hours=2), category='Meetup', status='PUBLISHED'
+            )
+            for i in range(2)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            create_ticket(events[0], attendees[0])
+            create_ticket(events[0], attendees[1])
+            create_ticket(events[1], attendees[1])
+            pending = create_ticket(events[1], attendees[2], payment_status='PENDING')
+
+        all_events = Event.objects.filter(organizer=organizer)
+        self.assertEqual(unique_attendees(all_events), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pending.payment_status = 'COMPLETED'
+            pending.save()
+        self.assertEqual(AttendeeSketch.objects.filter(event=events[1], day=AttendeeSketch.ALL_TIME).count(), 1)
+        self.assertEqual(unique_attendees(all_events), 3)
+        self.assertEqual(unique_attendees(all_events.filter(pk=events[1].pk)), 2)
+        today = timezone.now().date()
+        self.assertEqual(unique_attendees(all_events, start=today, end=today), 3)
+        self.assertEqual(unique_attendees(all_events, end=today - timedelta(days=1)), 0)
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        organizer = User.objects.create_user(
+            email='organizer@example.com', username='organizer', password='x', role='ORGANIZER'
+        )
+        self.alice, self.bob, self.carol = [
+            User.objects.create_user(email=f'{name}@example.com', username=name, password='x')
+            for name in ('alice', 'bob', 'carol')
+        ]
+        start = timezone.now() + timedelta(days=5)
+
+        def event(title, category):
+            return Event.objects.create(
+                title=title, description='Talks', organizer=organizer, location='Lagos',
+                start_date=start, end_date=start + timedelta(hours=2), category=category, status='PUBLISHED'
+            )
+
+        past_workshop, past_hackathon = event('Past workshop', 'Workshop'), event('Past hackathon', 'Hackathon')
+        Event.objects.filter(pk__in=[past_workshop.pk, past_hackathon.pk]).update(
+            start_date=timezone.now() - timedelta(days=30), end_date=timezone.now() - timedelta(days=29)
+        )
+        self.workshop, self.hackathon, self.meetup = (
+            event('Workshop', 'Workshop'), event('Hackathon', 'Hackathon'), event('Meetup', 'Meetup')
+        )
+
+        create_ticket(past_workshop, self.alice)
+        create_ticket(past_workshop, self.bob)
+        create_ticket(past_hackathon, self.bob)
+        create_ticket(past_hackathon, self.carol)
+        create_ticket(self.hackathon, self.bob)
+
+    def test_scores_follow_affinity_and_co_attendance(self):
+        recommendations.refresh_recommendations()
+
+        # Bob attended workshops and holds a hackathon ticket, so the hackathon
+        # co-attends with workshops and ranks first for Alice
+        self.assertEqual(
+            recommendations.recommend_for_user(self.alice.id),
+            [self.hackathon.id, self.workshop.id, self.meetup.id]
+        )
+        # Events a user already holds tickets for are never recommended
+        self.assertEqual(recommendations.recommend_for_user(self.bob.id), [self.workshop.id, self.meetup.id])
+
+    def test_without_model_falls_back_to_attended_categories(self):
+        # Carol attended a hackathon; the model is not built on the request path
+        self.assertEqual(recommendations.recommend_for_user(self.carol.id), [self.hackathon.id])
+        self.assertIsNone(cache.get(recommendations.MODEL_CACHE_KEY))
+
+    def test_endpoint_recomputes_after_purchase(self):
+        recommendations.refresh_recommendations()
+        client = APIClient()
+        client.force_authenticate(user=self.carol)
+
+        response = client.get('/api/auth/attendee/recommendations/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['recommended_events'][0]['id'], self.hackathon.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_ticket(self.hackathon, self.carol)
+        response = client.get('/api/auth/attendee/recommendations/')
+        self.assertNotIn(self.hackathon.id, [e['id'] for e in response.data['recommended_events']])
+
+
+class FieldsetTests(TestCase):
+    def setUp(self):
+        organizer = User.objects.create_user(
+            email='organizer@example.com', username='organizer', password='x', role='ORGANIZER'
+        )
+        self.attendee = User.objects.create_user(email='attendee@example.com', username='attendee', password='x')
+        start = timezone.now() + timedelta(days=5)
+        event = Event.objects.create(
+            title='Workshop', description='A long description', organizer=organizer, location='Lagos',
+            start_date=start, end_date=start + timedelta(hours=2), category='Workshop', status='PUBLISHED'
+        )
+        for i in range(3):
+            ticket = create_ticket(event, self.attendee)
+            Payment.objects.create(user=self.attendee, ticket=ticket, amount=ticket.price_paid, paystack_reference=f'REF-{i}')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.attendee)
+
+    def get_history(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/payments/history/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data, [query['sql'] for query in queries]
+
+    def test_default_history_nests_three_levels_in_one_query(self):
+        data, queries = self.get_history()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(data[0]['ticket_details']['event_details']['organizer_details']['email'], 'organizer@example.com')
+
+    def test_sparse_fields_narrow_the_query(self):
+        data, queries = self.get_history(fields='id,amount,ticket_details.ticket_number,ticket_details.event_details.title')
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(set(data[0]), {'id', 'amount', 'ticket_details'})
+        self.assertEqual(set(data[0]['ticket_details']), {'ticket_number', 'event_details'})
+        self.assertEqual(data[0]['ticket_details']['event_details'], {'title': 'Workshop'})
+        self.assertNotIn('"description"', queries[0])
+        self.assertNotIn('users_user', queries[0])
+
+    def test_expand_controls_nested_objects(self):
+        data, queries = self.get_history(expand='')
+        self.assertNotIn('ticket_details', data[0])
+        self.assertIn('ticket', data[0])
+        self.assertNotIn('JOIN', queries[0])
+
+        data, queries = self.get_history(expand='ticket_details.event_details')
+        ticket = data[0]['ticket_details']
+        self.assertNotIn('user_details', ticket)
+        self.assertNotIn('organizer_details', ticket['event_details'])
+        self.assertEqual(len(queries), 1)
+
+        # The same parameters apply to the ticket endpoints
+        response = self.client.get('/api/tickets/my_tickets/', {'fields': 'ticket_number,event_details.title'})
+        self.assertEqual(response.data[0], {'ticket_number': response.data[0]['ticket_number'], 'event_details': {'title': 'Workshop'}})
+
+
+class QueryProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        query_stats.reset()
+
+    def test_fingerprints_group_repeated_statements(self):
+        self.assertEqual(
+            query_stats.fingerprint("SELECT * FROM t WHERE id = 42 AND name = 'x''y' AND k IN (%s, %s)"),
+            'SELECT * FROM t WHERE id = ? AND name = ? AND k IN (...)'
+        )
+        profile = query_stats.RequestProfile()
+        with connection.execute_wrapper(profile):
+            for user_id in range(6):
+                list(User.objects.filter(pk=user_id))
+            User.objects.count()
+        self.assertEqual(profile.count, 7)
+        [(shape, count)] = profile.repeated(threshold=5)
+        self.assertEqual(count, 6)
+        self.assertIn('WHERE "users_user"."id" = ?', shape)
+
+    def test_sampled_requests_get_server_timing_and_route_stats(self):
+        client = APIClient()
+        with self.settings(QUERY_PROFILING_SAMPLE_RATE=0):
+            self.assertNotIn('Server-Timing', client.get('/api/events/'))
+
+        with self.settings(QUERY_PROFILING_SAMPLE_RATE=1):
+            response = client.get('/api/events/')
+            client.get('/api/events/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+$')
+
+        query_stats.flush()
+        [row] = query_stats.route_stats()
+        self.assertEqual(row['route'], 'GET /api/events/')
+        self.assertEqual(row['requests'], 2)
+        self.assertGreater(row['avg_queries'], 0)
+
+    def test_route_stats_add_up_worker_snapshots(self):
+        profile = query_stats.RequestProfile()
+        profile.count, profile.seconds = 4, 0.002
+        query_stats.record('GET /api/events/', profile, [])
+        query_stats.flush()
+        # Another worker's snapshot, as its own flush() writes it
+        with open(os.path.join(query_stats.stats_dir(), f'{os.getpid() + 1}.json'), 'w') as f:
+            json.dump({'GET /api/events/': {
+                'requests': 1, 'queries': 10, 'sql_us': 1000, 'n_plus_one': 1, 'suspect': ['SELECT ?', 6]
+            }}, f)
+
+        [row] = query_stats.route_stats()
+        self.assertEqual(row['requests'], 2)
+        self.assertEqual(row['avg_queries'], 7)
+        self.assertEqual(row['n_plus_one_rate'], 0.5)
+        self.assertEqual(row['suspect'], ('SELECT ?', 6))
+
+        query_stats.reset()
+        self.assertEqual(query_stats.route_stats(), [])
+
+
+class RateLimitTests(TestCase):
+    rules = [
+        {'name': 'webhook', 'prefix': '/api/payments/webhook/', 'window': 60, 'limits': {}},
+        {'name': 'api', 'prefix': '/api/', 'window': 60, 'limits': {'anonymous': 2, '*': 3, 'ADMIN': 5}},
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.previous_backend = ratelimit.get_backend()
+        ratelimit.set_backend(ratelimit.MemoryRateLimitBackend())
+
+    def tearDown(self):
+        ratelimit.set_backend(self.previous_backend)
+
+    def test_sliding_window_weights_the_previous_window(self):
+        for second in (50, 55, 58):
+            self.assertTrue(ratelimit.hit('client', 3, 60, now=second).allowed)
+        rejected = ratelimit.hit('client', 3, 60, now=59)
+        self.assertFalse(rejected.allowed)
+        self.assertEqual(rejected.remaining, 0)
+
+        # 15s into the next window, 3 * 45/60 = 2.25 of the old hits still count
+        self.assertFalse(ratelimit.hit('client', 3, 60, now=75).allowed)
+        # ... and by 45s in only 0.75 do
+        decision = ratelimit.hit('client', 3, 60, now=105)
+        self.assertTrue(decision.allowed)
+        self.assertEqual(decision.remaining, 1)
+
+    def test_retry_after_is_when_the_request_would_fit(self):
+        for second in range(3):
+            ratelimit.hit('client', 3, 60, now=60 + second)
+        decision = ratelimit.hit('client', 3, 60, now=90)
+        self.assertFalse(decision.allowed)
+        # Next window starts in 30s, and 1/3 of it must pass before one of three hits slides out
+        self.assertAlmostEqual(decision.retry_after, 50, places=2)
+        self.assertFalse(ratelimit.hit('client', 3, 60, now=90 + decision.retry_after - 0.5).allowed)
+        self.assertTrue(ratelimit.hit('client', 3, 60, now=90 + decision.retry_after + 0.01).allowed)
+
+    def test_middleware_limits_per_role_and_route(self):
+        admin = User.objects.create_user(email='admin@example.com', username='admin', password='x', role='ADMIN')
+        attendee = User.objects.create_user(email='a@example.com', username='a', password='x', role='ATTENDEE')
+
+        def statuses(count, **headers):
+            return [APIClient().get('/api/events/', **headers).status_code for _ in range(count)]
+
+        with self.settings(RATE_LIMIT_ENABLED=True, RATE_LIMIT_RULES=self.rules):
+            self.assertEqual(statuses(3), [200, 200, 429])
+            self.assertEqual(statuses(4, HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(attendee)}'), [200] * 3 + [429])
+            self.assertEqual(statuses(6, HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'), [200] * 5 + [429])
+
+            response = APIClient().get('/api/events/')
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response.json(), {'error': 'Rate limit exceeded. Please try again later.'})
+            self.assertGreaterEqual(int(response['Retry-After']), 1)
+            self.assertEqual(response['X-RateLimit-Limit'], '2')
+            self.assertEqual(response['X-RateLimit-Remaining'], '0')
+
+            # No limit configured for the role: not counted, no headers
+            response = APIClient().post('/api/payments/webhook/', {}, format='json')
+            self.assertNotEqual(response.status_code, 429)
+            self.assertNotIn('X-RateLimit-Limit', response)
+
+    def test_counter_failures_let_requests_through(self):
+        class Unavailable:
+            def hit(self, *args):
+                raise ConnectionError('redis is down')
+
+        ratelimit.set_backend(Unavailable())
+        with self.settings(RATE_LIMIT_ENABLED=True, RATE_LIMIT_RULES=self.rules):
+            with self.assertLogs('core.ratelimit', 'WARNING'):
+                statuses = [APIClient().get('/api/events/').status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 200])
+
+    def test_token_buckets_refill_over_the_window(self):
+        buckets = ratelimit.TokenBucketBackend()
+        self.assertEqual([buckets.hit('client', 3, 60_000, 0)[0] for _ in range(4)], [True, True, True, False])
+        self.assertEqual(buckets.hit('client', 3, 60_000, 0), (False, 0, 20_000))
+        self.assertTrue(buckets.hit('client', 3, 60_000, 20_000)[0])
+        self.assertFalse(buckets.hit('client', 3, 60_000, 20_000)[0])
+
+
+class RateLimitFallbackTests(TestCase):
+    class Primary:
+        def __init__(self):
+            self.calls, self.added, self.error, self.delay = 0, [], None, 0
+
+        def hit(self, key, limit, window_ms, now_ms, cost=1):
+            self.calls += 1
+            time.sleep(self.delay)
+            if self.error:
+                raise self.error
+            return True, limit - 1, 0
+
+        def add_counts(self, counts):
+            self.added.append(counts)
+
+    def setUp(self):
+        self.primary = self.Primary()
+        self.breaker = ratelimit.CircuitBreaker(failures=2, slow_seconds=0.01, reset_seconds=60)
+        self.backend = ratelimit.FallbackRateLimitBackend(self.primary, self.breaker)
+
+    def hit(self, limit=3):
+        return self.backend.hit('client', limit, 60_000, int(time.time() * 1000))[0]
+
+    def test_failures_open_the_circuit_and_local_limits_apply(self):
+        self.primary.error = ConnectionError('redis is down')
+        with self.assertLogs('core.ratelimit', 'WARNING'):
+            results = [self.hit() for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+        self.assertTrue(self.breaker.is_open)
+        # Once open, Redis is not called at all
+        self.assertEqual(self.primary.calls, 2)
+
+        # A successful probe closes the circuit and syncs the hits counted locally
+        self.primary.error = None
+        self.breaker.opened_at -= 60
+        self.assertTrue(self.hit())
+        self.assertFalse(self.breaker.is_open)
+        [added] = self.primary.added
+        self.assertEqual(list(added.values()), [3])
+        [(key, window_ms, _)] = added
+        self.assertEqual((key, window_ms), ('client', 60_000))
+
+    def test_slow_calls_open_the_circuit(self):
+        self.primary.delay = 0.02
+        with self.assertLogs('core.ratelimit', 'WARNING'):
+            self.hit()
+            self.hit()
+        self.assertTrue(self.breaker.is_open)
+        self.hit()
+        self.assertEqual(self.primary.calls, 2)
+
+        # A probe that is still slow keeps it open
+        self.breaker.opened_at -= 60
+        self.hit()
+        self.assertTrue(self.breaker.is_open)
+        self.assertEqual(self.primary.calls, 3)
+
+
+@api_view(['GET'])
+@quotas.quota(cost=4)
+def expensive_view(request):
+    return Response({})
+
+
+@api_view(['GET'])
+@quotas.quota()
+def cheap_view(request):
+    return Response({})
+
+
+class QuotaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.previous_backend = ratelimit.get_backend()
+        ratelimit.set_backend(ratelimit.MemoryRateLimitBackend())
+        self.user = User.objects.create_user(email='o@example.com', username='o', password='x', role='ORGANIZER')
+
+    def tearDown(self):
+        ratelimit.set_backend(self.previous_backend)
+
+    def call(self, view):
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, self.user)
+        return view(request)
+
+    def test_expensive_calls_are_refused_before_cheap_ones(self):
+        with self.settings(RATE_LIMIT_ENABLED=True, QUOTA_BUDGETS={'*': 10}):
+            self.assertEqual([self.call(expensive_view).status_code for _ in range(3)], [200, 200, 429])
+            response = self.call(expensive_view)
+            self.assertEqual(response['X-Quota-Cost'], '4')
+            self.assertEqual(response['X-Quota-Remaining'], '2')
+            self.assertGreaterEqual(int(response['Retry-After']), 1)
+            # What is left still covers cheap calls
+            self.assertEqual([self.call(cheap_view).status_code for _ in range(3)], [200, 200, 429])
+
+    def test_measured_cost_follows_recent_latency(self):
+        endpoint = 'users.api.views.organizer_analytics'
+        quotas._latency.pop(endpoint, None)
+        self.assertEqual(quotas.measured_cost(endpoint, 1, 50), 1)
+        quotas.record_latency(endpoint, 400)
+        quotas.record_latency(endpoint, 900)
+        with self.settings(QUOTA_MS_PER_UNIT=50):
+            # 400 + 0.2 * (900 - 400) = 500ms
+            self.assertEqual(quotas.measured_cost(endpoint, 1, 50), 10)
+            self.assertEqual(quotas.measured_cost(endpoint, 1, 4), 4)
+
+            client = APIClient()
+            client.force_authenticate(self.user)
+            with self.settings(RATE_LIMIT_ENABLED=True, QUOTA_BUDGETS={'*': 25}):
+                statuses = [client.get('/api/auth/organizer/analytics/').status_code for _ in range(3)]
+        self.assertEqual(statuses[:2], [200, 200])
+        self.assertEqual(statuses[2], 429)
+
+    def test_slow_endpoint_stays_affordable_and_recovers(self):
+        endpoint = 'users.api.views.organizer_analytics'
+        quotas._latency.pop(endpoint, None)
+        quotas.record_latency(endpoint, 1500, now=0)
+        with self.settings(QUOTA_MS_PER_UNIT=50):
+            self.assertEqual(quotas.measured_cost(endpoint, 1, 50, now=0), 30)
+            # Without new samples the average decays, e.g. while calls are refused
+            self.assertEqual(quotas.measured_cost(endpoint, 1, 50, now=2 * quotas.LATENCY_HALF_LIFE), 8)
+        # A cost above the budget is capped, so the anonymous budget of 20 still allows calls
+        self.assertEqual(quotas.affordable(30, 20), 10)
+        self.assertEqual(quotas.affordable(3, 20), 3)
+        self.assertEqual(quotas.affordable(5, 1), 1)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings_override = self.settings(METRICS_DIR=self.directory, METRICS_TOKEN='scrape-token')
+        self.settings_override.enable()
+        metrics.reset()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        for filename in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, filename))
+        os.rmdir(self.directory)
+
+    def scrape(self, **headers):
+        return APIClient().get('/metrics', **headers)
+
+    def test_requests_are_recorded_per_route_template(self):
+        organizer = User.objects.create_user(email='m@example.com', username='m', password='x', role='ORGANIZER')
+        start = timezone.now() + timedelta(days=1)
+        event = Event.objects.create(
+            title='Metrics', description='Talks', organizer=organizer, location='Lagos',
+            start_date=start, end_date=start + timedelta(hours=2), category='Meetup', status='PUBLISHED'
+        )
+        client = APIClient()
+        client.get(f'/api/events/{event.pk}/')
+        client.get('/api/events/0/')
+        client.get('/api/events/categories/')
+        client.get('/api/events/categories/')
+
+        body = self.scrape(HTTP_AUTHORIZATION='Bearer scrape-token').content.decode()
+        self.assertIn('http_requests_total{method="GET",route="/api/events/<pk>/",status="200"} 1\n', body)
+        self.assertIn('http_requests_total{method="GET",route="/api/events/<pk>/",status="404"} 1\n', body)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="/api/events/<pk>/",le="+Inf"} 2\n', body)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="/api/events/<pk>/"} 2\n', body)
+        self.assertIn('http_request_db_seconds_count{method="GET",route="/api/events/categories/"} 2\n', body)
+        self.assertIn('cache_lookups_total{cache="categories",result="hit"} 1\n', body)
+        self.assertIn('cache_lookups_total{cache="categories",result="miss"} 1\n', body)
+
+    def test_middleware_share_one_sql_timer_per_request(self):
+        request = RequestFactory().get('/')
+        with metrics.request_sql_timer(request) as outer:
+            with metrics.request_sql_timer(request) as inner:
+                self.assertIs(inner, outer)
+                self.assertEqual(connection.execute_wrappers.count(outer), 1)
+                User.objects.count()
+        self.assertEqual(outer.count, 1)
+        self.assertNotIn(outer, connection.execute_wrappers)
+
+    def test_snapshots_of_all_workers_are_added_up(self):
+        metrics.REQUESTS.inc(method='GET', route='/x/', status='200')
+        metrics.IN_FLIGHT.set(1)
+        metrics.EXTERNAL_SECONDS.observe(0.5, service='paystack', operation='verify')
+        metrics.flush()
+        # A live worker (the parent process) and one that has exited
+        for pid in (os.getppid(), 2 ** 22 + 1):
+            with open(os.path.join(self.directory, f'{pid}.json'), 'w') as f:
+                json.dump([
+                    ['http_requests_total', ['GET', '/x/', '200'], 2],
+                    ['http_requests_in_flight', [], 3],
+                    ['external_call_duration_seconds', ['paystack', 'verify'], [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 2.0, 1]],
+                ], f)
+
+        totals = metrics.collect()
+        self.assertEqual(totals[('http_requests_total', ('GET', '/x/', '200'))], 5)
+        self.assertEqual(totals[('http_requests_in_flight', ())], 4)
+        body = metrics.render()
+        self.assertIn('external_call_duration_seconds_bucket{service="paystack",operation="verify",le="0.5"} 1\n', body)
+        self.assertIn('external_call_duration_seconds_bucket{service="paystack",operation="verify",le="+Inf"} 3\n', body)
+        self.assertIn('external_call_duration_seconds_sum{service="paystack",operation="verify"} 4.5\n', body)
+
+    def test_exited_workers_keep_their_counters(self):
+        def write(filename, requests, in_flight):
+            with open(os.path.join(self.directory, filename), 'w') as f:
+                json.dump([
+                    ['http_requests_total', ['GET', '/x/', '200'], requests],
+                    ['http_requests_in_flight', [], in_flight],
+                ], f)
+
+        # An exited worker, and an older file of a pid that a live worker now uses
+        write(f'{2 ** 22 + 1}-1.json', 2, 5)
+        write(f'{os.getppid()}-1.json', 3, 7)
+        write(f'{os.getppid()}-2.json', 1, 1)
+        requests = ('http_requests_total', ('GET', '/x/', '200'))
+        totals = metrics.collect()
+        self.assertEqual(totals[requests], 6)
+        self.assertEqual(totals[('http_requests_in_flight', ())], 1)
+        self.assertEqual(
+            sorted(f for f in os.listdir(self.directory) if f.endswith('.json')),
+            [f'{os.getppid()}-2.json', metrics.RETIRED_FILE]
+        )
+
+        # Folded once: later scrapes keep the same totals
+        self.assertEqual(metrics.collect()[requests], 6)
+        write(f'{2 ** 22 + 2}-1.json', 4, 0)
+        self.assertEqual(metrics.collect()[requests], 10)
+
+    def test_metrics_endpoint_requires_staff_or_token(self):
+        self.assertEqual(self.scrape().status_code, 403)
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        response = self.scrape(HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+        staff = User.objects.create_user(email='s@example.com', username='s', password='x', is_staff=True)
+        client = APIClient()
+        client.force_login(staff)
+        self.assertEqual(client.get('/metrics').status_code, 200)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        profiling.clear()
+        profiling._window[:] = [0, 0]
+        self.staff = User.objects.create_user(email='s@example.com', username='s', password='x', role='ADMIN')
+        self.attendee = User.objects.create_user(email='a@example.com', username='a', password='x')
+
+    def get(self, user, path='/api/events/', **headers):
+        return APIClient().get(path, HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}', **headers)
+
+    def test_staff_header_profiles_the_request(self):
+        response = self.get(self.staff, HTTP_X_PROFILE='1')
+        profile_id = response['X-Profile-Id']
+        self.assertNotIn('X-Profile-Id', self.get(self.attendee, HTTP_X_PROFILE='1'))
+        self.assertNotIn('X-Profile-Id', self.get(self.staff))
+
+        [meta] = self.get(self.staff, '/api/diagnostics/profiles/').json()
+        self.assertEqual((meta['id'], meta['route'], meta['trigger']), (profile_id, 'GET /api/events/', 'header'))
+
+        detail = self.get(self.staff, f'/api/diagnostics/profiles/{profile_id}/?sort=tottime&limit=5').json()
+        self.assertEqual(len(detail['functions']), 5)
+        self.assertGreaterEqual(detail['functions'][0]['tottime_ms'], detail['functions'][-1]['tottime_ms'])
+
+        download = self.get(self.staff, f'/api/diagnostics/profiles/{profile_id}/download/')
+        with tempfile.NamedTemporaryFile(suffix='.prof') as f:
+            f.write(download.content)
+            f.flush()
+            self.assertGreater(pstats.Stats(f.name).total_calls, 0)
+
+        self.assertEqual(self.get(self.attendee, '/api/diagnostics/profiles/').status_code, 403)
+        self.assertEqual(self.get(self.staff, '/api/diagnostics/profiles/missing/').status_code, 404)
+
+    def test_overhead_and_storage_are_capped(self):
+        with self.settings(PROFILING_MAX_PER_MINUTE=3, PROFILING_MAX_STORED=2, PROFILING_MAX_BYTES=1):
+            ids = [self.get(self.staff, HTTP_X_PROFILE='1').get('X-Profile-Id') for _ in range(4)]
+        self.assertEqual(ids[3], None)
+        stored = [meta['id'] for meta in profiling.recent()]
+        self.assertEqual(stored, [ids[2], ids[1]])
+
+        meta, raw = profiling.load(ids[2])
+        self.assertTrue(meta['trimmed'])
+        self.assertLessEqual(len(profiling.top_functions(raw, limit=10 ** 6)), profiling.TRIMMED_FUNCTIONS)
+
+    def test_sampled_requests_are_profiled_without_exposing_the_id(self):
+        with self.settings(PROFILING_SAMPLE_RATE=1):
+            response = APIClient().get('/api/events/')
+        self.assertNotIn('X-Profile-Id', response)
+        [meta] = profiling.recent()
+        self.assertEqual(meta['trigger'], 'sample')
+
+
+class TracingTests(TestCase):
+    def setUp(self):
+        self.export_path = os.path.join(tempfile.mkdtemp(), 'traces.jsonl')
+        self.exporter = tracing.Exporter(self.export_path)
+        tracing.set_exporter(self.exporter)
+        self.settings_override = self.settings(TRACING_EXPORT_PATH=self.export_path)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        tracing.set_exporter(None)
+        if os.path.exists(self.export_path):
+            os.remove(self.export_path)
+        os.rmdir(os.path.dirname(self.export_path))
+
+    def exported(self):
+        self.exporter.flush()
+        with open(self.export_path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_every_response_carries_a_trace_id(self):
+        response = APIClient().get('/api/events/')
+        self.assertRegex(response['X-Trace-Id'], r'^[0-9a-f]{32}$')
+        trace_id = '4bf92f3577b34da6a3ce929d0e0e4736'
+        response = APIClient().get('/api/events/', HTTP_TRACEPARENT=f'00-{trace_id}-00f067aa0ba902b7-00')
+        self.assertEqual(response['X-Trace-Id'], trace_id)
+        # Neither request was sampled
+        self.assertFalse(os.path.exists(self.export_path))
+
+    def test_sampled_flag_is_only_honoured_when_trusted(self):
+        traceparent = '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01'
+        response = APIClient().get('/api/events/', HTTP_TRACEPARENT=traceparent)
+        self.assertEqual(response['X-Trace-Id'], '4bf92f3577b34da6a3ce929d0e0e4736')
+        self.assertFalse(os.path.exists(self.export_path))
+
+        with self.settings(TRACING_TRUST_TRACEPARENT=True):
+            APIClient().get('/api/events/', HTTP_TRACEPARENT=traceparent)
+        [trace] = self.exported()
+        self.assertEqual(trace['parent_id'], '00f067aa0ba902b7')
+
+    def test_sampled_requests_export_their_spans(self):
+        with self.settings(TRACING_SAMPLE_RATE=1):
+            response = APIClient().get('/api/events/')
+        [trace] = self.exported()
+        self.assertEqual(trace['trace_id'], response['X-Trace-Id'])
+        self.assertEqual(trace['name'], 'GET /api/events/')
+        self.assertEqual(trace['attributes']['status'], 200)
+        queries = [s for s in trace['spans'] if s['name'] == 'db.query']
+        self.assertTrue(queries)
+        self.assertIn('SELECT', queries[0]['attributes']['sql'])
+
+    def test_spans_nest_and_cover_templates_and_outbound_calls(self):
+        import requests
+        from django.template.loader import render_to_string
+
+        class Adapter(requests.adapters.BaseAdapter):
+            def send(self, request, **kwargs):
+                response = requests.Response()
+                response.status_code = 201
+                return response
+
+        session = requests.Session()
+        session.mount('https://collector.test/', Adapter())
+        tracing.instrument()
+        with self.settings(TRACING_TRUST_TRACEPARENT=True), \
+                tracing.request_trace('job', '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01') as (_, trace):
+            with tracing.span('outer') as outer:
+                render_to_string('emails/password_reset.html', {'user': None, 'reset_link': 'x'})
+                session.get('https://collector.test/path?secret=1')
+            with self.assertRaises(ValueError), tracing.span('failing'):
+                raise ValueError('boom')
+
+        [exported] = self.exported()
+        self.assertEqual(exported['parent_id'], '00f067aa0ba902b7')
+        spans = {s['name']: s for s in exported['spans']}
+        self.assertIsNone(spans['outer']['parent'])
+        self.assertEqual(spans['template.render']['parent'], outer['id'])
+        self.assertEqual(spans['template.render']['attributes']['template'], 'emails/password_reset.html')
+        self.assertEqual(spans['http.client']['attributes'], {
+            'method': 'GET', 'url': 'https://collector.test/path', 'status': 201
+        })
+        self.assertEqual(spans['failing']['error'], 'ValueError: boom')
+
+    def test_log_records_carry_the_trace_id(self):
+        record = logging.LogRecord('x', logging.INFO, __file__, 1, 'message', None, None)
+        tracing.TraceIdFilter().filter(record)
+        self.assertEqual(record.trace_id, '-')
+        with tracing.request_trace('job') as (trace_id, _):
+            tracing.TraceIdFilter().filter(record)
+        self.assertEqual(record.trace_id, trace_id)
+
+
+class StructuredLoggingTests(TestCase):
+    def record(self, msg='message', args=None, lineno=1, **extra):
+        record = logging.LogRecord('core.test', logging.INFO, __file__, lineno, msg, args, None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_records_are_formatted_as_json_with_extras(self):
+        record = self.record('%s %s', ('GET', '/api/events/'), status=200, trace_id='abc')
+        entry = json.loads(jsonlog.JsonFormatter().format(record))
+        self.assertEqual(entry['message'], 'GET /api/events/')
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['logger'], 'core.test')
+        self.assertEqual(entry['status'], 200)
+        self.assertEqual(entry['trace_id'], 'abc')
+        self.assertNotIn('args', entry)
+
+    def test_call_sites_are_rate_limited_with_a_suppressed_count(self):
+        limiter = jsonlog.RateLimitFilter(per_minute=2)
+        passed = [limiter.filter(self.record()) for _ in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        # Another call site has its own allowance
+        self.assertTrue(limiter.filter(self.record(lineno=2)))
+        # The first record of the next minute reports what was dropped
+        limiter._sites[('core.test', __file__, 1)][0] -= 1
+        record = self.record()
+        self.assertTrue(limiter.filter(record))
+        self.assertEqual(record.suppressed, 3)
+
+    def test_async_handler_writes_from_a_background_thread(self):
+        stream = io.StringIO()
+        handler = jsonlog.AsyncJsonHandler(stream=stream)
+        try:
+            args = {'id': 1}
+            handler.handle(self.record('ticket %(id)s', (args,)))
+            args['id'] = 2  # already resolved when queued
+            handler.flush()
+        finally:
+            handler.close()
+        [entry] = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(entry['message'], 'ticket 1')
+
+    def test_full_queue_drops_and_counts_records(self):
+        stream = io.StringIO()
+        handler = jsonlog.AsyncJsonHandler(stream=stream, queue_size=1)
+        handler.listener.stop()  # nothing drains the queue
+        for _ in range(3):
+            handler.handle(self.record())
+        self.assertEqual(handler.dropped, 2)
+        handler.listener.start()
+        handler.handle(self.record('after'))
+        handler.flush()
+        handler.close()
+        entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(entries[-1]['message'], 'after')
+        self.assertEqual(entries[-1]['dropped'], 2)
+
+    def test_requests_are_logged_with_route_status_and_timings(self):
+        with self.assertLogs('core.middleware', level='INFO') as logs:
+            APIClient().get('/api/events/')
+        [record] = [r for r in logs.records if getattr(r, 'route', None)]
+        self.assertEqual(record.getMessage(), 'GET /api/events/ 200')
+        self.assertEqual(record.status, 200)
+        self.assertIsNone(record.user_id)
+        self.assertGreaterEqual(record.db_queries, 1)
+        self.assertGreaterEqual(record.duration_ms, record.db_ms)
+
+
+class FastJSONTests(TestCase):
+    def test_renderer_matches_drf_json_renderer(self):
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+        from core.renderers import FastJSONRenderer
+        data = {
+            'price': Decimal('1500.50'),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'utc': timezone.now(),
+            'naive': datetime(2024, 5, 1, 9, 30),
+            'date': date(2024, 5, 1),
+            'duration': timedelta(hours=1),
+            'label': gettext_lazy('Events'),
+            'counts': np.arange(3),
+            'mean': np.float64(2.5),
+            1: 'int key',
+            'text': 'caf\u00e9 \u2028 \u2029',
+            'nested': [{'a': None, 'b': True}],
+        }
+        expected = JSONRenderer().render(data)
+        self.assertEqual(FastJSONRenderer().render(data), expected)
+        self.assertIn(b'Z"', expected)
+        self.assertIn(b'\\u2028', expected)
+        # Indented output and out-of-range integers fall back to the stdlib encoder
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=4'),
+            JSONRenderer().render(data, 'application/json; indent=4')
+        )
+        self.assertEqual(FastJSONRenderer().render({'big': 2 ** 70}), b'{"big":1180591620717411303424}')
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_non_finite_floats_fail_like_drf(self):
+        from rest_framework.renderers import JSONRenderer
+        from core.renderers import FastJSONRenderer
+        for value in (float('nan'), float('inf'), np.array([1.0, -np.inf]), Decimal('NaN')):
+            data = {'stats': [{'mean': value, 'note': None}]}
+            with self.assertRaises(ValueError):
+                JSONRenderer().render(data)
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render(data)
+        # Exponents are formatted differently, but the values are the same
+        self.assertEqual(json.loads(FastJSONRenderer().render({'n': 1e16})), {'n': 1e16})
+
+    def test_parser_rejects_invalid_and_non_finite_json(self):
+        from rest_framework.exceptions import ParseError
+        from core.parsers import FastJSONParser
+        parser = FastJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"name": "café", "n": 1.5}'.encode())), {'name': 'café', 'n': 1.5})
+        # Integers beyond 64 bits stay exact
+        self.assertEqual(parser.parse(io.BytesIO(b'{"n": -123456789012345678901}')), {'n': -123456789012345678901})
+        for body in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                parser.parse(io.BytesIO(body))
+
+    def test_api_uses_fast_json(self):
+        user = User.objects.create_user(email='json@example.com', username='json', password='x')
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.patch('/api/auth/profile/', {'first_name': 'Ada'}, format='json')
+        self.assertEqual(type(response.accepted_renderer).__name__, 'FastJSONRenderer')
+        self.assertEqual(json.loads(response.content)['first_name'], 'Ada')
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        # Keep the results the same whether or not brotli is installed
+        patcher = mock.patch.object(compression, 'brotli', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def compress(self, response, accept='gzip'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_encoding_is_negotiated_with_q_values(self):
+        self.assertEqual(compression.negotiate('gzip, deflate'), 'gzip')
+        self.assertEqual(compression.negotiate('deflate, *;q=0.5'), 'gzip')
+        self.assertIsNone(compression.negotiate('gzip;q=0, identity'))
+        self.assertIsNone(compression.negotiate(''))
+        with mock.patch.object(compression, 'brotli', object()):
+            self.assertEqual(compression.negotiate('gzip, br'), 'br')
+            self.assertEqual(compression.negotiate('gzip, br;q=0.5'), 'gzip')
+
+    def test_large_json_responses_are_compressed(self):
+        organizer = User.objects.create_user(email='gzip@example.com', username='gzip', password='x', role='ORGANIZER')
+        start = timezone.now() + timedelta(days=3)
+        event = Event.objects.create(
+            title='Compression Summit', description='Talks ' * 300, organizer=organizer,
+            location='Lagos', start_date=start, end_date=start + timedelta(hours=4),
+            category='Conference', ticket_price=Decimal('100.00'), status='PUBLISHED'
+        )
+        plain = APIClient().get(f'/api/events/{event.pk}/')
+        response = APIClient().get(f'/api/events/{event.pk}/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertLess(int(response['Content-Length']), len(plain.content))
+        self.assertEqual(json.loads(gzip.decompress(response.content)), json.loads(plain.content))
+        self.assertFalse(plain.has_header('Content-Encoding'))
+
+    def test_small_binary_and_encoded_responses_are_left_alone(self):
+        small = HttpResponse(b'{}', content_type='application/json')
+        image = HttpResponse(b'\x89PNG' * 1000, content_type='image/png')
+        encoded = HttpResponse(b'x' * 5000, content_type='text/plain')
+        encoded['Content-Encoding'] = 'br'
+        for response in (small, image, encoded):
+            self.assertEqual(self.compress(response).get('Content-Encoding'), response.get('Content-Encoding'))
+        self.assertEqual(image.content, b'\x89PNG' * 1000)
+
+    def test_streaming_responses_are_compressed_as_they_stream(self):
+        rows = [f'{i},ticket-{i}\n'.encode() for i in range(2000)]
+        response = self.compress(StreamingHttpResponse(iter(rows), content_type='text/csv'), accept='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(rows))
+        self.assertIn(('http_response_bytes_total', ('gzip', 'original')), metrics._values)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(
+            email='etag-organizer@example.com', username='etag-organizer', password='x', role='ORGANIZER'
+        )
+        self.attendee = User.objects.create_user(email='etag@example.com', username='etag', password='x')
+        start = timezone.now() + timedelta(days=5)
+        self.event = Event.objects.create(
+            title='Conference', description='Talks', organizer=self.organizer,
+            location='Lagos', start_date=start, end_date=start + timedelta(hours=5),
+            category='Conference', ticket_price=Decimal('100.00'), status='PUBLISHED'
+        )
+        self.ticket = create_ticket(self.event, self.attendee)
+
+    def client_for(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+    def revalidate(self, client, url, response):
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_event_detail_is_revalidated_until_the_event_or_organizer_changes(self):
+        client = self.client_for()
+        url = f'/api/events/{self.event.pk}/'
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = self.revalidate(client, url, response)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+        # Only the event lookup itself; no serializer queries
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+        # Signups, logins and password changes do not show in the response
+        User.objects.create_user(email='new@example.com', username='new', password='x')
+        self.organizer.last_login = timezone.now()
+        self.organizer.save(update_fields=['last_login'])
+        self.organizer.set_password('y')
+        self.organizer.save()
+        self.assertEqual(self.revalidate(client, url, response).status_code, 304)
+
+        self.organizer.first_name = 'Ada'
+        self.organizer.save()
+        changed = self.revalidate(client, url, response)
+        self.assertEqual(changed.status_code, 200)
+        self.event.title = 'Conference 2'
+        self.event.save()
+        self.assertEqual(self.revalidate(client, url, changed).status_code, 200)
+
+    def test_stamps_are_shared_through_the_database(self):
+        conditional.touch('events')
+        [touched] = conditional.stamps('events')
+        # Another worker's cache does not have the stamp, and reads the same row
+        cache.clear()
+        self.assertEqual(conditional.stamps('events'), [touched])
+        with self.assertNumQueries(0):
+            conditional.stamps('events')
+
+    def test_event_list_changes_with_its_events(self):
+        client = self.client_for()
+        response = client.get('/api/events/')
+        self.assertEqual(self.revalidate(client, '/api/events/', response).status_code, 304)
+        # The query string is part of the validator
+        self.assertEqual(client.get('/api/events/?page=1', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+        self.event.delete()
+        deleted = self.revalidate(client, '/api/events/', response)
+        self.assertEqual(deleted.status_code, 200)
+        self.assertEqual(deleted.data['count'], 0)
+        # Listings differ per user, so their validators do too
+        self.assertEqual(self.revalidate(self.client_for(self.attendee), '/api/events/', deleted).status_code, 200)
+
+    def test_my_tickets_304_skips_serialization(self):
+        client = self.client_for(self.attendee)
+        url = '/api/tickets/my_tickets/'
+        response = client.get(url)
+        self.assertEqual(len(response.data), 1)
+        self.assertIn('private', response['Cache-Control'])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.revalidate(client, url, response).status_code, 304)
+        self.assertEqual(len(queries), 1)
+
+        self.ticket.checked_in = True
+        self.ticket.save()
+        self.assertEqual(self.revalidate(client, url, response).status_code, 200)
+
+    def test_dashboards_answer_304_before_running(self):
+        attendee = self.client_for(self.attendee)
+        url = '/api/auth/attendee/dashboard-summary/'
+        response = attendee.get(url)
+        self.assertEqual(response.data['next_event']['title'], 'Conference')
+        # Parts of the summary move with the clock, so only the ETag validates it
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(self.revalidate(attendee, url, response).status_code, 304)
+
+        organizer = self.client_for(self.organizer)
+        url = '/api/auth/organizer/dashboard-summary/'
+        response = organizer.get(url)
+        self.assertEqual(response.data['recent_events'][0]['tickets_sold'], 1)
+        self.assertEqual(self.revalidate(organizer, url, response).status_code, 304)
+        create_ticket(self.event, self.organizer)
+        self.assertEqual(self.revalidate(organizer, url, response).status_code, 200)
+
+        forbidden = attendee.get(url)
+        self.assertEqual(forbidden.status_code, 403)
+        self.assertFalse(forbidden.has_header('ETag'))
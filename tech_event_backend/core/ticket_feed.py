@@ -0,0 +1,57 @@
+# core/ticket_feed.py
+"""
+Per-user iCalendar feeds of ticketed events.
+
+Calendar apps poll feeds every few minutes, so a poll should rarely cost more
+than a lookup. The feed's validator is one aggregate over the user's tickets:
+their count, their latest `updated_at`, and the latest `updated_at` of the
+events behind completed tickets. Any purchase, refund or event edit moves it.
+The validator is the ETag (its maximum timestamp is the Last-Modified), so
+unchanged feeds are answered with 304, and it keys the cached body, so changed
+feeds are rendered once per change.
+"""
+import hashlib
+from datetime import timedelta
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from events.models import Event
+from tickets.models import Ticket
+from core import ical, metrics
+
+FEED_TIMEOUT = 60 * 60 * 24
+# Past events stay in the feed this long after they end
+HISTORY_DAYS = 90
+
+
+def feed_state(user_id):
+    """(etag, last_modified) of a user's feed; last_modified is None without tickets"""
+    state = Ticket.objects.filter(user_id=user_id).aggregate(
+        count=Count('id'),
+        tickets_changed=Max('updated_at'),
+        events_changed=Max('event__updated_at', filter=Q(payment_status='COMPLETED')),
+    )
+    changes = [value for value in (state['tickets_changed'], state['events_changed']) if value]
+    digest = hashlib.md5(repr((user_id, sorted(state.items()))).encode()).hexdigest()
+    return digest, max(changes) if changes else None
+
+
+def feed_events(user_id, now=None):
+    """Events the user holds completed tickets for, recent and upcoming"""
+    now = now or timezone.now()
+    return Event.objects.filter(
+        tickets__user_id=user_id,
+        tickets__payment_status='COMPLETED',
+        status__in=['PUBLISHED', 'COMPLETED', 'CANCELLED'],
+        end_date__gt=now - timedelta(days=HISTORY_DAYS),
+    ).distinct().order_by('start_date')
+
+
+def render_feed(user, digest, stamp):
+    """The user's feed body, cached under its validator"""
+    key = f'calendar:feed:{user.id}:{digest}'
+    body = metrics.record_cache('ticket_feed', cache.get(key))
+    if body is None:
+        body = ical.build_calendar(feed_events(user.id), f'{user.get_full_name() or user.username} - Tickets', stamp)
+        cache.set(key, body, FEED_TIMEOUT)
+    return body
@@ -0,0 +1,281 @@
+# core/tracing.py
+"""
+In-process request tracing.
+
+Every request gets a trace id: taken from an incoming W3C `traceparent`
+header or generated, returned in `X-Trace-Id`, and attached to log records
+as `trace_id` by `TraceIdFilter`. A sample of requests (`TRACING_SAMPLE_RATE`,
+or, with `TRACING_TRUST_TRACEPARENT` behind a gateway that sets the header,
+any request whose `traceparent` is flagged as sampled) also records spans:
+
+* `db.query` for each SQL statement, through `connection.execute_wrapper`;
+* `http.client` for outbound `requests` calls (Paystack, profile pictures,
+  OAuth providers), by wrapping `requests.Session.send`;
+* `template.render` for Django templates;
+* whatever code opens with `span()` or `@traced()` (ticket image generation,
+  SendGrid).
+
+Outside a sampled request `span()` costs one context variable lookup.
+Finished traces are handed to a background thread that appends them as JSON
+lines to `TRACING_EXPORT_PATH` and/or posts batches to
+`TRACING_COLLECTOR_URL`; when it falls behind, traces are dropped rather
+than slowing requests down.
+"""
+import contextvars
+import functools
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_SPANS = 500
+QUEUE_SIZE = 1000
+BATCH_SIZE = 100
+MAX_ATTRIBUTE_LENGTH = 300
+
+_TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_trace_id = contextvars.ContextVar('trace_id', default=None)
+_trace = contextvars.ContextVar('trace', default=None)
+_parent = contextvars.ContextVar('span_parent', default=None)
+
+
+class Trace:
+    def __init__(self, trace_id, name, parent_id=None):
+        self.trace_id = trace_id
+        self.name = name
+        self.parent_id = parent_id
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.spans = []
+        self.dropped = 0
+        self.attributes = {}
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.started_at,
+            'duration_ms': round((time.perf_counter() - self.started) * 1000, 3),
+            'attributes': self.attributes,
+            'spans': self.spans,
+            'dropped_spans': self.dropped,
+        }
+
+
+def current_trace_id():
+    return _trace_id.get()
+
+
+def parse_traceparent(header):
+    """(trace id, parent span id, sampled) from a traceparent header, or None"""
+    match = _TRACEPARENT_RE.match((header or '').strip().lower())
+    if match is None or match.group(1) == '0' * 32:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+@contextmanager
+def request_trace(name, traceparent=None):
+    """Scope a request: sets its trace id and, when sampled, collects and exports its spans"""
+    incoming = parse_traceparent(traceparent)
+    trace_id, parent_id, sampled = incoming or (uuid.uuid4().hex, None, False)
+    # Any client can send the sampled flag; only an upstream we trust may force tracing
+    sampled = sampled and settings.TRACING_TRUST_TRACEPARENT
+    rate = settings.TRACING_SAMPLE_RATE
+    sampled = sampled or (rate > 0 and random.random() < rate)
+    trace = Trace(trace_id, name, parent_id) if sampled else None
+
+    tokens = (_trace_id.set(trace_id), _trace.set(trace), _parent.set(None))
+    try:
+        yield trace_id, trace
+    finally:
+        _parent.reset(tokens[2])
+        _trace.reset(tokens[1])
+        _trace_id.reset(tokens[0])
+        if trace is not None:
+            export(trace.to_dict())
+
+
+def _clip(value):
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    value = str(value)
+    return value if len(value) <= MAX_ATTRIBUTE_LENGTH else value[:MAX_ATTRIBUTE_LENGTH] + '...'
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a block as a child of the current span; a no-op outside a sampled trace"""
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+    if len(trace.spans) >= MAX_SPANS:
+        trace.dropped += 1
+        yield None
+        return
+
+    record = {'id': uuid.uuid4().hex[:16], 'parent': _parent.get(), 'name': name, 'attributes': {}}
+    trace.spans.append(record)
+    token = _parent.set(record['id'])
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record['error'] = f'{type(e).__name__}: {_clip(e)}'
+        raise
+    finally:
+        _parent.reset(token)
+        record['start_ms'] = round((started - trace.started) * 1000, 3)
+        record['duration_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        # Values added to the record's attributes inside the block win
+        record['attributes'] = {**{key: _clip(value) for key, value in attributes.items()}, **record['attributes']}
+
+
+def traced(name):
+    """Decorator form of span()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def sql_span(execute, sql, params, many, context):
+    """Execute wrapper recording a db.query span per statement"""
+    with span('db.query', alias=context['connection'].alias, sql=sql, many=many):
+        return execute(sql, params, many, context)
+
+
+class TraceIdFilter(logging.Filter):
+    """Adds `trace_id` to log records ('-' outside a request)"""
+
+    def filter(self, record):
+        # django.request logs after the middleware has returned, but passes the request
+        record.trace_id = _trace_id.get() or getattr(getattr(record, 'request', None), 'trace_id', None) or '-'
+        return True
+
+
+_instrumented = False
+
+
+def instrument():
+    """Open spans in outbound requests calls and template rendering (idempotent)"""
+    global _instrumented
+    if _instrumented:
+        return
+    _instrumented = True
+
+    import requests
+    from django.template.backends.django import Template
+
+    send = requests.Session.send
+
+    @functools.wraps(send)
+    def traced_send(session, request, **kwargs):
+        if _trace.get() is None:
+            return send(session, request, **kwargs)
+        with span('http.client', method=request.method, url=request.url.split('?')[0]) as record:
+            response = send(session, request, **kwargs)
+            if record is not None:
+                record['attributes']['status'] = response.status_code
+            return response
+
+    requests.Session.send = traced_send
+
+    render = Template.render
+
+    @functools.wraps(render)
+    def traced_render(template, context=None, request=None):
+        if _trace.get() is None:
+            return render(template, context, request)
+        with span('template.render', template=template.origin.template_name):
+            return render(template, context, request)
+
+    Template.render = traced_render
+
+
+class Exporter:
+    """Writes finished traces from a background thread"""
+
+    def __init__(self, path=None, collector_url=None):
+        self.path = path
+        self.collector_url = collector_url
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+        self._thread.start()
+
+    def submit(self, trace):
+        try:
+            self.queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.write(batch)
+            except Exception as e:
+                logger.warning(f"Could not export {len(batch)} traces: {str(e)}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def write(self, batch):
+        lines = ''.join(json.dumps(trace, default=str) + '\n' for trace in batch)
+        if self.path:
+            with open(self.path, 'a') as f:
+                f.write(lines)
+        if self.collector_url:
+            import requests
+            requests.post(
+                self.collector_url, data=lines.encode(), timeout=5,
+                headers={'Content-Type': 'application/x-ndjson'}
+            )
+
+    def flush(self):
+        """Wait until every submitted trace has been written"""
+        self.queue.join()
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = Exporter(settings.TRACING_EXPORT_PATH, settings.TRACING_COLLECTOR_URL)
+        return _exporter
+
+
+def set_exporter(exporter):
+    """Swap the exporter (used by tests)"""
+    global _exporter
+    with _exporter_lock:
+        _exporter = exporter
+
+
+def export(trace):
+    if settings.TRACING_EXPORT_PATH or settings.TRACING_COLLECTOR_URL:
+        get_exporter().submit(trace)
@@ -0,0 +1,229 @@
+# core/trending.py
+"""
+Trending events ranked by time-decayed purchase and view activity.
+
+Every view or purchase is written twice, in O(1):
+
+* into an hourly bucket counter, so "views/purchases in the last 24 hours" is a
+  sum over a handful of buckets that expire on their own, and
+* into a running trending score using forward decay: an event at time t adds
+  weight * 2 ** ((t - landmark) / half_life). Older activity is never touched,
+  yet dividing by 2 ** ((now - landmark) / half_life) at read time gives every
+  event its exponentially decayed score, so ranking is a sorted-set read and
+  never scans tickets. When the exponent grows large the scores are rescaled
+  and the landmark moved forward.
+
+Counters live in Redis when `REDIS_URL` is set and in process memory otherwise
+(development and tests).
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+HALF_LIFE_SECONDS = 6 * 3600
+BUCKET_SECONDS = 3600
+WINDOW_BUCKETS = 24
+VIEW_WEIGHT = 1.0
+PURCHASE_WEIGHT = 10.0
+# Rescale forward-decayed scores once they have grown by 2 ** RESCALE_AFTER
+RESCALE_AFTER = 64
+# Scores that have decayed below this are dropped on rescale
+MIN_SCORE = 0.01
+
+VIEW = 'view'
+PURCHASE = 'purchase'
+WEIGHTS = {VIEW: VIEW_WEIGHT, PURCHASE: PURCHASE_WEIGHT}
+
+
+def _bucket(now):
+    return int(now // BUCKET_SECONDS)
+
+
+class MemoryTrendingBackend:
+    """Process-local counters for development and tests"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._landmark = None
+        self._scores = defaultdict(float)
+        self._buckets = defaultdict(lambda: defaultdict(int))
+
+    def record(self, event_id, kind, weight, now):
+        with self._lock:
+            if self._landmark is None:
+                self._landmark = now
+            age = (now - self._landmark) / HALF_LIFE_SECONDS
+            if age > RESCALE_AFTER:
+                factor = 2 ** -age
+                self._scores = defaultdict(float, {
+                    member: score * factor
+                    for member, score in self._scores.items()
+                    if score * factor >= MIN_SCORE
+                })
+                self._landmark, age = now, 0.0
+            self._scores[event_id] += weight * 2 ** age
+
+            bucket = _bucket(now)
+            self._buckets[(kind, bucket)][event_id] += 1
+            # Drop buckets that have slid out of the window
+            for key in [key for key in self._buckets if key[1] <= bucket - WINDOW_BUCKETS]:
+                del self._buckets[key]
+
+    def top(self, limit, now):
+        with self._lock:
+            if self._landmark is None:
+                return []
+            decay = 2 ** -((now - self._landmark) / HALF_LIFE_SECONDS)
+            ranked = sorted(self._scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [(event_id, score * decay) for event_id, score in ranked]
+
+    def window_counts(self, event_ids, kind, now):
+        current = _bucket(now)
+        with self._lock:
+            counts = {event_id: 0 for event_id in event_ids}
+            for bucket in range(current - WINDOW_BUCKETS + 1, current + 1):
+                counter = self._buckets.get((kind, bucket), {})
+                for event_id in event_ids:
+                    counts[event_id] += counter.get(event_id, 0)
+            return counts
+
+
+# Bucket increment, score increment and (when due) rescale in one atomic round trip
+RECORD_SCRIPT = """
+local now = tonumber(ARGV[3])
+local half_life = tonumber(ARGV[4])
+local landmark = tonumber(redis.call('GET', KEYS[2]))
+if not landmark then
+    landmark = now
+    redis.call('SET', KEYS[2], ARGV[3])
+end
+local age = (now - landmark) / half_life
+if age > tonumber(ARGV[6]) then
+    redis.call('ZUNIONSTORE', KEYS[1], 1, KEYS[1], 'WEIGHTS', tostring(2 ^ -age))
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[7])
+    redis.call('SET', KEYS[2], ARGV[3])
+    age = 0
+end
+redis.call('ZINCRBY', KEYS[1], tostring(tonumber(ARGV[2]) * 2 ^ age), ARGV[1])
+redis.call('HINCRBY', KEYS[3], ARGV[1], 1)
+redis.call('EXPIRE', KEYS[3], ARGV[5])
+return 1
+"""
+
+
+class RedisTrendingBackend:
+    """Counters shared by every worker through Redis"""
+
+    SCORES_KEY = 'trending:scores'
+    LANDMARK_KEY = 'trending:landmark'
+
+    def __init__(self, url, max_connections=20, timeout=0.1):
+        import redis
+        # Views are recorded inside requests: a slow or unreachable Redis costs at most
+        # `timeout` per call; the error is logged and that view goes uncounted
+        pool = redis.BlockingConnectionPool.from_url(
+            url,
+            max_connections=max_connections,
+            timeout=timeout,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+            health_check_interval=30,
+            decode_responses=True,
+        )
+        self.redis = redis.Redis(connection_pool=pool)
+        self._record = self.redis.register_script(RECORD_SCRIPT)
+
+    def _bucket_key(self, kind, bucket):
+        return f'trending:{kind}:{bucket}'
+
+    def record(self, event_id, kind, weight, now):
+        self._record(
+            keys=[self.SCORES_KEY, self.LANDMARK_KEY, self._bucket_key(kind, _bucket(now))],
+            args=[
+                event_id, weight, now, HALF_LIFE_SECONDS,
+                (WINDOW_BUCKETS + 1) * BUCKET_SECONDS, RESCALE_AFTER, MIN_SCORE,
+            ],
+        )
+
+    def top(self, limit, now):
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.get(self.LANDMARK_KEY)
+        pipe.zrevrange(self.SCORES_KEY, 0, limit - 1, withscores=True)
+        landmark, ranked = pipe.execute()
+        if landmark is None:
+            return []
+        decay = 2 ** -((now - float(landmark)) / HALF_LIFE_SECONDS)
+        return [(int(event_id), score * decay) for event_id, score in ranked]
+
+    def window_counts(self, event_ids, kind, now):
+        event_ids = list(event_ids)
+        counts = {event_id: 0 for event_id in event_ids}
+        if not event_ids:
+            return counts
+        current = _bucket(now)
+        pipe = self.redis.pipeline(transaction=False)
+        for bucket in range(current - WINDOW_BUCKETS + 1, current + 1):
+            pipe.hmget(self._bucket_key(kind, bucket), event_ids)
+        for values in pipe.execute():
+            for event_id, value in zip(event_ids, values):
+                counts[event_id] += int(value or 0)
+        return counts
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        redis_url = getattr(settings, 'REDIS_URL', None)
+        if redis_url:
+            _backend = RedisTrendingBackend(
+                redis_url,
+                max_connections=settings.TRENDING_REDIS_MAX_CONNECTIONS,
+                timeout=settings.TRENDING_REDIS_TIMEOUT,
+            )
+        else:
+            _backend = MemoryTrendingBackend()
+    return _backend
+
+
+def set_backend(backend):
+    """Swap the counter backend (used by tests)"""
+    global _backend
+    _backend = backend
+
+
+def record(event_id, kind, now=None):
+    """Count a view or purchase; counter failures never break the request"""
+    try:
+        get_backend().record(event_id, kind, WEIGHTS[kind], now or time.time())
+    except Exception as e:
+        logger.warning(f"Could not record trending {kind} for event {event_id}: {str(e)}")
+
+
+def record_view(event_id, now=None):
+    record(event_id, VIEW, now=now)
+
+
+def record_purchase(event_id, now=None):
+    record(event_id, PURCHASE, now=now)
+
+
+def trending_events(limit=10, now=None):
+    """Top (event_id, score, views, purchases) tuples by decayed score, hottest first"""
+    now = now or time.time()
+    backend = get_backend()
+    ranked = [(event_id, score) for event_id, score in backend.top(limit, now) if score > 0]
+
+    event_ids = [event_id for event_id, _ in ranked]
+    views = backend.window_counts(event_ids, VIEW, now)
+    purchases = backend.window_counts(event_ids, PURCHASE, now)
+    return [
+        (event_id, score, views[event_id], purchases[event_id])
+        for event_id, score in ranked
+    ]
@@ -0,0 +1,9 @@
+# core/urls.py
+from django.urls import path
+from .views import profile_detail, profile_download, profile_list
+
+urlpatterns = [
+    path('profiles/', profile_list, name='profile-list'),
+    path('profiles/<str:profile_id>/', profile_detail, name='profile-detail'),
+    path('profiles/<str:profile_id>/download/', profile_download, name='profile-download'),
+]
@@ -1,3 +1,61 @@
-from django.shortcuts import render
+# core/views.py
+import hmac
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from core import metrics, profiling
+from core.permissions import IsStaff
 
-# Create your views here.
+
+def _metrics_authorized(request):
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+        return True
+    return request.user.is_authenticated and (request.user.is_staff or request.user.role == 'ADMIN')
+
+
+@require_GET
+def metrics_view(request):
+    """Metrics of all workers in the Prometheus text format, for staff or the scrape token"""
+    if not _metrics_authorized(request):
+        return JsonResponse({"error": "You don't have permission to access this information."}, status=403)
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@api_view(['GET'])
+@permission_classes([IsStaff])
+def profile_list(request):
+    """Recent request profiles, newest first"""
+    return Response(profiling.recent())
+
+
+@api_view(['GET'])
+@permission_classes([IsStaff])
+def profile_detail(request, profile_id):
+    """A profile's metadata and its top functions (?sort=cumulative|tottime|calls, ?limit=)"""
+    stored = profiling.load(profile_id)
+    if stored is None:
+        return Response({"error": "Profile not found."}, status=status.HTTP_404_NOT_FOUND)
+    meta, raw = stored
+    try:
+        limit = min(max(int(request.query_params.get('limit', 30)), 1), 500)
+    except ValueError:
+        return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    sort = request.query_params.get('sort', 'cumulative')
+    return Response({**meta, 'functions': profiling.top_functions(raw, sort=sort, limit=limit)})
+
+
+@api_view(['GET'])
+@permission_classes([IsStaff])
+def profile_download(request, profile_id):
+    """The profile as a .prof file for pstats or snakeviz"""
+    stored = profiling.load(profile_id)
+    if stored is None:
+        return Response({"error": "Profile not found."}, status=status.HTTP_404_NOT_FOUND)
+    response = HttpResponse(stored[1], content_type='application/octet-stream')
+    response['Content-Disposition'] = f'attachment; filename="profile-{profile_id}.prof"'
+    return response
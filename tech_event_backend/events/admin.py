@@ -3,7 +3,13 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
-from .models import Event
+from .models import Category, Event
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug', 'published_events_count', 'created_at']
+    search_fields = ['name', 'slug']
+    readonly_fields = ['published_events_count', 'created_at']
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
@@ -13,7 +19,7 @@ class EventAdmin(admin.ModelAdmin):
     ]
     list_filter = ['status', 'category', 'created_at', 'start_date']
     search_fields = ['title', 'description', 'location', 'organizer__email']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['category_ref', 'created_at', 'updated_at']
     
     fieldsets = (
         ('Basic Information', {
@@ -1,17 +1,19 @@
 # events/api/serializers.py
+from datetime import timedelta
 from rest_framework import serializers
-from events.models import Event
+from events.models import MAX_EVENT_DAYS, Category, Event, EventSalesForecast
 from users.api.serializers import UserSerializer
 from django.utils import timezone
+from core.fieldsets import FieldsetMixin
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(FieldsetMixin, serializers.ModelSerializer):
     organizer_details = UserSerializer(source='organizer', read_only=True)
     
     class Meta:
         model = Event
         fields = [
             'id', 'title', 'description', 'organizer', 'organizer_details',
-            'location', 'start_date', 'end_date', 'category', 'banner_image',
+            'location', 'latitude', 'longitude', 'start_date', 'end_date', 'category', 'banner_image',
             'max_attendees', 'ticket_price', 'status', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at', 'organizer']
@@ -20,6 +22,14 @@ class EventSerializer(serializers.ModelSerializer):
         """Custom validation that considers draft vs published status"""
         status = data.get('status', 'DRAFT')
         
+        # Partial updates are checked against the stored dates
+        start_date = data.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = data.get('end_date', getattr(self.instance, 'end_date', None))
+        if start_date and end_date and end_date - start_date > timedelta(days=MAX_EVENT_DAYS):
+            raise serializers.ValidationError({
+                'end_date': f'Events cannot last longer than {MAX_EVENT_DAYS} days'
+            })
+        
         # For published events, enforce strict validation
         if status == 'PUBLISHED':
             required_fields = ['title', 'description', 'location', 'start_date', 'end_date', 'category']
@@ -118,15 +128,16 @@ class EventSerializer(serializers.ModelSerializer):
         
         return super().update(instance, validated_data)
 
-class EventListSerializer(serializers.ModelSerializer):
+class EventListSerializer(FieldsetMixin, serializers.ModelSerializer):
     """Lightweight serializer for listing events"""
     organizer_name = serializers.CharField(source='organizer.get_full_name', read_only=True)
+    category_slug = serializers.SlugRelatedField(source='category_ref', slug_field='slug', read_only=True)
     
     class Meta:
         model = Event
         fields = [
             'id', 'title', 'location', 'start_date', 'end_date',
-            'category', 'banner_image', 'ticket_price', 'status',
+            'category', 'category_slug', 'banner_image', 'ticket_price', 'status',
             'organizer_name', 'created_at', 'max_attendees'
         ]
 
@@ -159,3 +170,24 @@ class DraftEventSerializer(serializers.ModelSerializer):
         data['status'] = 'DRAFT'
         
         return data
+
+class EventSalesForecastSerializer(serializers.ModelSerializer):
+    """Stored sell-out forecast for an event"""
+    event_title = serializers.CharField(source='event.title', read_only=True)
+    max_attendees = serializers.IntegerField(source='event.max_attendees', read_only=True)
+    will_sell_out = serializers.BooleanField(read_only=True)
+    
+    class Meta:
+        model = EventSalesForecast
+        fields = [
+            'event', 'event_title', 'max_attendees', 'tickets_sold', 'daily_velocity',
+            'projected_sales_at_start', 'predicted_sellout_at', 'will_sell_out', 'computed_at'
+        ]
+
+
+class CategorySerializer(serializers.ModelSerializer):
+    """Category with its count of published events"""
+    
+    class Meta:
+        model = Category
+        fields = ['id', 'slug', 'name', 'published_events_count']
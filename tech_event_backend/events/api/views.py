@@ -5,19 +5,59 @@ from rest_framework.decorators import action
 from django.db.models import Count, Q
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-from events.models import Event
+from django.core.cache import cache
+from events.models import Category, Event, EventSalesForecast
 from tickets.models import Ticket
-from .serializers import EventSerializer, EventListSerializer, DraftEventSerializer
+from .serializers import (
+    EventSerializer, EventListSerializer, DraftEventSerializer, EventSalesForecastSerializer, CategorySerializer
+)
+from core.forecasting import score_events
+from core import autocomplete, conditional, event_calendar, facets, geo, metrics, similarity, trending
 from core.permissions import IsAdmin, IsOrganizer, IsAdminOrOrganizer
+from core.querysets import OptimizedQuerysetMixin
+from core.quotas import quota
 from rest_framework.permissions import IsAuthenticated
 
-class EventViewSet(viewsets.ModelViewSet):
+TRENDING_CACHE_SECONDS = 60
+TRENDING_MAX_LIMIT = 50
+CATEGORIES_CACHE_SECONDS = 60 * 10
+NEARBY_MAX_RADIUS_KM = 500
+
+
+def event_list_state(view, request, *args, **kwargs):
+    """Validator state of an event listing: its events and their organizers' profiles, plus the category slugs it shows"""
+    events = conditional.changes(
+        view.filter_queryset(view.get_queryset()), 'updated_at', 'organizer__profile_updated_at'
+    )
+    stamps = conditional.stamps('events', 'categories')
+    # Facet counts also cover events outside the current filters
+    generation = facets.generation() if 'facets' in request.query_params else None
+    return (events, stamps, generation), conditional.latest(events, *stamps)
+
+
+def cached_categories():
+    """Category listing with published counts, cached until an event changes"""
+    cache_key = f'events:categories:{facets.generation()}'
+    categories = metrics.record_cache('categories', cache.get(cache_key))
+    if categories is None:
+        categories = CategorySerializer(
+            Category.objects.order_by('-published_events_count', 'name'), many=True
+        ).data
+        cache.set(cache_key, categories, CATEGORIES_CACHE_SECONDS)
+    return categories
+
+
+class EventViewSet(OptimizedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Event.objects.all()
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'status', 'start_date']
     search_fields = ['title', 'description', 'location']
     ordering_fields = ['start_date', 'ticket_price', 'created_at', 'updated_at']
     ordering = ['-created_at']  # Default ordering
+    # Detail actions check event.organizer against the caller
+    select_related_by_action = {'*': ('organizer',)}
+    # The retrieve validator reads the organizer's profile stamp
+    columns_by_action = {'retrieve': ('organizer__profile_updated_at',)}
     
     def get_serializer_class(self):
         """Choose serializer based on action and status"""
@@ -36,11 +76,13 @@ class EventViewSet(viewsets.ModelViewSet):
             return [permissions.IsAuthenticated(), IsAdminOrOrganizer()]
         elif self.action in ['my_events', 'my_drafts']:
             return [permissions.IsAuthenticated()]
+        elif self.action in ['forecast', 'forecasts']:
+            return [permissions.IsAuthenticated(), IsAdminOrOrganizer()]
         return [permissions.AllowAny()]
     
     def get_queryset(self):
         """Filter queryset based on user permissions and action"""
-        queryset = Event.objects.select_related('organizer').all()
+        queryset = Event.objects.all()
         
         # For list action, apply visibility rules
         if self.action == 'list':
@@ -59,6 +101,13 @@ class EventViewSet(viewsets.ModelViewSet):
                 # Regular users only see published events
                 queryset = queryset.filter(status='PUBLISHED')
 
+        category_slug = self.request.query_params.get('category_slug')
+        if category_slug:
+            # Resolve the slug from the cached listing so the filter is an exact
+            # match on the indexed category foreign key, without a join
+            category_ids = [c['id'] for c in cached_categories() if c['slug'] == category_slug]
+            queryset = queryset.filter(category_ref_id=category_ids[0]) if category_ids else queryset.none()
+        
         search_query = self.request.query_params.get('search', None)
         if search_query:
             queryset = queryset.filter(
@@ -70,6 +119,25 @@ class EventViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    @conditional.conditional(event_list_state)
+    def list(self, request, *args, **kwargs):
+        """List events, with facet counts for the current filters when ?facets=true"""
+        response = super().list(request, *args, **kwargs)
+        
+        if request.query_params.get('facets', '').lower() in ['1', 'true'] and isinstance(response.data, dict):
+            # Visibility rules in get_queryset decide which events a caller can count
+            user = request.user
+            if not user.is_authenticated or user.role not in ['ADMIN', 'ORGANIZER']:
+                scope = 'public'
+            elif user.role == 'ADMIN':
+                scope = 'admin'
+            else:
+                scope = f'organizer:{user.id}'
+            queryset = self.filter_queryset(self.get_queryset())
+            response.data['facets'] = facets.cached_facets(queryset, request.query_params, scope)
+        
+        return response
+    
     def create(self, request, *args, **kwargs):
         """Enhanced create method with better error handling"""
         try:
@@ -88,6 +156,150 @@ class EventViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve an event and count the view towards its trending score; 304 when unchanged"""
+        event = self.get_object()
+        if event.status == 'PUBLISHED':
+            trending.record_view(event.pk)
+        
+        # The organizer's profile is nested in the response, unless ?fields= leaves it out
+        profile = event.organizer.profile_updated_at if Event.organizer.is_cached(event) else None
+        return conditional.conditional_response(
+            request, (event.updated_at, profile), conditional.latest(event.updated_at, profile),
+            lambda: Response(self.get_serializer(event).data)
+        )
+    
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        """Get upcoming published events ranked by recent views and purchases"""
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), TRENDING_MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        cache_key = f'events:trending:{limit}'
+        data = metrics.record_cache('trending', cache.get(cache_key))
+        if data is None:
+            # Over-fetch: ended, unpublished and deleted events are dropped below
+            ranked = trending.trending_events(limit=limit * 3)
+            events = Event.objects.select_related('organizer', 'category_ref').filter(
+                pk__in=[event_id for event_id, *_ in ranked],
+                status='PUBLISHED',
+                end_date__gt=timezone.now()
+            ).in_bulk()
+            
+            data = []
+            for event_id, score, views, purchases in ranked:
+                if event_id in events and len(data) < limit:
+                    # Cached for every caller, so ?fields= does not apply
+                    item = EventListSerializer(
+                        events[event_id], context={'request': request, 'fieldsets': False}
+                    ).data
+                    item['trending'] = {
+                        'score': round(score, 3),
+                        'views_24h': views,
+                        'purchases_24h': purchases,
+                    }
+                    data.append(item)
+            cache.set(cache_key, data, TRENDING_CACHE_SECONDS)
+        
+        return Response(data)
+    
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """Get upcoming published events within a radius of a point, nearest first"""
+        try:
+            latitude = float(request.query_params['lat'])
+            longitude = float(request.query_params['lng'])
+            radius_km = float(request.query_params.get('radius_km', 25))
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except (KeyError, ValueError):
+            return Response(
+                {"error": "lat and lng are required; radius_km and limit must be numbers."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180 and 0 < radius_km <= NEARBY_MAX_RADIUS_KM):
+            return Response(
+                {"error": f"Coordinates out of range or radius_km not in (0, {NEARBY_MAX_RADIUS_KM}]."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        upcoming = Event.objects.filter(status='PUBLISHED', end_date__gt=timezone.now())
+        ranked = geo.within_radius(upcoming, latitude, longitude, radius_km)[:limit]
+        events = Event.objects.select_related('organizer', 'category_ref').in_bulk(
+            [event_id for event_id, _ in ranked]
+        )
+        
+        data = []
+        for event_id, distance in ranked:
+            if event_id in events:
+                item = EventListSerializer(events[event_id], context={'request': request}).data
+                item['distance_km'] = round(distance, 2)
+                data.append(item)
+        return Response(data)
+    
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """Get published events overlapping a month (?month=YYYY-MM), grouped by day"""
+        month = request.query_params.get('month') or timezone.localdate().strftime('%Y-%m')
+        try:
+            year, month = (int(part) for part in month.split('-'))
+            if not (1 <= year <= 9998 and 1 <= month <= 12):
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": "month must be in YYYY-MM format."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(event_calendar.cached_month_calendar(year, month))
+    
+    @action(detail=False, methods=['get'])
+    def categories(self, request):
+        """List event categories with their published event counts"""
+        return Response(cached_categories())
+    
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """Typeahead suggestions for event titles, categories and locations"""
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(max(int(request.query_params.get('limit', 8)), 1), 20)
+        except ValueError:
+            return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        suggestions = autocomplete.suggest(query, limit=limit)
+        return Response({
+            'query': query,
+            'suggestions': [
+                {'text': text, 'type': kind, 'event_id': event_id}
+                for text, kind, event_id in suggestions
+            ]
+        })
+    
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """Get published events with the most similar title, description and category"""
+        event = self.get_object()
+        try:
+            limit = min(max(int(request.query_params.get('limit', 5)), 1), 20)
+        except ValueError:
+            return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        ranked = similarity.similar_events(event, k=limit)
+        events = Event.objects.select_related('organizer', 'category_ref').filter(
+            pk__in=[event_id for event_id, _ in ranked], status='PUBLISHED'
+        ).in_bulk()
+        
+        data = []
+        for event_id, score in ranked:
+            if event_id in events:
+                item = EventListSerializer(events[event_id], context={'request': request}).data
+                item['similarity'] = round(score, 4)
+                data.append(item)
+        return Response(data)
+    
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def my_events(self, request):
         """Get current user's events (both drafts and published)"""
@@ -98,9 +310,9 @@ class EventViewSet(viewsets.ModelViewSet):
             )
         
         if request.user.role == 'ADMIN':
-            events = Event.objects.all()
+            events = Event.objects.select_related('organizer', 'category_ref')
         else:
-            events = Event.objects.filter(organizer=request.user)
+            events = Event.objects.select_related('organizer', 'category_ref').filter(organizer=request.user)
         
         # Apply filtering
         status_filter = request.query_params.get('status')
@@ -123,9 +335,9 @@ class EventViewSet(viewsets.ModelViewSet):
             )
         
         if request.user.role == 'ADMIN':    
-            drafts = Event.objects.filter(status='DRAFT')
+            drafts = Event.objects.select_related('organizer', 'category_ref').filter(status='DRAFT')
         else:
-            drafts = Event.objects.filter(organizer=request.user, status='DRAFT')
+            drafts = Event.objects.select_related('organizer', 'category_ref').filter(organizer=request.user, status='DRAFT')
         
         drafts = drafts.order_by('-updated_at')
         serializer = EventListSerializer(drafts, many=True)
@@ -166,6 +378,7 @@ class EventViewSet(viewsets.ModelViewSet):
             )
     #event/api/views.py
     @action(detail=True, methods=['get'], permission_classes=[IsAdminOrOrganizer])
+    @quota(measured=True)
     def attendees(self, request, pk=None):
         """Get the list of attendees for an event"""
         event = self.get_object()
@@ -184,7 +397,7 @@ class EventViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
             
-        tickets = Ticket.objects.filter(event=event, payment_status='COMPLETED')
+        tickets = Ticket.objects.filter(event=event, payment_status='COMPLETED').select_related('user')
         attendees_data = []
         
         for ticket in tickets:
@@ -201,6 +414,7 @@ class EventViewSet(viewsets.ModelViewSet):
         return Response(attendees_data)
     
     @action(detail=True, methods=['get'])
+    @quota(measured=True)
     def statistics(self, request, pk=None):
         """Get statistics for an event"""
         try:
@@ -258,4 +472,35 @@ class EventViewSet(viewsets.ModelViewSet):
             "occupancy_rate": occupancy_rate,  # This should be float between 0-1
         }
         
-        return Response(stats)
\ No newline at end of file
+        return Response(stats)
+    
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated, IsAdminOrOrganizer])
+    @quota(measured=True)
+    def forecast(self, request, pk=None):
+        """Get the sales velocity and sell-out forecast for an event"""
+        event = self.get_object()
+        
+        if request.user.role != 'ADMIN' and event.organizer != request.user:
+            return Response(
+                {"error": "You don't have permission to access this information."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # Forecasts are batch-scored nightly; score on demand if this event was missed
+        forecast = EventSalesForecast.objects.select_related('event').filter(event=event).first()
+        if forecast is None:
+            forecast = score_events(Event.objects.filter(pk=event.pk))[0]
+            forecast.event = event
+        
+        return Response(EventSalesForecastSerializer(forecast).data)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdminOrOrganizer])
+    @quota(measured=True)
+    def forecasts(self, request):
+        """Get stored forecasts for the current user's active events"""
+        forecasts = EventSalesForecast.objects.select_related('event').order_by('predicted_sellout_at')
+        if request.user.role != 'ADMIN':
+            forecasts = forecasts.filter(event__organizer=request.user)
+        
+        serializer = EventSalesForecastSerializer(forecasts, many=True)
+        return Response(serializer.data)
\ No newline at end of file
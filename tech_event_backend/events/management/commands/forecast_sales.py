@@ -0,0 +1,16 @@
+# events/management/commands/forecast_sales.py
+import time
+from django.core.management.base import BaseCommand
+from core.forecasting import refresh_forecasts
+
+
+class Command(BaseCommand):
+    help = 'Batch-score sell-out forecasts for all active events (run nightly)'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        forecasts = refresh_forecasts()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {len(forecasts)} active events in {elapsed:.2f}s"
+        ))
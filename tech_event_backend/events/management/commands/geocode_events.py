@@ -0,0 +1,30 @@
+# events/management/commands/geocode_events.py
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core import geo, geocoding
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        'Geocode events that have no coordinates yet (results are cached per location, '
+        'provider calls are rate limited; run every few minutes)'
+    )
+
+    def handle(self, *args, **options):
+        geocoded = missed = 0
+        events = Event.objects.filter(latitude__isnull=True).exclude(location='').values_list('id', 'location')
+        for event_id, location in events.iterator():
+            coordinates = geocoding.geocode(location)
+            if coordinates is None:
+                missed += 1
+                continue
+            # update() skips Event.save(), whose validation rejects past published events,
+            # and auto_now, which conditional GET validators rely on
+            Event.objects.filter(pk=event_id).update(
+                latitude=coordinates[0], longitude=coordinates[1], geohash=geo.encode(*coordinates),
+                updated_at=timezone.now()
+            )
+            geocoded += 1
+        
+        self.stdout.write(self.style.SUCCESS(f"Geocoded {geocoded} events, {missed} locations not found"))
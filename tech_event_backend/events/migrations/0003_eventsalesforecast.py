@@ -0,0 +1,26 @@
+# Generated by Django 4.2.20 on 2026-10-19 14:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_alter_event_options_alter_event_ticket_price_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSalesForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tickets_sold', models.PositiveIntegerField(default=0)),
+                ('daily_velocity', models.FloatField(default=0.0)),
+                ('projected_sales_at_start', models.PositiveIntegerField(default=0)),
+                ('predicted_sellout_at', models.DateTimeField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField()),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sales_forecast', to='events.event')),
+            ],
+        ),
+    ]
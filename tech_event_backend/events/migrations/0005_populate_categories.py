@@ -0,0 +1,42 @@
+# Generated by Django 4.2.20 on 2026-10-19 14:27
+
+from collections import Counter
+from django.db import migrations
+from django.db.models import Count
+from django.utils.text import slugify
+
+
+def populate_categories(apps, schema_editor):
+    """Create a Category per distinct slugified category string and link events to it"""
+    Category = apps.get_model('events', 'Category')
+    Event = apps.get_model('events', 'Event')
+
+    spellings = {}
+    for name, count in Event.objects.values_list('category').annotate(count=Count('id')):
+        slug = slugify((name or '').strip())[:100]
+        if slug:
+            spellings.setdefault(slug, Counter())[name] += count
+
+    for slug, names in spellings.items():
+        # The most common spelling becomes the canonical name
+        name = names.most_common(1)[0][0].strip()
+        category, _ = Category.objects.get_or_create(slug=slug, defaults={'name': name})
+        Event.objects.filter(category__in=list(names)).update(category_ref=category, category=category.name)
+        category.published_events_count = Event.objects.filter(category_ref=category, status='PUBLISHED').count()
+        category.save(update_fields=['published_events_count'])
+
+
+def unlink_categories(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    Event.objects.update(category_ref=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_category'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_categories, unlink_categories),
+    ]
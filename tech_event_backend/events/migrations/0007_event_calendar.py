@@ -0,0 +1,66 @@
+# Generated by Django 4.2.20 on 2026-10-19 14:32
+
+from datetime import timedelta
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+GIST_INDEX_NAME = 'events_event_period_gist'
+# core.event_calendar.DAY_ROWS_HORIZON when this migration was written
+DAY_ROWS_HORIZON = 31
+
+
+def create_calendar_index(apps, schema_editor):
+    """GiST range index on PostgreSQL; day rows for published events elsewhere"""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {GIST_INDEX_NAME} ON events_event "
+            "USING gist (tstzrange(start_date, end_date)) WHERE status = 'PUBLISHED'"
+        )
+        return
+
+    Event = apps.get_model('events', 'Event')
+    EventDay = apps.get_model('events', 'EventDay')
+    rows = []
+    published = Event.objects.filter(status='PUBLISHED', start_date__isnull=False, end_date__isnull=False)
+    for event_id, start, end in published.values_list('id', 'start_date', 'end_date').iterator():
+        day = timezone.localdate(start)
+        last = min(
+            max(timezone.localdate(end - timedelta(microseconds=1)), day),
+            day + timedelta(days=DAY_ROWS_HORIZON - 1)
+        )
+        while day <= last:
+            rows.append(EventDay(event_id=event_id, day=day))
+            day += timedelta(days=1)
+        if len(rows) >= 1000:
+            EventDay.objects.bulk_create(rows)
+            rows = []
+    EventDay.objects.bulk_create(rows)
+
+
+def drop_calendar_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {GIST_INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_event_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calendar_days', to='events.event')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='eventday',
+            constraint=models.UniqueConstraint(fields=('day', 'event'), name='unique_event_day'),
+        ),
+        migrations.RunPython(create_calendar_index, drop_calendar_index),
+    ]
@@ -1,8 +1,53 @@
 # events/models.py (updated with additional methods)
+from datetime import timedelta
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.utils.text import slugify
+from core import geo, geocoding
+
+# Longest an event may run
+MAX_EVENT_DAYS = 366
+
+class Category(models.Model):
+    """Normalized event category; `Event.category` keeps the display name"""
+    slug = models.SlugField(max_length=100, unique=True)
+    name = models.CharField(max_length=100)
+    published_events_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'categories'
+    
+    def __str__(self):
+        return self.name
+    
+    @classmethod
+    def for_name(cls, name):
+        """Get or create the category a free-text name maps to"""
+        name = (name or '').strip()
+        slug = slugify(name)[:100]
+        if not slug:
+            return None
+        category, _ = cls.objects.get_or_create(slug=slug, defaults={'name': name})
+        return category
+    
+    @classmethod
+    def refresh_published_counts(cls, category_ids):
+        """Recount published events for the given categories in one UPDATE"""
+        category_ids = [pk for pk in category_ids if pk is not None]
+        if not category_ids:
+            return
+        published = Event.objects.filter(
+            category_ref=OuterRef('pk'), status='PUBLISHED'
+        ).order_by().values('category_ref').annotate(count=Count('id')).values('count')
+        cls.objects.filter(pk__in=category_ids).update(
+            published_events_count=Coalesce(Subquery(published), 0)
+        )
 
 class Event(models.Model):
     STATUS_CHOICES = [
@@ -20,9 +65,19 @@ class Event(models.Model):
         related_name='organized_events'
     )
     location = models.CharField(max_length=255)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default='', editable=False)
     start_date = models.DateTimeField()
     end_date = models.DateTimeField()
     category = models.CharField(max_length=100)
+    category_ref = models.ForeignKey(
+        Category,
+        on_delete=models.PROTECT,
+        related_name='events',
+        null=True,
+        blank=True
+    )
     banner_image = models.ImageField(upload_to='events/banners/', null=True, blank=True)
     max_attendees = models.PositiveIntegerField(default=100)
     ticket_price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
@@ -36,6 +91,8 @@ class Event(models.Model):
             models.Index(fields=['status', 'start_date']),
             models.Index(fields=['organizer', 'status']),
             models.Index(fields=['category', 'status']),
+            models.Index(fields=['category_ref', 'status']),
+            models.Index(fields=['geohash']),
         ]
     
     def __str__(self):
@@ -43,6 +100,9 @@ class Event(models.Model):
     
     def clean(self):
         """Model-level validation"""
+        if self.start_date and self.end_date and self.end_date - self.start_date > timedelta(days=MAX_EVENT_DAYS):
+            raise ValidationError(f'Events cannot last longer than {MAX_EVENT_DAYS} days.')
+        
         if self.status == 'PUBLISHED':
             if not all([self.title, self.description, self.location, self.start_date, self.end_date, self.category]):
                 raise ValidationError('All fields are required for published events.')
@@ -96,8 +156,16 @@ class Event(models.Model):
     
     def save(self, *args, **kwargs):
         """Override save to handle status transitions"""
+        self._previous_category_ref_id = None
+        previous_category = None
+        previous_location = None
+        coordinates_changed = self.latitude is not None
         if self.pk:  # Existing event
             old_instance = Event.objects.get(pk=self.pk)
+            self._previous_category_ref_id = old_instance.category_ref_id
+            previous_category = old_instance.category
+            previous_location = old_instance.location
+            coordinates_changed = (self.latitude, self.longitude) != (old_instance.latitude, old_instance.longitude)
             
             # Prevent certain status changes
             if old_instance.status == 'PUBLISHED' and self.status == 'DRAFT':
@@ -106,5 +174,51 @@ class Event(models.Model):
             if old_instance.status in ['COMPLETED', 'CANCELLED'] and self.status != old_instance.status:
                 raise ValidationError(f'Cannot change status from {old_instance.status}')
         
+        # Map the free-text category onto its normalized row and canonical name
+        if self.category_ref_id is None or self.category != previous_category:
+            self.category_ref = Category.for_name(self.category)
+            if self.category_ref is not None:
+                self.category = self.category_ref.name
+        
+        # Coordinates for a new or moved location (unless given explicitly) come from the
+        # geocode cache; new locations are left to the geocode_events command
+        if self.location != previous_location and not coordinates_changed:
+            self.latitude, self.longitude = geocoding.cached(self.location) or (None, None)
+        self.geohash = geo.encode(self.latitude, self.longitude) if self.latitude is not None and self.longitude is not None else ''
+        
         self.full_clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class EventSalesForecast(models.Model):
+    """Sell-out forecast for an event, refreshed by the nightly `forecast_sales` pass"""
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, related_name='sales_forecast')
+    tickets_sold = models.PositiveIntegerField(default=0)
+    daily_velocity = models.FloatField(default=0.0)
+    projected_sales_at_start = models.PositiveIntegerField(default=0)
+    predicted_sellout_at = models.DateTimeField(null=True, blank=True)
+    computed_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"Forecast for {self.event.title} ({self.daily_velocity:.1f}/day)"
+    
+    def will_sell_out(self):
+        """Check if the event is predicted to sell out before it starts"""
+        return self.predicted_sellout_at is not None and self.predicted_sellout_at <= self.event.start_date
+
+
+class EventDay(models.Model):
+    """
+    One row per calendar day (in TIME_ZONE) a published event spans. Serves
+    calendar overlap queries on databases without range types; see
+    core.event_calendar.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='calendar_days')
+    day = models.DateField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'event'], name='unique_event_day'),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_id} on {self.day}"
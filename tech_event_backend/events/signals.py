@@ -0,0 +1,67 @@
+# events/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from events.models import Category, Event
+from core import autocomplete, conditional, event_calendar, facets, similarity
+
+
+@receiver(post_save, sender=Event)
+def update_similarity_index(sender, instance, **kwargs):
+    """Re-index a published or edited event for similar-event lookups"""
+    transaction.on_commit(lambda: similarity.record_change(instance))
+
+
+@receiver(post_delete, sender=Event)
+def remove_from_similarity_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: similarity.record_change(instance, deleted=True))
+
+
+@receiver(post_save, sender=Event)
+def update_autocomplete_index(sender, instance, **kwargs):
+    """Re-index an event's title, category and location suggestions"""
+    transaction.on_commit(lambda: autocomplete.record_change(instance))
+
+
+@receiver(post_delete, sender=Event)
+def remove_from_autocomplete_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: autocomplete.record_change(instance, deleted=True))
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_facets(sender, instance, **kwargs):
+    """Facet counts cached before the change no longer match"""
+    transaction.on_commit(facets.invalidate)
+
+
+@receiver(post_save, sender=Event)
+def refresh_category_counts(sender, instance, **kwargs):
+    """Keep published event counts in step when an event is published, moved or closed"""
+    Category.refresh_published_counts({
+        instance.category_ref_id, getattr(instance, '_previous_category_ref_id', None)
+    })
+
+
+@receiver(post_delete, sender=Event)
+def refresh_category_counts_on_delete(sender, instance, **kwargs):
+    Category.refresh_published_counts({instance.category_ref_id})
+
+
+@receiver(post_save, sender=Event)
+def sync_calendar_days(sender, instance, **kwargs):
+    """Keep the day-bucket calendar index in step with the event's dates and status"""
+    event_calendar.sync_event_days(instance)
+
+
+@receiver(post_delete, sender=Event)
+def touch_deleted_events(sender, instance, **kwargs):
+    """Deletions do not move any remaining updated_at, so listings' validators also use this stamp"""
+    conditional.touch('events')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def touch_categories(sender, instance, **kwargs):
+    """Category slugs appear in event listings, whose validators include this stamp"""
+    conditional.touch('categories')
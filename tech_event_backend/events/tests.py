@@ -1,3 +1,597 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from events.models import MAX_EVENT_DAYS, Category, Event, EventDay, EventSalesForecast
+from tickets.models import Ticket
+from core.forecasting import fit_velocity, refresh_forecasts
+from core import autocomplete, event_calendar, geo, geocoding, similarity, trending
+from core.models import GeocodeCache
 
-# Create your tests here.
+User = get_user_model()
+
+
+class SalesForecastTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.organizer = User.objects.create_user(
+            email='organizer@example.com',
+            username='organizer',
+            password='TestPassword123!',
+            role='ORGANIZER'
+        )
+        self.attendee = User.objects.create_user(
+            email='attendee@example.com', username='attendee', password='TestPassword123!'
+        )
+        start = timezone.now() + timedelta(days=20)
+        self.event = Event.objects.create(
+            title='Conference', description='Talks', organizer=self.organizer,
+            location='Lagos', start_date=start, end_date=start + timedelta(hours=5),
+            category='Conference', ticket_price=Decimal('100.00'), max_attendees=10,
+            status='PUBLISHED'
+        )
+
+    def test_fit_velocity_recovers_constant_rate(self):
+        daily_sales = np.array([
+            [3] * 28,
+            [0] * 28,
+            [0] * 14 + [2] * 14,
+        ])
+        velocity = fit_velocity(daily_sales, first_day=np.array([0, 0, 14]))
+        np.testing.assert_allclose(velocity, [3.0, 0.0, 2.0])
+
+    def test_refresh_forecasts_predicts_sellout(self):
+        for i in range(4):
+            Ticket.objects.create(
+                event=self.event, user=self.attendee, price_paid=Decimal('100.00'),
+                payment_status='COMPLETED', qr_code='tickets/qrcodes/test.png'
+            )
+
+        refresh_forecasts()
+        forecast = EventSalesForecast.objects.get(event=self.event)
+
+        self.assertEqual(forecast.tickets_sold, 4)
+        self.assertGreater(forecast.daily_velocity, 0)
+        self.assertTrue(forecast.will_sell_out())
+
+    def test_forecast_endpoint_scores_on_demand(self):
+        self.client.force_authenticate(user=self.organizer)
+        response = self.client.get(f'/api/events/{self.event.id}/forecast/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['tickets_sold'], 0)
+        self.assertIsNone(response.data['predicted_sellout_at'])
+        self.assertTrue(EventSalesForecast.objects.filter(event=self.event).exists())
+
+    def test_forecast_endpoint_requires_organizer(self):
+        self.client.force_authenticate(user=self.attendee)
+        response = self.client.get(f'/api/events/{self.event.id}/forecast/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TrendingEventsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        trending.set_backend(trending.MemoryTrendingBackend())
+        self.client = APIClient()
+        self.organizer = User.objects.create_user(
+            email='organizer@example.com', username='organizer', password='x', role='ORGANIZER'
+        )
+        self.attendee = User.objects.create_user(email='attendee@example.com', username='attendee', password='x')
+        start = timezone.now() + timedelta(days=7)
+        self.events = [
+            Event.objects.create(
+                title=f'Event {i}', description='Talks', organizer=self.organizer, location='Lagos',
+                start_date=start, end_date=start + timedelta(hours=2), category='Meetup', status='PUBLISHED'
+            )
+            for i in range(3)
+        ]
+
+    def tearDown(self):
+        trending.set_backend(None)
+
+    def test_scores_decay_with_half_life(self):
+        backend = trending.get_backend()
+        backend.record(1, trending.VIEW, 1.0, now=0)
+        backend.record(2, trending.VIEW, 1.0, now=trending.HALF_LIFE_SECONDS)
+
+        ranked = dict(backend.top(10, now=trending.HALF_LIFE_SECONDS))
+        self.assertAlmostEqual(ranked[1], 0.5)
+        self.assertAlmostEqual(ranked[2], 1.0)
+
+        # Rescaling the landmark keeps decayed scores unchanged
+        later = trending.HALF_LIFE_SECONDS * (trending.RESCALE_AFTER + 2)
+        backend.record(3, trending.VIEW, 1.0, now=later)
+        self.assertEqual([event_id for event_id, _ in backend.top(10, now=later)], [3])
+
+    def test_window_counts_slide(self):
+        backend = trending.get_backend()
+        backend.record(1, trending.PURCHASE, 10.0, now=0)
+        backend.record(1, trending.PURCHASE, 10.0, now=trending.BUCKET_SECONDS)
+        window_end = trending.BUCKET_SECONDS * trending.WINDOW_BUCKETS
+        self.assertEqual(backend.window_counts([1], trending.PURCHASE, now=window_end - 1)[1], 2)
+        self.assertEqual(backend.window_counts([1], trending.PURCHASE, now=window_end)[1], 1)
+
+    def test_trending_endpoint_ranks_purchases_and_views(self):
+        for _ in range(3):
+            self.client.get(f'/api/events/{self.events[2].id}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket = Ticket.objects.create(
+                event=self.events[1], user=self.attendee, price_paid=Decimal('0.00'),
+                qr_code='tickets/qrcodes/test.png'
+            )
+            ticket.payment_status = 'COMPLETED'
+            ticket.save()
+            # Later saves (e.g. check-in) must not count the purchase again
+            ticket.checked_in = True
+            ticket.save()
+
+        response = self.client.get('/api/events/trending/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([e['id'] for e in response.data], [self.events[1].id, self.events[2].id])
+        self.assertEqual(response.data[0]['trending']['purchases_24h'], 1)
+        self.assertEqual(response.data[1]['trending']['views_24h'], 3)
+
+    def test_trending_endpoint_skips_unpublished_events(self):
+        trending.record_view(self.events[0].id)
+        Event.objects.filter(pk=self.events[0].pk).update(status='CANCELLED')
+
+        response = self.client.get('/api/events/trending/')
+        self.assertEqual(response.data, [])
+
+
+class SimilarEventsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        similarity.clear_index()
+        # Builds run inline here; test_rebuilds_stay_off_the_request_path runs them by hand
+        patcher = mock.patch.object(similarity, '_spawn', lambda build: build())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.organizer = User.objects.create_user(
+            email='organizer@example.com', username='organizer', password='x', role='ORGANIZER'
+        )
+        self.start = timezone.now() + timedelta(days=7)
+
+    def create_event(self, title, description, category):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Event.objects.create(
+                title=title, description=description, organizer=self.organizer, location='Lagos',
+                start_date=self.start, end_date=self.start + timedelta(hours=2), category=category,
+                status='PUBLISHED'
+            )
+
+    def test_index_ranks_by_cosine_and_survives_compaction(self):
+        documents = [
+            (1, similarity.event_terms('Python for data science', 'pandas numpy notebooks', 'Workshop')),
+            (2, similarity.event_terms('Advanced Python', 'asyncio typing packaging', 'Workshop')),
+            (3, similarity.event_terms('Product design meetup', 'figma research', 'Meetup')),
+        ]
+        index = similarity.SimilarityIndex(documents)
+        query = similarity.event_terms('Data science with Python', 'numpy and pandas', 'Workshop')
+        self.assertEqual([event_id for event_id, _ in index.query(query, k=3)], [1, 2])
+
+        # An edit goes to the delta segment and replaces the old row
+        index.upsert(3, similarity.event_terms('Data science meetup', 'pandas numpy python', 'Workshop'))
+        ranked = index.query(query, k=3)
+        self.assertEqual(ranked[0][0], 1)
+        self.assertIn(3, [event_id for event_id, _ in ranked])
+
+        compacted = similarity.SimilarityIndex(index._documents())
+        self.assertEqual(
+            [event_id for event_id, _ in compacted.query(query, k=3)][0], 1
+        )
+        index.remove(1)
+        self.assertNotIn(1, [event_id for event_id, _ in index.query(query, k=3)])
+
+    def test_similar_endpoint_follows_saves(self):
+        python = self.create_event('Python workshop', 'Hands-on Django and Python', 'Workshop')
+        django = self.create_event('Django deep dive', 'Python web apps with Django', 'Workshop')
+        design = self.create_event('Design meetup', 'Figma and product research', 'Meetup')
+
+        response = self.client.get(f'/api/events/{python.id}/similar/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([e['id'] for e in response.data], [django.id])
+
+        # Editing the design meetup into a Python event is picked up incrementally
+        with self.captureOnCommitCallbacks(execute=True):
+            design.title = 'Python design patterns'
+            design.description = 'Django and Python architecture'
+            design.save()
+        response = self.client.get(f'/api/events/{python.id}/similar/')
+        self.assertEqual({e['id'] for e in response.data}, {django.id, design.id})
+        self.assertGreater(response.data[0]['similarity'], 0)
+
+    def test_index_missing_changes_is_rebuilt_after_interval(self):
+        python = self.create_event('Python workshop', 'Hands-on Django and Python', 'Workshop')
+        self.assertEqual(similarity.similar_events(python), [])
+
+        # bulk_create skips the signals, like a change whose log entry this worker never sees
+        [django] = Event.objects.bulk_create([Event(
+            title='Django deep dive', description='Python web apps with Django', organizer=self.organizer,
+            location='Lagos', start_date=self.start, end_date=self.start + timedelta(hours=2),
+            category='Workshop', status='PUBLISHED'
+        )])
+        self.assertEqual(similarity.similar_events(python), [])
+
+        similarity.get_index().built_at -= similarity.REBUILD_SECONDS + 1
+        self.assertEqual([event_id for event_id, _ in similarity.similar_events(python)], [django.id])
+
+    def test_rebuilds_stay_off_the_request_path(self):
+        builds = []
+        with mock.patch.object(similarity, '_spawn', builds.append):
+            python = self.create_event('Python workshop', 'Hands-on Django and Python', 'Workshop')
+            django = self.create_event('Django deep dive', 'Python web apps with Django', 'Workshop')
+            self.create_event('Design meetup', 'Figma and product research', 'Meetup')
+
+            # No index yet: same-category events, and only one build is started
+            self.assertEqual(similarity.similar_events(python), [(django.id, 0.0)])
+            self.assertEqual(similarity.similar_events(python), [(django.id, 0.0)])
+            self.assertEqual(len(builds), 1)
+
+            builds.pop()()
+            [(event_id, score)] = similarity.similar_events(python)
+            self.assertEqual(event_id, django.id)
+            self.assertGreater(score, 0)
+
+            # An expired index keeps answering until its replacement is swapped in
+            [flask] = Event.objects.bulk_create([Event(
+                title='Flask and Django', description='Python web apps', organizer=self.organizer,
+                location='Lagos', start_date=self.start, end_date=self.start + timedelta(hours=2),
+                category='Workshop', status='PUBLISHED'
+            )])
+            similarity.get_index().built_at -= similarity.REBUILD_SECONDS + 1
+            self.assertEqual([event_id for event_id, _ in similarity.similar_events(python)], [django.id])
+            self.assertEqual(len(builds), 1)
+            builds.pop()()
+            self.assertEqual({event_id for event_id, _ in similarity.similar_events(python)}, {django.id, flask.id})
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        autocomplete.clear_index()
+        self.client = APIClient()
+        self.organizer = User.objects.create_user(
+            email='organizer@example.com', username='organizer', password='x', role='ORGANIZER'
+        )
+        self.attendee = User.objects.create_user(email='attendee@example.com', username='attendee', password='x')
+        self.start = timezone.now() + timedelta(days=7)
+
+    def create_event(self, title, category, location):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Event.objects.create(
+                title=title, description='Talks', organizer=self.organizer, location=location,
+                start_date=self.start, end_date=self.start + timedelta(hours=2), category=category,
+                status='PUBLISHED'
+            )
+
+    def test_index_matches_word_prefixes_by_popularity(self):
+        index = autocomplete.PrefixIndex()
+        index.add_event(1, 'Advanced Python', 'Workshop', 'Lagos', tickets_sold=5)
+        index.add_event(2, 'Python Basics', 'Workshop', 'Port Harcourt', tickets_sold=20)
+        index.add_event(3, 'Pyramid of Product', 'Meetup', 'Lagos', tickets_sold=1)
+        index.compact()
+
+        self.assertEqual(
+            [text for text, _, _ in index.search('PY')],
+            ['Python Basics', 'Advanced Python', 'Pyramid of Product']
+        )
+        self.assertEqual(index.search('harc'), [('Port Harcourt', 'location', None)])
+        # Workshop is shared by two events and outranks the single Lagos meetup's title
+        self.assertEqual(index.search('work')[0], ('Workshop', 'category', None))
+
+        index.remove_event(2)
+        index.add_event(4, 'Pythonic APIs', 'Workshop', 'Abuja')
+        self.assertEqual([text for text, _, _ in index.search('py')], [
+            'Advanced Python', 'Pyramid of Product', 'Pythonic APIs'
+        ])
+        self.assertEqual(index.search('port'), [])
+
+    def test_endpoint_follows_saves(self):
+        event = self.create_event('Django Conference', 'Conference', 'Lagos')
+        Ticket.objects.create(
+            event=event, user=self.attendee, price_paid=Decimal('0.00'),
+            payment_status='COMPLETED', qr_code='tickets/qrcodes/test.png'
+        )
+        self.create_event('Data Engineering Day', 'Conference', 'Abuja')
+
+        response = self.client.get('/api/events/autocomplete/', {'q': 'd'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [s['text'] for s in response.data['suggestions']],
+            ['Django Conference', 'Data Engineering Day']
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.status = 'CANCELLED'
+            event.save()
+        response = self.client.get('/api/events/autocomplete/', {'q': 'conf'})
+        self.assertEqual(response.data['suggestions'], [{'text': 'Conference', 'type': 'category', 'event_id': None}])
+
+
+class EventFacetsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.organizer = User.objects.create_user(
+            email='organizer@example.com', username='organizer', password='x', role='ORGANIZER'
+        )
+        soon = timezone.now() + timedelta(days=3)
+        later = timezone.now() + timedelta(days=60)
+        for title, category, price, start, event_status in [
+            ('Intro', 'Workshop', '0.00', soon, 'PUBLISHED'),
+            ('Deep dive', 'Workshop', '15000.00', later, 'PUBLISHED'),
+            ('Summit', 'Conference', '75000.00', later, 'PUBLISHED'),
+            ('Planning', 'Meetup', '0.00', later, 'DRAFT'),
+        ]:
+            Event.objects.create(
+                title=title, description='Talks', organizer=self.organizer, location='Lagos',
+                start_date=start, end_date=start + timedelta(hours=2), category=category,
+                ticket_price=Decimal(price), status=event_status
+            )
+
+    def facet(self, data, name):
+        return {item['value']: item['count'] for item in data['facets'][name]}
+
+    def test_facets_follow_filters_and_visibility(self):
+        response = self.client.get('/api/events/', {'facets': 'true'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.facet(response.data, 'category'), {'Workshop': 2, 'Conference': 1})
+        self.assertEqual(self.facet(response.data, 'status'), {'PUBLISHED': 3})
+        self.assertEqual(self.facet(response.data, 'price_band')['free'], 1)
+        self.assertEqual(self.facet(response.data, 'price_band')['5000_20000'], 1)
+        self.assertEqual(self.facet(response.data, 'date')['this_week'], 1)
+
+        response = self.client.get('/api/events/', {'facets': 'true', 'category': 'Workshop'})
+        self.assertEqual(self.facet(response.data, 'price_band')['over_50000'], 0)
+
+        self.client.force_authenticate(user=self.organizer)
+        response = self.client.get('/api/events/', {'facets': 'true'})
+        self.assertEqual(self.facet(response.data, 'status'), {'PUBLISHED': 3, 'DRAFT': 1})
+
+    def test_facets_are_cached_until_an_event_changes(self):
+        # Reads the conditional GET stamps, which are then cached
+        self.client.get('/api/events/')
+        with CaptureQueriesContext(connection) as first:
+            self.client.get('/api/events/', {'facets': 'true'})
+        with CaptureQueriesContext(connection) as second:
+            self.client.get('/api/events/', {'facets': 'true', 'page': 1, 'fields': 'id,title', 'expand': ''})
+        self.assertEqual(len(second), len(first) - 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Event.objects.filter(title='Summit').first().delete()
+        response = self.client.get('/api/events/', {'facets': 'true'})
+        self.assertEqual(self.facet(response.data, 'category'), {'Workshop': 2})
+
+
+class CategoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.organizer = User.objects.create_user(
+            email='organizer@example.com', username='organizer', password='x', role='ORGANIZER'
+        )
+        self.start = timezone.now() + timedelta(days=7)
+
+    def create_event(self, category, event_status='PUBLISHED'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Event.objects.create(
+                title='Event', description='Talks', organizer=self.organizer, location='Lagos',
+                start_date=self.start, end_date=self.start + timedelta(hours=2), category=category,
+                status=event_status
+            )
+
+    def test_free_text_maps_to_one_category_with_counts(self):
+        first = self.create_event('Machine Learning')
+        second = self.create_event('  machine learning')
+        self.create_event('Machine Learning', event_status='DRAFT')
+
+        category = Category.objects.get()
+        self.assertEqual(category.slug, 'machine-learning')
+        self.assertEqual(second.category, 'Machine Learning')
+        self.assertEqual(category.published_events_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.status = 'CANCELLED'
+            first.save()
+        second.category = 'Design'
+        second.save()
+        self.assertEqual(Category.objects.get(slug='machine-learning').published_events_count, 0)
+        self.assertEqual(Category.objects.get(slug='design').published_events_count, 1)
+
+    def test_listing_is_cached_and_slug_filter_is_exact(self):
+        workshop = self.create_event('Workshop')
+        self.create_event('Workshops')
+        self.client.get('/api/events/categories/')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/events/categories/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c['slug'] for c in response.data], ['workshop', 'workshops'])
+
+        response = self.client.get('/api/events/', {'category_slug': 'workshop'})
+        self.assertEqual([e['id'] for e in response.data['results']], [workshop.id])
+        self.assertEqual(response.data['results'][0]['category_slug'], 'workshop')
+
+        response = self.client.get('/api/events/', {'category_slug': 'unknown'})
+        self.assertEqual(response.data['count'], 0)
+
+        # A new event starts a new cache generation
+        self.create_event('Hackathon')
+        response = self.client.get('/api/events/categories/')
+        self.assertEqual(len(response.data), 3)
+
+
+class NearbyEventsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.organizer = User.objects.create_user(
+            email='organizer@example.com', username='organizer', password='x', role='ORGANIZER'
+        )
+        self.start = timezone.now() + timedelta(days=7)
+
+    def create_event(self, location, **kwargs):
+        kwargs.setdefault('status', 'PUBLISHED')
+        return Event.objects.create(
+            title=location, description='Talks', organizer=self.organizer, location=location,
+            start_date=self.start, end_date=self.start + timedelta(hours=2), category='Meetup', **kwargs
+        )
+
+    def test_geohash_cover_and_distance(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertAlmostEqual(float(geo.haversine_km(6.5244, 3.3792, [9.0765], [7.3986])[0]), 524, delta=5)
+
+        cells = geo.covering_cells(6.5244, 3.3792, 30)
+        self.assertLessEqual(len(cells), geo.MAX_COVER_CELLS)
+        self.assertTrue(any(geo.encode(6.6018, 3.3515).startswith(cell) for cell in cells))
+        # Circles crossing the antimeridian cover both sides
+        cells = geo.covering_cells(0, 179.99, 10)
+        self.assertTrue(any(geo.encode(0, -179.99).startswith(cell) for cell in cells))
+
+    def test_locations_are_geocoded_once(self):
+        # Saves never call the provider; the command geocodes new locations
+        event = self.create_event('Landmark Centre, Lagos')
+        self.assertIsNone(event.latitude)
+        call_command('geocode_events', stdout=StringIO())
+        event.refresh_from_db()
+        self.assertAlmostEqual(event.latitude, 6.5244)
+        self.assertEqual(event.geohash, geo.encode(event.latitude, event.longitude))
+
+        # A known location is filled in from the cache on save
+        with mock.patch.object(geocoding.StubGeocoder, 'geocode') as provider:
+            again = self.create_event('Landmark centre, Lagos')
+        provider.assert_not_called()
+        self.assertAlmostEqual(again.latitude, 6.5244)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(geocoding.geocode('landmark centre,  LAGOS'), (6.5244, 3.3792))
+        self.assertIsNone(geocoding.geocode('Atlantis'))
+        self.assertTrue(GeocodeCache.objects.filter(query='atlantis', latitude__isnull=True).exists())
+
+        # Provider calls are spaced by its minimum interval; cache hits do not wait
+        with mock.patch.object(geocoding.StubGeocoder, 'min_interval', 1.0), \
+                mock.patch.object(geocoding, '_last_call', 0.0), \
+                mock.patch('core.geocoding.time.sleep') as sleep:
+            geocoding.geocode('Kano')
+            geocoding.geocode('Kaduna')
+            geocoding.geocode('Kano')
+        self.assertEqual(sleep.call_count, 1)
+
+        # Explicit coordinates win over the geocoder
+        pinned = self.create_event('Lagos', latitude=6.45, longitude=3.40)
+        self.assertEqual((pinned.latitude, pinned.longitude), (6.45, 3.40))
+
+    def test_nearby_orders_by_distance_within_radius(self):
+        ikeja = self.create_event('Ikeja')
+        lekki = self.create_event('Lekki')
+        self.create_event('Abuja')
+        self.create_event('Nowhere in particular')
+        self.create_event('Ikeja', status='DRAFT')
+        call_command('geocode_events', stdout=StringIO())
+
+        response = self.client.get('/api/events/nearby/', {'lat': 6.60, 'lng': 3.35, 'radius_km': 50})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([e['id'] for e in response.data], [ikeja.id, lekki.id])
+        self.assertLess(response.data[0]['distance_km'], 1)
+
+        response = self.client.get('/api/events/nearby/', {'lat': 6.60, 'lng': 3.35, 'radius_km': 50, 'limit': 1})
+        self.assertEqual(len(response.data), 1)
+        for params in ({'lat': 6.6}, {'lat': 'x', 'lng': 3}, {'lat': 91, 'lng': 3}, {'lat': 6, 'lng': 3, 'radius_km': 5000}):
+            self.assertEqual(self.client.get('/api/events/nearby/', params).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class EventCalendarTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.organizer = User.objects.create_user(
+            email='organizer@example.com', username='organizer', password='x', role='ORGANIZER'
+        )
+        today = timezone.localdate()
+        self.month = date(today.year + 1, 3, 1)
+
+    def create_event(self, start, end, event_status='PUBLISHED'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Event.objects.create(
+                title='Event', description='Talks', organizer=self.organizer, location='Lagos',
+                start_date=event_calendar.local_midnight(start) + timedelta(hours=9),
+                end_date=event_calendar.local_midnight(end) + timedelta(hours=17),
+                category='Meetup', status=event_status
+            )
+
+    def get_month(self, month):
+        return self.client.get('/api/events/calendar/', {'month': month.strftime('%Y-%m')})
+
+    def test_month_groups_overlapping_events_by_day(self):
+        # A long event started in February and runs into March
+        running = self.create_event(date(self.month.year, 2, 10), date(self.month.year, 3, 2))
+        single = self.create_event(date(self.month.year, 3, 2), date(self.month.year, 3, 2))
+        self.create_event(date(self.month.year, 3, 5), date(self.month.year, 3, 5), event_status='DRAFT')
+        self.create_event(date(self.month.year, 4, 1), date(self.month.year, 4, 1))
+        self.assertEqual(EventDay.objects.filter(event=running).count(), 21)
+
+        response = self.get_month(self.month)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([e['id'] for e in response.data['events']], [running.id, single.id])
+        self.assertEqual(response.data['days'], {
+            f'{self.month.year}-03-01': [running.id],
+            f'{self.month.year}-03-02': [running.id, single.id],
+        })
+        self.assertEqual(self.client.get('/api/events/calendar/', {'month': '2026-13'}).status_code, 400)
+
+    def test_month_is_cached_until_an_event_changes(self):
+        event = self.create_event(self.month, self.month)
+        self.get_month(self.month)
+        with self.assertNumQueries(0):
+            self.get_month(self.month)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.end_date = event_calendar.local_midnight(self.month + timedelta(days=2)) + timedelta(hours=1)
+            event.save()
+        response = self.get_month(self.month)
+        self.assertEqual(len(response.data['days']), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.status = 'CANCELLED'
+            event.save()
+        self.assertFalse(EventDay.objects.filter(event=event).exists())
+        self.assertEqual(self.get_month(self.month).data['events'], [])
+
+    def test_long_events_keep_day_rows_to_the_horizon(self):
+        # Runs from January to the end of June, with rows only for its first days
+        long_event = self.create_event(date(self.month.year, 1, 5), date(self.month.year, 6, 30))
+        self.assertEqual(EventDay.objects.filter(event=long_event).count(), event_calendar.DAY_ROWS_HORIZON)
+        self.create_event(date(self.month.year, 1, 5), date(self.month.year, 1, 20))
+
+        response = self.get_month(date(self.month.year, 5, 1))
+        self.assertEqual([e['id'] for e in response.data['events']], [long_event.id])
+        self.assertEqual(len(response.data['days']), 31)
+        self.assertEqual(self.get_month(date(self.month.year, 7, 1)).data['events'], [])
+
+    def test_event_duration_is_capped(self):
+        start = event_calendar.local_midnight(self.month)
+        with self.assertRaises(ValidationError):
+            self.create_event(self.month, self.month + timedelta(days=MAX_EVENT_DAYS + 1))
+
+        self.client.force_authenticate(user=self.organizer)
+        response = self.client.post('/api/events/', {
+            'title': 'Forever', 'description': 'Talks', 'location': 'Lagos', 'category': 'Meetup',
+            'start_date': start, 'end_date': start + timedelta(days=MAX_EVENT_DAYS + 1), 'status': 'PUBLISHED'
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Event.objects.filter(title='Forever').exists())
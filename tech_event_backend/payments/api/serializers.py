@@ -8,8 +8,10 @@ import string
 from django.conf import settings
 import requests
 from django.db import transaction
+from core import metrics
+from core.fieldsets import FieldsetMixin
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(FieldsetMixin, serializers.ModelSerializer):
     ticket_details = TicketSerializer(source='ticket', read_only=True)
     
     class Meta:
@@ -93,11 +95,12 @@ class PaymentInitiateSerializer(serializers.Serializer):
         
         # Make the API request to Paystack
         try:
-            response = requests.post(
-                'https://api.paystack.co/transaction/initialize',
-                json=payload,
-                headers=headers
-            )
+            with metrics.EXTERNAL_SECONDS.time(service='paystack', operation='initialize'):
+                response = requests.post(
+                    'https://api.paystack.co/transaction/initialize',
+                    json=payload,
+                    headers=headers
+                )
             response_data = response.json()
             
             if response.status_code == 200 and response_data['status']:
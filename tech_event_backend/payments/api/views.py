@@ -7,16 +7,24 @@ from django.db import transaction
 import requests
 from payments.models import Payment
 from tickets.models import Ticket
+from core import metrics
 from core.permissions import IsAdmin
+from core.querysets import OptimizedQuerysetMixin
 from .serializers import PaymentSerializer, PaymentInitiateSerializer, PaymentVerifySerializer
 from core.email import send_ticket_confirmation
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(OptimizedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['paystack_reference', 'transaction_id', 'status']
     ordering_fields = ['created_at', 'amount']
+    select_related_by_action = {
+        '*': ('ticket__event__organizer', 'ticket__user'),
+        # The confirmation email reads the ticket's event and holder
+        'verify': ('ticket__event', 'ticket__user'),
+        'webhook': ('ticket__event', 'ticket__user'),
+    }
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve', 'history']:
@@ -57,16 +65,17 @@ class PaymentViewSet(viewsets.ModelViewSet):
             reference = serializer.validated_data['reference']
             
             try:
-                payment = Payment.objects.get(paystack_reference=reference)
+                payment = self.optimize_queryset(Payment.objects.all()).get(paystack_reference=reference)
                 
                 # Call Paystack to verify the payment
                 paystack_secret_key = settings.PAYSTACK_SECRET_KEY
                 headers = {'Authorization': f'Bearer {paystack_secret_key}'}
                 
-                response = requests.get(
-                    f'https://api.paystack.co/transaction/verify/{reference}',
-                    headers=headers
-                )
+                with metrics.EXTERNAL_SECONDS.time(service='paystack', operation='verify'):
+                    response = requests.get(
+                        f'https://api.paystack.co/transaction/verify/{reference}',
+                        headers=headers
+                    )
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -136,7 +145,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
             
             try:
                 with transaction.atomic():
-                    payment = Payment.objects.get(paystack_reference=reference)
+                    payment = self.optimize_queryset(Payment.objects.all()).get(paystack_reference=reference)
                     
                     # Update payment status
                     payment.status = 'COMPLETED'
@@ -163,5 +172,6 @@ class PaymentViewSet(viewsets.ModelViewSet):
     def history(self, request):
         """Get payment history for the current user"""
         payments = Payment.objects.filter(user=request.user).order_by('-created_at')
+        payments = self.optimize_queryset(payments, self.get_serializer())
         serializer = PaymentSerializer(payments, many=True, context={'request': request})
         return Response(serializer.data)
\ No newline at end of file
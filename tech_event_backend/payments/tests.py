@@ -1,3 +1,42 @@
+from datetime import timedelta
 from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+from events.models import Event
+from tickets.models import Ticket
+from payments.models import Payment
+from core.testing import ConstantQueriesMixin
 
-# Create your tests here.
+User = get_user_model()
+
+
+class PaymentQueryCountTests(ConstantQueriesMixin, TestCase):
+    def setUp(self):
+        organizer = User.objects.create_user(
+            email='organizer@example.com', username='organizer', password='x', role='ORGANIZER'
+        )
+        self.attendee = User.objects.create_user(email='attendee@example.com', username='attendee', password='x')
+        start = timezone.now() + timedelta(days=5)
+        self.events = [
+            Event.objects.create(
+                title=f'Event {i}', description='Talks', organizer=organizer, location='Lagos',
+                start_date=start, end_date=start + timedelta(hours=2), category='Workshop', status='PUBLISHED'
+            )
+            for i in range(2)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.attendee)
+
+    def add_payment(self):
+        count = Payment.objects.count()
+        ticket = Ticket.objects.create(
+            event=self.events[count % 2], user=self.attendee, price_paid=0, payment_status='COMPLETED',
+            qr_code='tickets/qrcodes/test.png'
+        )
+        Payment.objects.create(user=self.attendee, ticket=ticket, amount=0, paystack_reference=f'REF-{count}')
+
+    def test_history_and_list_are_constant(self):
+        queries = self.assertConstantQueries(lambda: self.client.get('/api/payments/history/'), self.add_payment)
+        self.assertEqual(queries, 1)
+        self.assertConstantQueries(lambda: self.client.get('/api/payments/'), self.add_payment)
@@ -6,8 +6,9 @@ from events.api.serializers import EventSerializer
 from users.api.serializers import UserSerializer
 from django.utils import timezone
 from django.db import transaction
+from core.fieldsets import FieldsetMixin
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(FieldsetMixin, serializers.ModelSerializer):
     event_details = EventSerializer(source='event', read_only=True)
     user_details = UserSerializer(source='user', read_only=True)
     
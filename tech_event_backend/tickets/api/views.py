@@ -8,15 +8,33 @@ from django_filters.rest_framework import DjangoFilterBackend
 from tickets.models import Ticket
 from events.models import Event
 from .serializers import TicketSerializer, TicketPurchaseSerializer, TicketCheckInSerializer
+from core import conditional
 from core.permissions import IsAdmin, IsOrganizer, IsAdminOrOrganizer
+from core.querysets import OptimizedQuerysetMixin
 
-class TicketViewSet(viewsets.ModelViewSet):
+def my_tickets_state(view, request):
+    """Validator state of my_tickets: the tickets, their events and the profiles nested in them"""
+    tickets = Ticket.objects.filter(user=request.user)
+    event_id = request.query_params.get('event_id', None)
+    if event_id:
+        tickets = tickets.filter(event_id=event_id)
+    state = conditional.changes(
+        tickets, 'updated_at', 'event__updated_at', 'user__profile_updated_at', 'event__organizer__profile_updated_at'
+    )
+    stamps = conditional.stamps('tickets')
+    return (state, stamps), conditional.latest(state, *stamps)
+
+class TicketViewSet(OptimizedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['event', 'ticket_type', 'payment_status', 'checked_in']
     search_fields = ['ticket_number', 'user__email', 'user__first_name', 'user__last_name']
     ordering_fields = ['purchase_date', 'price_paid']
+    select_related_by_action = {
+        '*': ('event__organizer', 'user'),
+        'verify': ('event', 'user'),
+    }
     
     def get_permissions(self):
         if self.action in ['create', 'purchase', 'list', 'retrieve']:
@@ -72,6 +90,7 @@ class TicketViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    @conditional.conditional(my_tickets_state)
     def my_tickets(self, request):
         """Get all tickets for the current user"""
         tickets = Ticket.objects.filter(user=request.user)
@@ -81,6 +100,7 @@ class TicketViewSet(viewsets.ModelViewSet):
         if event_id:
             tickets = tickets.filter(event_id=event_id)
             
+        tickets = self.optimize_queryset(tickets, self.get_serializer())
         serializer = TicketSerializer(tickets, many=True, context={'request': request})
         return Response(serializer.data)
     
@@ -88,7 +108,7 @@ class TicketViewSet(viewsets.ModelViewSet):
     def verify(self, request, pk=None):
         """Verify a ticket's validity"""
         try:
-            ticket = Ticket.objects.get(id=pk)
+            ticket = self.optimize_queryset(Ticket.objects.all()).get(id=pk)
             
             # Check if the user is authorized to verify this ticket
             event = ticket.event
@@ -0,0 +1,55 @@
+# tickets/management/commands/rebuild_attendee_sketches.py
+from datetime import date, timedelta
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.analytics import fetch_columns, to_timestamps, SECONDS_PER_DAY
+from core.sketches import HyperLogLog
+from tickets.models import Ticket, AttendeeSketch
+
+EPOCH = date(1970, 1, 1)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild all unique-attendee HyperLogLog sketches from completed tickets'
+
+    def handle(self, *args, **options):
+        tickets = Ticket.objects.filter(payment_status='COMPLETED').order_by().values_list(
+            'event_id', 'user_id', 'created_at'
+        )
+        event_ids, user_ids, created = fetch_columns(tickets, 3)
+        event_ids = np.array(event_ids, dtype=np.int64)
+        user_ids = np.array(user_ids, dtype=np.int64)
+        days = np.floor(to_timestamps(created) / SECONDS_PER_DAY).astype(np.int64)
+
+        sketches = []
+        # Walk tickets grouped by event, then by purchase day within the event
+        order = np.lexsort((days, event_ids))
+        event_ids, user_ids, days = event_ids[order], user_ids[order], days[order]
+        event_bounds = np.flatnonzero(np.diff(event_ids)) + 1
+        for event_slice in np.split(np.arange(len(event_ids)), event_bounds):
+            if not len(event_slice):
+                continue
+            event_id = int(event_ids[event_slice[0]])
+            total = HyperLogLog()
+            total.add_many(user_ids[event_slice])
+            sketches.append(AttendeeSketch(event_id=event_id, day=AttendeeSketch.ALL_TIME, registers=total.to_bytes()))
+
+            event_days = days[event_slice]
+            day_bounds = np.flatnonzero(np.diff(event_days)) + 1
+            for day_slice in np.split(event_slice, day_bounds):
+                daily = HyperLogLog()
+                daily.add_many(user_ids[day_slice])
+                sketches.append(AttendeeSketch(
+                    event_id=event_id,
+                    day=EPOCH + timedelta(days=int(days[day_slice[0]])),
+                    registers=daily.to_bytes()
+                ))
+
+        with transaction.atomic():
+            AttendeeSketch.objects.all().delete()
+            AttendeeSketch.objects.bulk_create(sketches, batch_size=500)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(sketches)} sketches from {len(event_ids)} completed tickets"
+        ))
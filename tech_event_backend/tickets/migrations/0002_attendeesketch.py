@@ -0,0 +1,36 @@
+# Generated by Django 4.2.20 on 2026-10-19 14:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_eventsalesforecast'),
+        ('tickets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendeeSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(blank=True, null=True)),
+                ('registers', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendee_sketches', to='events.event')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'event'], name='tickets_att_day_a9cdfd_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='attendeesketch',
+            constraint=models.UniqueConstraint(fields=('event', 'day'), name='unique_attendee_sketch_event_day'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendeesketch',
+            constraint=models.UniqueConstraint(condition=models.Q(('day__isnull', True)), fields=('event',), name='unique_attendee_sketch_event_total'),
+        ),
+    ]
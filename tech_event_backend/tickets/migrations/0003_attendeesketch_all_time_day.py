@@ -0,0 +1,36 @@
+# Generated by Django 4.2.20 on 2026-10-19 16:02
+
+import datetime
+from django.db import migrations, models
+
+ALL_TIME = datetime.date(1000, 1, 1)
+
+
+def null_day_to_all_time(apps, schema_editor):
+    AttendeeSketch = apps.get_model('tickets', 'AttendeeSketch')
+    AttendeeSketch.objects.filter(day__isnull=True).update(day=ALL_TIME)
+
+
+def all_time_to_null_day(apps, schema_editor):
+    AttendeeSketch = apps.get_model('tickets', 'AttendeeSketch')
+    AttendeeSketch.objects.filter(day=ALL_TIME).update(day=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0002_attendeesketch'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='attendeesketch',
+            name='unique_attendee_sketch_event_total',
+        ),
+        migrations.RunPython(null_day_to_all_time, all_time_to_null_day),
+        migrations.AlterField(
+            model_name='attendeesketch',
+            name='day',
+            field=models.DateField(),
+        ),
+    ]
@@ -1,4 +1,5 @@
 # tickets/models.py
+from datetime import date
 from django.db import models
 from django.conf import settings
 import uuid
@@ -58,6 +59,44 @@ class Ticket(models.Model):
             self.qr_code.save(f"ticket_qr_{self.id}.png", File(buffer), save=False)
         
         super().save(*args, **kwargs)
+        self._stored_payment_status = self.payment_status
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so save signals can spot the move to COMPLETED
+        instance._stored_payment_status = instance.__dict__.get('payment_status')
+        return instance
+    
+    @property
+    def payment_just_completed(self):
+        """True inside save signals when this save completes the payment"""
+        return self.payment_status == 'COMPLETED' and getattr(self, '_stored_payment_status', None) != 'COMPLETED'
+    
+    def __str__(self):
+        return f"Ticket #{self.ticket_number} - {self.event.title}"
+
+class AttendeeSketch(models.Model):
+    """
+    HyperLogLog sketch (see core.sketches) of the unique holders of completed
+    tickets for an event, per purchase day (UTC). The row whose day is ALL_TIME
+    holds the event's all-time sketch; a real date rather than NULL keeps it under
+    the plain (event, day) unique constraint on every database backend.
+    """
+    ALL_TIME = date(1000, 1, 1)
+    
+    event = models.ForeignKey('events.Event', on_delete=models.CASCADE, related_name='attendee_sketches')
+    day = models.DateField()
+    registers = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'day'], name='unique_attendee_sketch_event_day'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'event']),
+        ]
     
     def __str__(self):
-        return f"Ticket #{self.ticket_number} - {self.event.title}"
\ No newline at end of file
+        return f"Attendee sketch for event {self.event_id} ({'all time' if self.day == self.ALL_TIME else self.day})"
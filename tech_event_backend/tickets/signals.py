@@ -0,0 +1,39 @@
+# tickets/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from tickets.models import Ticket
+from core import conditional, recommendations, trending
+from core.sketches import record_ticket
+
+
+@receiver(post_save, sender=Ticket)
+def update_attendee_sketches(sender, instance, **kwargs):
+    """
+    Count the holder of a newly completed ticket in the unique-attendee sketches,
+    after the purchase commits so the sketch row locks are not held across it
+    """
+    if instance.payment_just_completed:
+        transaction.on_commit(lambda: record_ticket(instance))
+
+
+@receiver(post_save, sender=Ticket)
+def count_trending_purchase(sender, instance, **kwargs):
+    """Count a purchase towards the event's trending score once the payment completes"""
+    if instance.payment_just_completed:
+        event_id = instance.event_id
+        transaction.on_commit(lambda: trending.record_purchase(event_id))
+
+
+@receiver(post_save, sender=Ticket)
+def refresh_buyer_recommendations(sender, instance, **kwargs):
+    """A purchase changes the buyer's affinities, so drop their cached recommendations"""
+    if instance.payment_just_completed:
+        user_id = instance.user_id
+        transaction.on_commit(lambda: recommendations.invalidate_user(user_id))
+
+
+@receiver(post_delete, sender=Ticket)
+def touch_deleted_tickets(sender, instance, **kwargs):
+    """Deletions do not move any remaining updated_at, so ticket validators also use this stamp"""
+    conditional.touch('tickets')
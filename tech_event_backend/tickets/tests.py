@@ -1,3 +1,46 @@
+from datetime import timedelta
 from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+from events.models import Event
+from tickets.models import Ticket
+from core.testing import ConstantQueriesMixin
 
-# Create your tests here.
+User = get_user_model()
+
+
+class TicketQueryCountTests(ConstantQueriesMixin, TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(
+            email='organizer@example.com', username='organizer', password='x', role='ORGANIZER'
+        )
+        self.attendee = User.objects.create_user(email='attendee@example.com', username='attendee', password='x')
+        start = timezone.now() + timedelta(days=5)
+        self.event = Event.objects.create(
+            title='Workshop', description='Talks', organizer=self.organizer, location='Lagos',
+            start_date=start, end_date=start + timedelta(hours=2), category='Workshop', status='PUBLISHED'
+        )
+        self.client = APIClient()
+
+    def add_ticket(self):
+        holder = User.objects.create_user(
+            email=f'holder{User.objects.count()}@example.com', username=f'holder{User.objects.count()}', password='x'
+        )
+        for user in (self.attendee, holder):
+            Ticket.objects.create(
+                event=self.event, user=user, price_paid=0, payment_status='COMPLETED',
+                qr_code='tickets/qrcodes/test.png'
+            )
+
+    def test_attendee_endpoints_are_constant(self):
+        self.client.force_authenticate(user=self.attendee)
+        self.assertConstantQueries(lambda: self.client.get('/api/tickets/'), self.add_ticket)
+        self.assertConstantQueries(lambda: self.client.get('/api/tickets/my_tickets/'), self.add_ticket)
+
+    def test_organizer_endpoints_are_constant(self):
+        self.client.force_authenticate(user=self.organizer)
+        self.assertConstantQueries(lambda: self.client.get('/api/tickets/'), self.add_ticket)
+        self.assertConstantQueries(
+            lambda: self.client.get(f'/api/events/{self.event.id}/attendees/'), self.add_ticket
+        )
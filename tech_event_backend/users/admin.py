@@ -2,7 +2,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import User
-from .models import OrganizerRequest
+from .models import CalendarFeed, OrganizerRequest
 
 @admin.register(OrganizerRequest)
 class OrganizerRequestAdmin(admin.ModelAdmin):
@@ -44,4 +44,11 @@ class CustomUserAdmin(UserAdmin):
     search_fields = ('email', 'username', 'first_name', 'last_name')
     ordering = ('email',)
 
-admin.site.register(User, CustomUserAdmin)
\ No newline at end of file
+admin.site.register(User, CustomUserAdmin)
+
+
+@admin.register(CalendarFeed)
+class CalendarFeedAdmin(admin.ModelAdmin):
+    list_display = ['user', 'created_at', 'rotated_at']
+    search_fields = ['user__email']
+    readonly_fields = ['token', 'created_at', 'rotated_at']
@@ -6,6 +6,7 @@ from django.utils import timezone
 from rest_framework.validators import UniqueValidator
 from dj_rest_auth.registration.serializers import SocialLoginSerializer
 from allauth.socialaccount.models import SocialLogin
+from core.fieldsets import FieldsetMixin
 
 # Import the Event and Ticket models - adjust the import path as needed
 from events.models import Event
@@ -13,7 +14,7 @@ from tickets.models import Ticket
 
 User = get_user_model()
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(FieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'email', 'first_name', 'last_name', 'username', 
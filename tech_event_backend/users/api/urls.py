@@ -25,6 +25,9 @@ from .views import (
     attendee_statistics,
     attendee_ticket_history,
     attendee_upcoming_events,
+    attendee_recommendations,
+    attendee_calendar_feed,
+    attendee_calendar_feed_ics,
     attendee_dashboard_summary,
     organizer_attendees,
     organizer_attendee_stats,
@@ -32,6 +35,7 @@ from .views import (
     check_in_attendee,
     bulk_email_attendees,
     organizer_statistics,
+    organizer_unique_attendees,
     organizer_dashboard_summary,
 )
 
@@ -67,6 +71,9 @@ urlpatterns = [
     path('attendee/statistics/', attendee_statistics, name='attendee-statistics'),
     path('attendee/ticket-history/', attendee_ticket_history, name='attendee-ticket-history'),
     path('attendee/upcoming-events/', attendee_upcoming_events, name='attendee-upcoming-events'),
+    path('attendee/recommendations/', attendee_recommendations, name='attendee-recommendations'),
+    path('attendee/calendar-feed/', attendee_calendar_feed, name='attendee-calendar-feed'),
+    path('attendee/calendar/<str:token>.ics', attendee_calendar_feed_ics, name='attendee-calendar-feed-ics'),
     path('attendee/dashboard-summary/', attendee_dashboard_summary, name='attendee-dashboard-summary'),
 
     # Organizer attendee management
@@ -74,6 +81,7 @@ urlpatterns = [
     # Organizer analytics and dashboard
     # path('organizer/analytics/', organizer_analytics, name='organizer-analytics'),
     path('organizer/statistics/', organizer_statistics, name='organizer-statistics'),
+    path('organizer/unique-attendees/', organizer_unique_attendees, name='organizer-unique-attendees'),
     path('organizer/dashboard-summary/', organizer_dashboard_summary, name='organizer-dashboard-summary'),
     
     path('organizer/attendees/', organizer_attendees, name='organizer-attendees'),
@@ -20,7 +20,7 @@ from sendgrid.helpers.mail import Mail, Email, To, Content
 from django.shortcuts import render
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Sum, Q, F, Avg
+from django.db.models import Count, Sum, Q, F, Avg, Max, Min
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django.views.generic import TemplateView
@@ -28,15 +28,21 @@ from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.views.generic import RedirectView
 from django.urls import reverse
-from django.http import HttpResponseRedirect
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_GET
 from allauth.socialaccount.providers.oauth2.views import OAuth2Adapter
 import requests
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from users.models import OrganizerRequest
+from users.models import CalendarFeed, OrganizerRequest
 from core.email import send_password_reset, send_email
+from core import analytics, conditional, recommendations, sketches, ticket_feed
+from core.quotas import quota
 from events.models import Event
+from events.api.serializers import EventListSerializer
 import csv
 from users.models import User
 from tickets.models import Ticket
@@ -469,6 +475,7 @@ class GithubLoginAPI(APIView):
 #users/api/views.py
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@quota(measured=True)
 def attendee_statistics(request):
     """
     Comprehensive statistics for the current attendee user
@@ -664,6 +671,99 @@ def attendee_upcoming_events(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@quota(measured=True)
+def attendee_recommendations(request):
+    """
+    Upcoming events recommended from the attendee's category history
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), recommendations.TOP_K)
+    except ValueError:
+        return Response(
+            {"error": "limit must be an integer."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    event_ids = recommendations.recommend_for_user(request.user.id, limit=limit)
+    
+    # Recommendations are precomputed; skip events unpublished or started since
+    events = Event.objects.select_related('organizer', 'category_ref').filter(
+        id__in=event_ids, status='PUBLISHED', start_date__gt=timezone.now()
+    ).in_bulk()
+    
+    return Response({
+        'recommended_events': [
+            EventListSerializer(events[event_id], context={'request': request}).data
+            for event_id in event_ids if event_id in events
+        ]
+    })
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def attendee_calendar_feed(request):
+    """
+    Get the attendee's private iCalendar feed URL; POST issues a new one and revokes the old
+    """
+    feed, _ = CalendarFeed.objects.get_or_create(user=request.user)
+    if request.method == 'POST':
+        feed.rotate()
+    
+    return Response({
+        'feed_url': request.build_absolute_uri(reverse('attendee-calendar-feed-ics', args=[feed.token]))
+    })
+
+@require_GET
+def attendee_calendar_feed_ics(request, token):
+    """
+    iCalendar feed of the events a feed token's owner holds tickets for.
+    The token in the URL is the credential, since calendar apps cannot send JWTs.
+    """
+    try:
+        feed = CalendarFeed.objects.select_related('user').get(token=token)
+    except CalendarFeed.DoesNotExist:
+        raise Http404
+    
+    digest, last_modified = ticket_feed.feed_state(feed.user_id)
+    etag = quote_etag(digest)
+    last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+    
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+    if response is None:
+        body = ticket_feed.render_feed(feed.user, digest, last_modified or timezone.now())
+        response = HttpResponse(body, content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="tickets.ics"'
+    
+    response['ETag'] = etag
+    if last_modified_ts is not None:
+        response['Last-Modified'] = http_date(last_modified_ts)
+    response['Cache-Control'] = 'private, max-age=300'
+    return response
+
+def attendee_dashboard_state(request):
+    """
+    Everything the attendee summary is computed from, in one aggregate. Parts
+    of it move with the clock (the 30-day window, days until the next event),
+    so it has an ETag but no Last-Modified.
+    """
+    now = timezone.now()
+    completed = Q(payment_status='COMPLETED')
+    state = Ticket.objects.filter(user=request.user).aggregate(
+        count=Count('id'),
+        tickets_changed=Max('updated_at'),
+        events_changed=Max('event__updated_at'),
+        recent=Count('id', filter=completed & Q(created_at__gte=now - timedelta(days=30))),
+        next_start=Min(
+            'event__start_date',
+            filter=completed & Q(event__start_date__gt=now, event__status='PUBLISHED')
+        ),
+    )
+    days_until = (state['next_start'] - now).days if state['next_start'] else None
+    return (state, days_until, now.year), None
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional.conditional(attendee_dashboard_state)
+@quota(measured=True)
 def attendee_dashboard_summary(request):
     """
     Quick summary data for attendee dashboard home
@@ -711,6 +811,7 @@ def attendee_dashboard_summary(request):
 # users/api/views.py
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@quota(measured=True)
 def organizer_analytics(request):
     """
     Comprehensive analytics for organizer users
@@ -727,201 +828,17 @@ def organizer_analytics(request):
     # Get period parameter
     period = request.GET.get('period', '6months')
     
-    # Calculate date range based on period
-    now = timezone.now()
-    if period == '1month':
-        start_date = now - timedelta(days=30)
-    elif period == '3months':
-        start_date = now - timedelta(days=90)
-    elif period == '6months':
-        start_date = now - timedelta(days=180)
-    elif period == '1year':
-        start_date = now - timedelta(days=365)
-    else:
-        start_date = now - timedelta(days=180)  # Default to 6 months
-    
     # Base queryset for user's events
     if user.role == 'ADMIN':
         events_queryset = Event.objects.all()
     else:
         events_queryset = Event.objects.filter(organizer=user)
     
-    # Filter events by date range
-    period_events = events_queryset.filter(created_at__gte=start_date)
-    
-    # Get tickets for these events
-    period_tickets = Ticket.objects.filter(
-        event__in=period_events,
-        payment_status='COMPLETED'
-    )
-    
-    # Calculate previous period for growth comparison
-    previous_start = start_date - (now - start_date)
-    previous_events = events_queryset.filter(
-        created_at__gte=previous_start,
-        created_at__lt=start_date
-    )
-    previous_tickets = Ticket.objects.filter(
-        event__in=previous_events,
-        payment_status='COMPLETED'
-    )
-    
-    # Overview calculations
-    total_revenue = period_tickets.aggregate(
-        total=Sum('event__ticket_price')
-    )['total'] or Decimal('0.00')
-    
-    previous_revenue = previous_tickets.aggregate(
-        total=Sum('event__ticket_price')
-    )['total'] or Decimal('0.00')
-    
-    total_tickets_sold = period_tickets.count()
-    previous_tickets_sold = previous_tickets.count()
-    
-    total_events = period_events.count()
-    active_events = period_events.filter(
-        status='PUBLISHED',
-        end_date__gt=now
-    ).count()
-    
-    # Calculate growth percentages
-    revenue_growth = 0
-    if previous_revenue > 0:
-        revenue_growth = float((total_revenue - previous_revenue) / previous_revenue * 100)
-    elif total_revenue > 0:
-        revenue_growth = 100
-    
-    ticket_growth = 0
-    if previous_tickets_sold > 0:
-        ticket_growth = float((total_tickets_sold - previous_tickets_sold) / previous_tickets_sold * 100)
-    elif total_tickets_sold > 0:
-        ticket_growth = 100
-    
-    # Monthly revenue data
-    monthly_revenue = []
-    for i in range(6):  # Last 6 months
-        month_start = (now.replace(day=1) - timedelta(days=i*30)).replace(day=1)
-        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        
-        month_tickets = Ticket.objects.filter(
-            event__in=events_queryset,
-            payment_status='COMPLETED',
-            created_at__gte=month_start,
-            created_at__lte=month_end
-        )
-        
-        month_revenue = month_tickets.aggregate(
-            total=Sum('event__ticket_price')
-        )['total'] or Decimal('0.00')
-        
-        monthly_revenue.append({
-            'month': month_start.strftime('%Y-%m'),
-            'amount': float(month_revenue)
-        })
-    
-    monthly_revenue.reverse()  # Most recent first
-    
-    # Event performance data
-    event_performance = []
-    for event in period_events.filter(status='PUBLISHED')[:10]:  # Top 10 events
-        event_tickets = Ticket.objects.filter(
-            event=event,
-            payment_status='COMPLETED'
-        )
-        
-        tickets_sold = event_tickets.count()
-        event_revenue = event_tickets.aggregate(
-            total=Sum('event__ticket_price')
-        )['total'] or Decimal('0.00')
-        
-        checked_in_count = event_tickets.filter(checked_in=True).count()
-        attendance_rate = (checked_in_count / tickets_sold * 100) if tickets_sold > 0 else 0
-        
-        event_performance.append({
-            'event_title': event.title,
-            'tickets_sold': tickets_sold,
-            'revenue': float(event_revenue),
-            'attendance_rate': round(attendance_rate, 1)
-        })
-    
-    # Sort by revenue
-    event_performance.sort(key=lambda x: x['revenue'], reverse=True)
-    
-    # Category distribution
-    category_stats = Ticket.objects.filter(
-        event__in=period_events,
-        payment_status='COMPLETED'
-    ).values('event__category').annotate(
-        count=Count('id'),
-        revenue=Sum('price_paid')
-    ).order_by('-revenue')
-    
-    category_distribution = []
-    for stat in category_stats:
-        category_distribution.append({
-            'category': stat['category'],
-            'count': stat['count'],
-            'revenue': float(stat['revenue'] or 0)
-        })
-    
-    # Daily ticket sales (last 30 days)
-    daily_sales = []
-    for i in range(30):
-        date = now.date() - timedelta(days=i)
-        day_tickets = period_tickets.filter(
-            created_at__date=date
-        ).count()
-        
-        daily_sales.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'tickets': day_tickets
-        })
-    
-    daily_sales.reverse()  # Chronological order
-    
-    # Ticket types breakdown
-    ticket_types = period_tickets.values('ticket_type').annotate(
-        count=Count('id'),
-        revenue=Sum('event__ticket_price')
-    ).order_by('-count')
-    
-    ticket_types_data = []
-    for ticket_type in ticket_types:
-        ticket_types_data.append({
-            'type': ticket_type['ticket_type'],
-            'count': ticket_type['count'],
-            'revenue': float(ticket_type['revenue'] or 0)
-        })
-    
-    # Compile analytics data
-    analytics = {
-        'overview': {
-            'total_revenue': float(total_revenue),
-            'total_tickets_sold': total_tickets_sold,
-            'total_events': total_events,
-            'active_events': active_events,
-            'revenue_growth': round(revenue_growth, 2),
-            'ticket_growth': round(ticket_growth, 2)
-        },
-        'revenue': {
-            'monthly_revenue': monthly_revenue,
-            'total_this_month': float(monthly_revenue[-1]['amount']) if monthly_revenue else 0,
-            'total_last_month': float(monthly_revenue[-2]['amount']) if len(monthly_revenue) > 1 else 0
-        },
-        'events': {
-            'event_performance': event_performance,
-            'category_distribution': category_distribution
-        },
-        'tickets': {
-            'daily_sales': daily_sales,
-            'ticket_types': ticket_types_data
-        }
-    }
-    
-    return Response(analytics)
+    return Response(analytics.organizer_analytics(events_queryset, period=period))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@quota(measured=True)
 def organizer_attendees(request):
     """
     Get attendees for all events organized by the current user
@@ -1000,6 +917,7 @@ def organizer_attendees(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@quota(measured=True)
 def organizer_statistics(request):
     """
     Get comprehensive statistics for organizer dashboard
@@ -1019,113 +937,71 @@ def organizer_statistics(request):
     else:
         events_queryset = Event.objects.filter(organizer=user)
     
-    # Get current date for calculations
-    now = timezone.now()
-    today = now.date()
-    current_month_start = now.replace(day=1)
-    
-    # Total events and active events
-    total_events = events_queryset.count()
-    active_events = events_queryset.filter(
-        status='PUBLISHED',
-        end_date__gt=now
-    ).count()
-    
-    # Get all tickets for organizer's events with completed payments
-    all_tickets = Ticket.objects.filter(
-        event__in=events_queryset,
-        payment_status='COMPLETED'
-    )
-    
-    # Total tickets sold and revenue
-    total_tickets_sold = all_tickets.count()
-    total_revenue = all_tickets.aggregate(
-        total=Sum('event__ticket_price')
-    )['total'] or Decimal('0.00')
-    
-    # Total attendees (unique users who bought tickets)
-    total_attendees = all_tickets.values('user').distinct().count()
-    
-    # Calculate average attendance rate
-    events_with_attendance = []
-    for event in events_queryset.filter(status='PUBLISHED'):
-        event_tickets = all_tickets.filter(event=event)
-        total_event_tickets = event_tickets.count()
-        checked_in_tickets = event_tickets.filter(checked_in=True).count()
-        
-        if total_event_tickets > 0:
-            attendance_rate = (checked_in_tickets / total_event_tickets) * 100
-            events_with_attendance.append(attendance_rate)
-    
-    average_attendance_rate = (
-        sum(events_with_attendance) / len(events_with_attendance)
-        if events_with_attendance else 0
-    )
-    
-    # Recent activity calculations
-    # New registrations today
-    new_registrations_today = all_tickets.filter(
-        created_at__date=today
-    ).count()
+    return Response(analytics.organizer_statistics(events_queryset))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@quota(measured=True)
+def organizer_unique_attendees(request):
+    """
+    Estimated unique attendees across a set of events and/or purchase date range,
+    merged from HyperLogLog sketches
+    """
+    user = request.user
     
-    # Events this month
-    events_this_month = events_queryset.filter(
-        date__gte=current_month_start,
-        date__lt=current_month_start + timedelta(days=32)
-    ).count()
+    # Check if user is an organizer
+    if user.role not in ['ORGANIZER', 'ADMIN']:
+        return Response(
+            {"error": "You don't have permission to access this information."},
+            status=status.HTTP_403_FORBIDDEN
+        )
     
-    # Revenue this month
-    revenue_this_month = all_tickets.filter(
-        created_at__gte=current_month_start
-    ).aggregate(
-        total=Sum('event__ticket_price')
-    )['total'] or Decimal('0.00')
+    # Base queryset for user's events
+    if user.role == 'ADMIN':
+        events_queryset = Event.objects.all()
+    else:
+        events_queryset = Event.objects.filter(organizer=user)
     
-    # Top performing events (by revenue)
-    top_performing_events = []
-    for event in events_queryset.filter(status='PUBLISHED')[:10]:
-        event_tickets = all_tickets.filter(event=event)
-        tickets_sold = event_tickets.count()
-        event_revenue = event_tickets.aggregate(
-            total=Sum('event__ticket_price')
-        )['total'] or Decimal('0.00')
-        
-        checked_in_count = event_tickets.filter(checked_in=True).count()
-        attendance_rate = (checked_in_count / tickets_sold * 100) if tickets_sold > 0 else 0
-        
-        if tickets_sold > 0:  # Only include events with ticket sales
-            top_performing_events.append({
-                'id': event.id,
-                'title': event.title,
-                'tickets_sold': tickets_sold,
-                'revenue': float(event_revenue),
-                'attendance_rate': round(attendance_rate, 1)
-            })
+    # Optional filters: ?events=1,2,3&start=YYYY-MM-DD&end=YYYY-MM-DD
+    try:
+        event_ids = [int(i) for i in request.GET.get('events', '').split(',') if i.strip()]
+        start = request.GET.get('start')
+        end = request.GET.get('end')
+        start = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        end = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+    except ValueError:
+        return Response(
+            {"error": "Use comma-separated event ids and YYYY-MM-DD dates."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
-    # Sort by revenue and take top 5
-    top_performing_events.sort(key=lambda x: x['revenue'], reverse=True)
-    top_performing_events = top_performing_events[:5]
+    if event_ids:
+        events_queryset = events_queryset.filter(id__in=event_ids)
     
     return Response({
-        'overview': {
-            'total_events': total_events,
-            'active_events': active_events,
-            'total_tickets_sold': total_tickets_sold,
-            'total_revenue': float(total_revenue),
-            'total_attendees': total_attendees,
-            'average_attendance_rate': round(average_attendance_rate, 1)
-        },
-        'recent_activity': {
-            'new_registrations_today': new_registrations_today,
-            'events_this_month': events_this_month,
-            'revenue_this_month': float(revenue_this_month)
-        },
-        'top_performing_events': top_performing_events
+        'unique_attendees': sketches.unique_attendees(events_queryset, start=start, end=end),
+        'standard_error': round(sketches.standard_error(), 4),
+        'events': events_queryset.count(),
+        'start': start,
+        'end': end
     })
 
 
+def organizer_dashboard_state(request):
+    """Validator state of the organizer summary: the organizer's events and their tickets"""
+    user = request.user
+    if user.role not in ['ORGANIZER', 'ADMIN']:
+        return None
+    events_queryset = Event.objects.all() if user.role == 'ADMIN' else Event.objects.filter(organizer=user)
+    events = conditional.changes(events_queryset, 'updated_at')
+    tickets = conditional.changes(Ticket.objects.filter(event__in=events_queryset), 'updated_at')
+    stamps = conditional.stamps('events', 'tickets')
+    return (events, tickets, stamps), conditional.latest(events, tickets, *stamps)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional.conditional(organizer_dashboard_state)
+@quota(measured=True)
 def organizer_dashboard_summary(request):
     """
     Get recent events for organizer dashboard
@@ -1167,7 +1043,7 @@ def organizer_dashboard_summary(request):
         recent_events_data.append({
             'id': event.id,
             'title': event.title,
-            'start_date': event.date.isoformat() if event.date else None,
+            'start_date': event.start_date.isoformat() if event.start_date else None,
             'status': event.status,
             'tickets_sold': tickets_sold,
             'capacity': capacity,
@@ -1180,6 +1056,7 @@ def organizer_dashboard_summary(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@quota(measured=True)
 def organizer_attendee_stats(request):
     """
     Get statistics for all attendees across organizer's events
@@ -1294,6 +1171,7 @@ def check_in_attendee(request, ticket_id):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@quota(cost=20)
 def bulk_email_attendees(request):
     """
     Send bulk email to selected attendees
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.20 on 2026-10-19 16:06
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_calendarfeed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -3,6 +3,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
+import secrets
 
 # Define User first
 class User(AbstractUser):
@@ -20,9 +21,32 @@ class User(AbstractUser):
     )
     auth_provider = models.CharField(max_length=20, default='email')
     auth_provider_id = models.CharField(max_length=255, null=True, blank=True)
+    # Moves only when a field nested in event and ticket responses changes (see core.conditional)
+    profile_updated_at = models.DateTimeField(default=timezone.now)
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
+    # Fields of the profile shown wherever a user is nested (users.api.serializers.UserSerializer)
+    PROFILE_FIELDS = ('email', 'first_name', 'last_name', 'username', 'profile_picture', 'role', 'auth_provider')
+    
+    def _profile(self):
+        return tuple(self.__dict__.get(field) for field in self.PROFILE_FIELDS)
+    
+    def save(self, *args, **kwargs):
+        """Stamp profile_updated_at when a shown profile field changed since the user was loaded"""
+        stored = getattr(self, '_stored_profile', None)
+        if stored is not None and stored != self._profile():
+            self.profile_updated_at = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'profile_updated_at'}
+        super().save(*args, **kwargs)
+        self._stored_profile = self._profile()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_profile = instance._profile()
+        return instance
     
     def __str__(self):
         return self.email
@@ -51,4 +75,27 @@ class OrganizerRequest(models.Model):
         ordering = ['-created_at']
         
     def __str__(self):
-        return f"{self.user.email} - {self.status}"
\ No newline at end of file
+        return f"{self.user.email} - {self.status}"
+
+
+def generate_feed_token():
+    return secrets.token_urlsafe(32)
+
+
+class CalendarFeed(models.Model):
+    """
+    Secret token giving calendar apps read access to a user's ticket feed.
+    Rotating the token revokes every previously shared feed URL.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='calendar_feed')
+    token = models.CharField(max_length=64, unique=True, default=generate_feed_token)
+    created_at = models.DateTimeField(auto_now_add=True)
+    rotated_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Calendar feed for {self.user.email}"
+    
+    def rotate(self):
+        self.token = generate_feed_token()
+        self.rotated_at = timezone.now()
+        self.save(update_fields=['token', 'rotated_at'])
@@ -1,9 +1,14 @@
+from datetime import timedelta
 from django.test import TestCase
+from django.core.cache import cache
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 import json
+from events.models import Event
+from tickets.models import Ticket
 
 User = get_user_model()
 
@@ -55,4 +60,70 @@ class UserAuthenticationTests(TestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue('access' in response.data)
-        self.assertTrue('refresh' in response.data)
\ No newline at end of file
+        self.assertTrue('refresh' in response.data)
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        organizer = User.objects.create_user(
+            email='organizer@example.com', username='organizer', password='x', role='ORGANIZER'
+        )
+        self.attendee = User.objects.create_user(
+            email='attendee@example.com', username='attendee', password='x', first_name='Ada', last_name='Obi'
+        )
+        start = timezone.now() + timedelta(days=3)
+        self.event, self.other = [
+            Event.objects.create(
+                title=title, description='Talks, demos; and food', organizer=organizer, location='Yaba, Lagos',
+                start_date=start, end_date=start + timedelta(hours=3), category='Meetup', status='PUBLISHED'
+            )
+            for title in ('PyLagos', 'Unticketed')
+        ]
+        self.ticket = Ticket.objects.create(
+            event=self.event, user=self.attendee, price_paid=0, payment_status='COMPLETED',
+            qr_code='tickets/qrcodes/test.png'
+        )
+
+    def feed_url(self):
+        self.client.force_authenticate(user=self.attendee)
+        url = self.client.get('/api/auth/attendee/calendar-feed/').data['feed_url']
+        self.client.force_authenticate(user=None)
+        return url
+
+    def test_feed_lists_ticketed_events_and_revalidates(self):
+        url = self.feed_url()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = response.content.decode()
+        self.assertIn(f'UID:event-{self.event.id}@', body)
+        self.assertIn('LOCATION:Yaba\\, Lagos', body)
+        self.assertNotIn('Unticketed', body)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in body.split('\r\n')))
+
+        # Unchanged feeds revalidate with one lookup and one aggregate
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        etag = response['ETag']
+
+        self.event.title = 'PyLagos Meetup'
+        self.event.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('SUMMARY:PyLagos Meetup', response.content.decode())
+
+        self.ticket.payment_status = 'REFUNDED'
+        self.ticket.save()
+        self.assertNotIn('VEVENT', self.client.get(url).content.decode())
+
+    def test_rotating_the_token_revokes_the_old_url(self):
+        url = self.feed_url()
+        self.client.force_authenticate(user=self.attendee)
+        new_url = self.client.post('/api/auth/attendee/calendar-feed/').data['feed_url']
+        self.client.force_authenticate(user=None)
+
+        self.assertNotEqual(url, new_url)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(new_url).status_code, status.HTTP_200_OK)